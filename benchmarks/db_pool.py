@@ -0,0 +1,64 @@
+"""
+Micro-benchmark comparing per-call connections against the pooled SessionsController.
+
+Usage:
+    python -m benchmarks.db_pool [iterations]
+"""
+import os, sys, time, asyncio, tempfile, statistics
+
+# The config singleton expects these to be set
+os.environ.setdefault("CHAT_CATEGORY", "0")
+os.environ.setdefault("DEV_GUILD_ID", "0")
+
+import aiosqlite
+from src.database.loader import DatabaseLoader
+from src.database.backend.sqlite import SQLiteBackend
+from src.database.schema.sessions import SessionSchema
+from src.database.controller.sessions import SessionsController
+
+async def legacy_get_session(db_path: str, owner_id: int):
+    """Per-call connection, as every controller method used to do."""
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute('SELECT * FROM ssh_sessions WHERE owner_id = ?;', (owner_id,))
+        return await cursor.fetchone()
+
+async def legacy_add_message(db_path: str, session_id: int, content: str):
+    """Per-call connection and commit, as every controller method used to do."""
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute('''
+            INSERT INTO chat_messages (session_id, message_role, message_content)
+            VALUES (?, ?, ?);
+        ''', (session_id, "user", content))
+        await db.commit()
+
+async def measure(label: str, iterations: int, call) -> None:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await call(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<28} mean={statistics.mean(samples):7.3f}ms  p50={statistics.median(samples):7.3f}ms  p99={p99:7.3f}ms")
+
+async def main(iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "sessions.sqlite")
+
+        controller = SessionsController()
+        SQLiteBackend().db_path = db_path
+        loader = DatabaseLoader()
+        await loader.setup()
+        await controller.create_session(SessionSchema(owner_id=1, discord_channel_id=1))
+        session = await controller.fetch_session(1)
+
+        print(f"{iterations} iterations per case\n")
+        await measure("get_session (per-call)", iterations, lambda i: legacy_get_session(db_path, 1))
+        await measure("get_session (pooled)", iterations, lambda i: controller.fetch_session(1))
+        await measure("add_message (per-call)", iterations, lambda i: legacy_add_message(db_path, session.id, f"message {i}"))
+        await measure("add_message (pooled)", iterations, lambda i: controller.add_message(session.id, "user", f"message {i}"))
+
+        await loader.close()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,295 @@
+"""
+Offline stand-ins for the g4f client and the Discord objects the bot handles.
+
+The fake client answers like `g4f.client.AsyncClient`, with per-provider latency and error
+distributions. The fake Discord objects only implement what the cogs, views and controllers
+use, every REST call takes a fixed round trip time and is counted.
+"""
+import time, random, asyncio, discord, itertools
+from types import SimpleNamespace
+from dataclasses import dataclass
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+# Contents the bot answers with when a prompt fails
+FAILURE_PREFIXES = ("The model failed", "An error occurred")
+
+ids = itertools.count(10_000)
+
+# [PROVIDER]
+
+@dataclass
+class ProviderProfile:
+    """
+    Latency and error distribution of a fake provider.
+
+    Latencies are log-normal: `median` seconds, spread by `sigma`. A request fails with
+    probability `error_rate`, after its sampled latency. Requests taking longer than their
+    timeout fail with a timeout once it's over.
+    """
+    median: float = 0.8
+    sigma: float = 0.5
+    error_rate: float = 0.0
+
+    @staticmethod
+    def parse(value: str, default: "ProviderProfile") -> "ProviderProfile":
+        """Parses a `median ms[:sigma[:error rate]]` profile, missing fields are taken from `default`."""
+        fields = value.split(":")
+        return ProviderProfile(
+            median=float(fields[0]) / 1000 if fields[0] else default.median,
+            sigma=float(fields[1]) if len(fields) > 1 and fields[1] else default.sigma,
+            error_rate=float(fields[2]) if len(fields) > 2 and fields[2] else default.error_rate
+        )
+
+    def sample(self, rng: random.Random) -> float:
+        return self.median * rng.lognormvariate(0, self.sigma) if self.sigma > 0 else self.median
+
+class FakeCompletions:
+    def __init__(self, client: "FakeAsyncClient") -> None:
+        self.client = client
+
+    def create(self, model: str, messages: List[dict], provider=None, proxy=None, stream: bool = False, timeout: Optional[float] = None, **kwargs):
+        # Like the real client, streams are iterated right away and completions awaited
+        if stream:
+            return self.client._stream(provider, messages, timeout)
+        return self.client._complete(provider, messages, timeout)
+
+class FakeAsyncClient:
+    """
+    Stand-in for `g4f.client.AsyncClient` answering with canned responses.
+
+    Attributes:
+        profiles (dict): Profiles by provider name, others get `default`.
+        default (ProviderProfile): Profile of the providers without one.
+        response_chars (int): Length of the responses.
+        chunk_interval (float): Seconds between two streamed chunks after the first one.
+        requests (int): Number of requests received.
+        errors (int): Number of requests that failed.
+    """
+    CHUNKS = 20
+
+    def __init__(self, default: ProviderProfile, profiles: Dict[str, ProviderProfile] = None, response_chars: int = 400, chunk_interval: float = 0.05, seed: int = 0) -> None:
+        self.default = default
+        self.profiles = profiles or {}
+        self.response_chars = response_chars
+        self.chunk_interval = chunk_interval
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.chat = SimpleNamespace(completions=FakeCompletions(self))
+
+    def _profile(self, provider) -> ProviderProfile:
+        name = getattr(provider, "__name__", str(provider))
+        return self.profiles.get(name, self.default)
+
+    async def _wait(self, provider, timeout: Optional[float]) -> None:
+        """Waits for the provider's answer, raising its simulated error if it fails."""
+        self.requests += 1
+        profile = self._profile(provider)
+        latency = profile.sample(self.rng)
+        failed = self.rng.random() < profile.error_rate
+
+        if timeout is not None and latency > timeout:
+            await asyncio.sleep(timeout)
+            self.errors += 1
+            raise asyncio.TimeoutError(f"Simulated timeout after {timeout}s")
+        await asyncio.sleep(latency)
+        if failed:
+            self.errors += 1
+            raise RuntimeError("Simulated provider error")
+
+    def _response(self, messages: List[dict]) -> str:
+        words = f"Answer to {messages[-1]['content'][:40]!r}, with some filler text to reach the response length. "
+        return (words * (self.response_chars // len(words) + 1))[:self.response_chars]
+
+    async def _complete(self, provider, messages: List[dict], timeout: Optional[float]):
+        await self._wait(provider, timeout)
+        message = SimpleNamespace(role="assistant", content=self._response(messages))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self, provider, messages: List[dict], timeout: Optional[float]) -> AsyncIterator:
+        await self._wait(provider, timeout)
+        response = self._response(messages)
+        size = max(1, len(response) // self.CHUNKS)
+        for index in range(0, len(response), size):
+            if index:
+                await asyncio.sleep(self.chunk_interval)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=response[index:index + size]))])
+
+# [DISCORD]
+
+class FakeHTTP:
+    """Fake Discord REST layer, every call takes `rtt` seconds."""
+
+    def __init__(self, rtt: float) -> None:
+        self.rtt = rtt
+        self.calls = 0
+
+    async def request(self) -> None:
+        self.calls += 1
+        await asyncio.sleep(self.rtt)
+
+class FakeUser:
+    def __init__(self, http: FakeHTTP, id: int = None, bot: bool = False) -> None:
+        self.http = http
+        self.id = id if id is not None else next(ids)
+        self.bot = bot
+        self.mention = f"<@{self.id}>"
+        self.name = f"user-{self.id}"
+        self.notified_at: Optional[float] = None
+
+    async def send(self, content: str = None, **kwargs) -> "FakeMessage":
+        await self.http.request()
+        self.notified_at = time.perf_counter()
+        return FakeMessage(self.http, None, self, content)
+
+class FakeMessage:
+    """Stand-in for `discord.Message`."""
+
+    def __init__(self, http: FakeHTTP, channel: Optional["FakeChannel"], author: FakeUser, content: str = None) -> None:
+        self.http = http
+        self.id = next(ids)
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.guild = channel.guild if channel is not None else None
+
+    async def edit(self, content: str = None, **kwargs) -> "FakeMessage":
+        await self.http.request()
+        self.content = content
+        if self.channel is not None:
+            self.channel.record(content)
+        return self
+
+class FakeChannel:
+    """Stand-in for `discord.TextChannel`, counting the failure messages the bot sends in it."""
+
+    def __init__(self, http: FakeHTTP, guild: "FakeGuild", name: str = "channel", category=None) -> None:
+        self.http = http
+        self.id = next(ids)
+        self.guild = guild
+        self.name = name
+        self.category = category
+        self.mention = f"<#{self.id}>"
+        self.failures = 0
+        self.deleted = False
+
+    def record(self, content: Optional[str]) -> None:
+        if content and content.startswith(FAILURE_PREFIXES):
+            self.failures += 1
+
+    async def send(self, content: str = None, **kwargs) -> FakeMessage:
+        await self.http.request()
+        self.record(content)
+        return FakeMessage(self.http, self, self.guild.me, content)
+
+    async def set_permissions(self, target, **permissions) -> None:
+        await self.http.request()
+
+    async def delete(self) -> None:
+        await self.http.request()
+        self.deleted = True
+        self.guild.channels.pop(self.id, None)
+
+    @asynccontextmanager
+    async def typing(self):
+        await self.http.request()
+        yield
+
+class FakeRole:
+    def __init__(self, id: int) -> None:
+        self.id = id
+        self.mention = f"<@&{id}>"
+
+class FakeGuild:
+    """Stand-in for `discord.Guild`, creating fake channels."""
+
+    def __init__(self, http: FakeHTTP) -> None:
+        self.http = http
+        self.id = next(ids)
+        self.shard_id = 0
+        self.me = FakeUser(http, bot=True)
+        self.default_role = FakeRole(self.id)
+        self.channels: Dict[int, FakeChannel] = {}
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return None
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.channels.get(channel_id)
+
+    async def create_text_channel(self, name: str, category=None, overwrites=None, **kwargs) -> FakeChannel:
+        await self.http.request()
+        channel = FakeChannel(self.http, self, name, category)
+        self.channels[channel.id] = channel
+        return channel
+
+class FakeResponse:
+    """Stand-in for `discord.InteractionResponse`."""
+
+    def __init__(self, http: FakeHTTP) -> None:
+        self.http = http
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **kwargs) -> None:
+        await self.http.request()
+        self._done = True
+
+    async def send_message(self, content: str = None, **kwargs) -> None:
+        await self.http.request()
+        self._done = True
+
+class FakeFollowup:
+    """Stand-in for the interaction's `discord.Webhook`, follow-ups land in the interaction's channel."""
+
+    def __init__(self, http: FakeHTTP, channel: FakeChannel) -> None:
+        self.http = http
+        self.channel = channel
+
+    async def send(self, content: str = None, **kwargs) -> FakeMessage:
+        await self.http.request()
+        self.channel.record(content)
+        return FakeMessage(self.http, self.channel, self.channel.guild.me, content)
+
+class FakeInteraction:
+    """Stand-in for `discord.Interaction`."""
+
+    def __init__(self, http: FakeHTTP, guild: FakeGuild, user: FakeUser, channel: FakeChannel) -> None:
+        self.guild = guild
+        self.user = user
+        self.channel = channel
+        self.response = FakeResponse(http)
+        self.followup = FakeFollowup(http, channel)
+
+class FakeBot:
+    """Stand-in for the bot, as the cogs use it."""
+
+    def __init__(self, http: FakeHTTP, guild: FakeGuild) -> None:
+        self.http = http
+        self.guild = guild
+        self.user = guild.me
+        self.users: Dict[int, FakeUser] = {}
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.guild.get_channel(channel_id)
+
+    async def fetch_channel(self, channel_id: int) -> FakeChannel:
+        await self.http.request()
+        channel = self.guild.get_channel(channel_id)
+        if channel is None:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Channel")
+        return channel
+
+    def get_user(self, user_id: int) -> Optional[FakeUser]:
+        return self.users.get(user_id)
+
+    async def fetch_user(self, user_id: int) -> FakeUser:
+        await self.http.request()
+        return self.users.setdefault(user_id, FakeUser(self.http, user_id))
+
+    async def wait_until_ready(self) -> None:
+        # The harness drives the loops itself
+        await asyncio.Event().wait()
@@ -0,0 +1,327 @@
+"""
+Offline load test of the prompt, room and expiry flows, against a fake provider and a fake Discord.
+
+Concurrent users go through the real cogs, views and controllers on a temporary database:
+they open a room with `PanelView.create_room_button`, prompt through `OnMessage.on_message`
+and `PromptModal.on_submit`, then their sessions are expired by `ExpiredSessionsLoop.del_exp_sessions`.
+Each phase reports its throughput, latency percentiles, storage backend calls and Discord REST
+calls per operation, alongside the per-stage metrics and the peak RSS of the process. Results are
+saved as JSON, give a previous result to `--compare` to print the difference.
+
+The bot's settings are read from the environment as usual (e.g. `STREAM_RESPONSES`,
+`MAX_CONCURRENT_PROMPTS`, `RESPONSE_CACHE` or `DATABASE_URL`).
+
+Usage:
+    python -m benchmarks.load_test [--users N] [--prompts N] [--latency MS] [--error-rate RATE] [--compare FILE]
+"""
+import os, sys, json, time, asyncio, inspect, argparse, platform, tempfile, statistics
+from datetime import datetime
+from collections import Counter
+
+# The config singleton expects these to be set
+os.environ.setdefault("CHAT_CATEGORY", "0")
+os.environ.setdefault("DEV_GUILD_ID", "0")
+
+from loguru import logger
+from src.helper.config import Config
+from src.helper.metrics import Metrics
+from src.helper.memory import ShardReport
+from src.database.loader import DatabaseLoader
+from src.database.write_buffer import WriteBuffer
+from src.database.backend.sqlite import SQLiteBackend
+from src.database.backend.base import StorageBackend, get_backend
+from src.database.controller.sessions import SessionsController
+from src.manager.expiry_manager import ExpiryManager
+from src.controller.ai.prompt_controller import PromptController
+from src.controller.ai.provider_router import ProviderRouter
+from src.views.panel.view import PanelView
+from src.views.channel.prompt_view import PromptModal
+from src.cogs.events.message import OnMessage
+from src.cogs.loops.expired_sessions import ExpiredSessionsLoop
+from benchmarks.fakes import FakeAsyncClient, FakeBot, FakeChannel, FakeGuild, FakeHTTP, FakeInteraction, FakeMessage, FakeUser, ProviderProfile
+
+class BackendCounter:
+    """Counts the calls made to the storage backend, by method."""
+
+    def __init__(self, backend: StorageBackend) -> None:
+        self.calls = Counter()
+        for name, method in inspect.getmembers(StorageBackend, inspect.iscoroutinefunction):
+            if not name.startswith("_"):
+                setattr(backend, name, self._wrap(name, getattr(backend, name)))
+
+    def _wrap(self, name: str, method):
+        async def counted(*args, **kwargs):
+            self.calls[name] += 1
+            return await method(*args, **kwargs)
+        return counted
+
+class Phase:
+    """Measures the operations of a phase of the load test."""
+
+    def __init__(self, name: str, http: FakeHTTP, counter: BackendCounter) -> None:
+        self.name = name
+        self.http = http
+        self.counter = counter
+        self.latencies = []
+        self.failures = 0
+
+    def __enter__(self) -> "Phase":
+        self.start = time.perf_counter()
+        self.rest_calls = self.http.calls
+        self.db_calls = Counter(self.counter.calls)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self.start
+        self.rest_calls = self.http.calls - self.rest_calls
+        self.db_calls = self.counter.calls - self.db_calls
+
+    async def measure(self, operation, channel: FakeChannel = None) -> None:
+        """Times an operation, failed if the bot sent a failure message in the channel meanwhile."""
+        failures = channel.failures if channel is not None else 0
+        start = time.perf_counter()
+        await operation
+        self.latencies.append(time.perf_counter() - start)
+        if channel is not None and channel.failures > failures:
+            self.failures += 1
+
+    def report(self) -> dict:
+        operations = len(self.latencies)
+        ordered = sorted(self.latencies)
+
+        def percentile(value: float) -> float:
+            return round(ordered[min(operations - 1, int(operations * value))] * 1000, 2) if ordered else None
+
+        return {
+            "operations": operations,
+            "failures": self.failures,
+            "duration_s": round(self.duration, 3),
+            "throughput_per_s": round(operations / self.duration, 2) if self.duration else None,
+            "latency_ms": {
+                "mean": round(statistics.mean(ordered) * 1000, 2) if ordered else None,
+                "p50": percentile(0.5),
+                "p90": percentile(0.9),
+                "p99": percentile(0.99),
+                "max": round(ordered[-1] * 1000, 2) if ordered else None,
+            },
+            "db_ops": sum(self.db_calls.values()),
+            "db_ops_per_operation": round(sum(self.db_calls.values()) / operations, 2) if operations else None,
+            "db_ops_by_method": dict(sorted(self.db_calls.items())),
+            "rest_calls_per_operation": round(self.rest_calls / operations, 2) if operations else None,
+            "rss_bytes": ShardReport.get_rss(),
+        }
+
+    def print(self) -> None:
+        report = self.report()
+        latency = report["latency_ms"]
+        print(
+            f"{self.name:<10} ops={report['operations']:<5} failed={report['failures']:<4} "
+            f"throughput={report['throughput_per_s']:>7}/s  p50={latency['p50']:>8}ms  p99={latency['p99']:>8}ms  "
+            f"db ops/op={report['db_ops_per_operation']:>5}  REST calls/op={report['rest_calls_per_operation']:>5}"
+        )
+
+class LoadTest:
+    """Drives the users of the load test through the bot's flows."""
+    _expiry_timeout = 30
+
+    def __init__(self, args: argparse.Namespace, counter: BackendCounter) -> None:
+        self.args = args
+        self.counter = counter
+        self.http = FakeHTTP(args.rtt / 1000)
+        self.guild = FakeGuild(self.http)
+        self.bot = FakeBot(self.http, self.guild)
+        self.panel_channel = FakeChannel(self.http, self.guild, "panel")
+        self.users = [FakeUser(self.http) for _ in range(args.users)]
+        self.bot.users.update((user.id, user) for user in self.users)
+        self.rooms = {}
+        self.phases = []
+
+    def phase(self, name: str) -> Phase:
+        phase = Phase(name, self.http, self.counter)
+        self.phases.append(phase)
+        return phase
+
+    async def settle(self) -> None:
+        """Flushes the buffered writes, so they're counted in the phase that made them."""
+        await WriteBuffer().flush()
+
+    async def open_rooms(self) -> None:
+        view = PanelView()
+        sessions = SessionsController()
+
+        async def open_room(user: FakeUser) -> None:
+            interaction = FakeInteraction(self.http, self.guild, user, self.panel_channel)
+            await phase.measure(view.create_room_button.callback(interaction))
+            session = await sessions.get_session(user.id)
+            if session is None:
+                phase.failures += 1
+            else:
+                self.rooms[user.id] = self.guild.get_channel(session.discord_channel_id)
+
+        with self.phase("rooms") as phase:
+            await asyncio.gather(*(open_room(user) for user in self.users))
+            await self.settle()
+
+    async def send_messages(self) -> None:
+        cog = OnMessage(self.bot)
+
+        async def prompt(user: FakeUser) -> None:
+            channel = self.rooms.get(user.id)
+            if channel is None:
+                return
+            for index in range(self.args.prompts):
+                message = FakeMessage(self.http, channel, user, f"Question {index} of {user.name}, how does this work?")
+                await phase.measure(cog.on_message(message), channel)
+
+        with self.phase("on_message") as phase:
+            await asyncio.gather(*(prompt(user) for user in self.users))
+            await self.settle()
+
+    async def submit_modals(self) -> None:
+        async def prompt(user: FakeUser) -> None:
+            channel = self.rooms.get(user.id)
+            if channel is None:
+                return
+            for index in range(self.args.prompts):
+                modal = PromptModal()
+                modal.user_prompt._value = f"Modal question {index} of {user.name}, what about this?"
+                interaction = FakeInteraction(self.http, self.guild, user, channel)
+                await phase.measure(modal.on_submit(interaction), channel)
+
+        with self.phase("modal") as phase:
+            await asyncio.gather(*(prompt(user) for user in self.users))
+            await self.settle()
+
+    async def expire_sessions(self) -> None:
+        """Expires every session at once, latencies run until each owner is notified."""
+        cog = ExpiredSessionsLoop(self.bot)
+        cog.cog_unload()
+        sessions = SessionsController()
+        expiry_manager = ExpiryManager()
+
+        Config().session_ttl_minutes = 0
+        owners = [user for user in self.users if user.id in self.rooms]
+        for user in owners:
+            session = await sessions.get_session(user.id)
+            expiry_manager.touch(user.id, session.last_used)
+
+        with self.phase("expiry") as phase:
+            while [user for user in owners if await sessions.get_session(user.id) is not None]:
+                try:
+                    await asyncio.wait_for(cog.del_exp_sessions(), self._expiry_timeout)
+                except asyncio.TimeoutError:
+                    logger.error("Timed out waiting for the remaining sessions to expire.")
+                    break
+            for user in owners:
+                if user.notified_at is None:
+                    phase.failures += 1
+                else:
+                    phase.latencies.append(user.notified_at - phase.start)
+            await self.settle()
+
+    async def run(self) -> None:
+        await self.open_rooms()
+        await self.send_messages()
+        await self.submit_modals()
+        await self.expire_sessions()
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_test", description="Offline load test of the bot.")
+    parser.add_argument("--users", type=int, default=50, help="concurrent users (default: 50)")
+    parser.add_argument("--prompts", type=int, default=5, help="prompts per user and flow (default: 5)")
+    parser.add_argument("--latency", type=float, default=800, help="median provider latency in ms (default: 800)")
+    parser.add_argument("--sigma", type=float, default=0.5, help="spread of the log-normal provider latency (default: 0.5)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a provider error (default: 0)")
+    parser.add_argument("--provider", action="append", default=[], metavar="NAME=MS[:SIGMA[:ERROR RATE]]", help="profile of a single provider, e.g. You=2000:0.8:0.3")
+    parser.add_argument("--response-chars", type=int, default=400, help="length of the responses (default: 400)")
+    parser.add_argument("--chunk-interval", type=float, default=50, help="ms between two streamed chunks (default: 50)")
+    parser.add_argument("--rtt", type=float, default=50, help="Discord REST round trip in ms (default: 50)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the provider distributions (default: 0)")
+    parser.add_argument("--output", help="results file (default: data/benchmarks/load_test-<time>.json)")
+    parser.add_argument("--compare", help="previous results file to compare with")
+    parser.add_argument("--log-level", default="ERROR", help="log level of the bot (default: ERROR)")
+    return parser.parse_args()
+
+def compare(results: dict, previous: dict) -> None:
+    print(f"\nCompared with {previous['run']['time']}:")
+    for name, phase in results["phases"].items():
+        before = previous["phases"].get(name)
+        if before is None:
+            continue
+        changes = []
+        for label, current, old in (
+            ("throughput", phase["throughput_per_s"], before["throughput_per_s"]),
+            ("p50", phase["latency_ms"]["p50"], before["latency_ms"]["p50"]),
+            ("p99", phase["latency_ms"]["p99"], before["latency_ms"]["p99"]),
+            ("db ops/op", phase["db_ops_per_operation"], before["db_ops_per_operation"]),
+        ):
+            if current is not None and old:
+                changes.append(f"{label} {(current - old) / old:+.1%}")
+        print(f"{name:<10} {'  '.join(changes)}")
+
+async def main(args: argparse.Namespace) -> dict:
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    default = ProviderProfile(median=args.latency / 1000, sigma=args.sigma, error_rate=args.error_rate)
+    profiles = {}
+    for value in args.provider:
+        name, _, profile = value.partition("=")
+        profiles[name] = ProviderProfile.parse(profile, default)
+
+    with tempfile.TemporaryDirectory() as directory:
+        SQLiteBackend().db_path = os.path.join(directory, "sessions.sqlite")
+        router = ProviderRouter()
+        router.stats_file = os.path.join(directory, "provider_stats.json")
+        router.stats = {}
+
+        client = FakeAsyncClient(default, profiles, args.response_chars, args.chunk_interval / 1000, args.seed)
+        PromptController().client = client
+        Metrics().enabled = True
+        counter = BackendCounter(get_backend())
+
+        loader = DatabaseLoader()
+        await loader.setup()
+        load_test = LoadTest(args, counter)
+        try:
+            print(f"{args.users} users, {args.prompts} prompts per user and flow, {args.latency}ms median provider latency, {args.rtt}ms round trips\n")
+            await load_test.run()
+        finally:
+            await router.close()
+            await loader.close()
+
+    for phase in load_test.phases:
+        phase.print()
+    print(f"\nProvider requests: {client.requests} ({client.errors} failed), peak RSS: {ShardReport.format_bytes(ShardReport.get_peak_rss())}")
+
+    return {
+        "run": {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "log_level")},
+            "python": platform.python_version(),
+            "backend": get_backend().name,
+            "stream_responses": Config().stream_responses,
+            "max_concurrent_prompts": Config().max_concurrent_prompts,
+        },
+        "phases": {phase.name: phase.report() for phase in load_test.phases},
+        "provider": {"requests": client.requests, "errors": client.errors},
+        "stages": [
+            {"name": name, "labels": labels, "count": count, "p50_ms": round(p50 * 1000, 2), "p99_ms": round(p99 * 1000, 2)}
+            for name, labels, count, p50, p99 in Metrics().get_percentiles()
+        ],
+        "peak_rss_bytes": ShardReport.get_peak_rss(),
+    }
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+
+    output = args.output or os.path.join("data", "benchmarks", f"load_test-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            compare(results, json.load(file))
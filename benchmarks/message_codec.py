@@ -0,0 +1,79 @@
+"""
+Benchmark of the stored size and decode throughput of the message codecs.
+
+Messages are read from an existing sessions database if one is given, otherwise a synthetic
+chat corpus is generated.
+
+Usage:
+    python -m benchmarks.message_codec [database path]
+"""
+import os, sys, gzip, time, base64, random, sqlite3
+
+# The config singleton expects these to be set
+os.environ.setdefault("CHAT_CATEGORY", "0")
+os.environ.setdefault("DEV_GUILD_ID", "0")
+
+from src.database.codec import MessageCodec, zstandard
+
+WORDS = (
+    "the a to and of is in it you that for on with this can be your are as have not but what "
+    "python function error code return value list file class import def self print string "
+    "please could explain how why example thanks sure here is an of the following step"
+).split()
+
+def synthetic_messages(count: int) -> list:
+    random.seed(0)
+    messages = []
+    for i in range(count):
+        length = random.choice((3, 8, 15, 40, 120, 300))
+        text = " ".join(random.choice(WORDS) for _ in range(length))
+        if i % 2:
+            text = f"Sure! Here is an example:\n```python\ndef example():\n    return {text!r}\n```"
+        messages.append(text)
+    return messages
+
+def stored_messages(db_path: str) -> list:
+    codec = MessageCodec()
+    with sqlite3.connect(db_path) as db:
+        rows = db.execute('SELECT message_content FROM chat_messages;').fetchall()
+    return [codec.decode(row[0]) for row in rows]
+
+def legacy_encode(message: str) -> str:
+    return base64.b64encode(gzip.compress(message.encode())).decode()
+
+def measure(label: str, messages: list, encode, decode) -> None:
+    encoded = [encode(message) for message in messages]
+    size = sum(len(value) for value in encoded)
+
+    start = time.perf_counter()
+    for value in encoded:
+        decode(value)
+    elapsed = time.perf_counter() - start
+
+    plain = sum(len(message.encode()) for message in messages)
+    print(f"{label:<20} size={size:>10}B  ratio={size / plain:5.2f}  decode={len(messages) / elapsed:>10.0f} msg/s")
+
+def main(db_path: str = None) -> None:
+    messages = stored_messages(db_path) if db_path else synthetic_messages(20000)
+    codec = MessageCodec()
+    print(f"{len(messages)} messages, {sum(len(message.encode()) for message in messages)} bytes of plaintext\n")
+
+    measure("gzip+base64 (legacy)", messages, legacy_encode, codec.decode)
+
+    codec.codec = "none"
+    measure("none", messages, codec.encode, codec.decode)
+    codec.codec = "zlib"
+    measure("zlib", messages, codec.encode, codec.decode)
+
+    if zstandard is None:
+        print("zstandard isn't installed, skipping zstd.")
+        return
+
+    codec.codec = "zstd"
+    measure("zstd", messages, codec.encode, codec.decode)
+    samples = [message.encode() for message in messages[:5000]]
+    codec.add_dictionary(1, MessageCodec.train(samples))
+    measure("zstd + dictionary", messages, codec.encode, codec.decode)
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,145 @@
+"""
+Check of the provider circuit breakers, against a stub client.
+
+Opens the breaker of a provider, lets its cooldown run out, and sends prompts through
+`PromptController` (completions and streams) while the stub client fails it in different ways.
+Checks that the half-open probe is settled every time: closed by a success, re-opened by a
+provider error, and put back to open when only its proxies failed, so that the next request
+probes it again instead of leaving it half-open. Also checks that the summaries of the history
+compactor neither take the probe nor change the statistics.
+
+Nothing is persisted: the router's statistics start empty and aren't saved.
+
+Usage:
+    python -m benchmarks.provider_check
+"""
+import os, sys, asyncio
+
+# The config singleton expects these to be set
+os.environ.setdefault("CHAT_CATEGORY", "0")
+os.environ.setdefault("DEV_GUILD_ID", "0")
+
+from loguru import logger
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from src.controller.ai.prompt_controller import PromptController
+from src.controller.ai.provider_router import ProviderStats
+from src.manager.proxy_manager import ProxyStats
+
+HISTORY = [{"role": "user", "content": "Hello"}]
+
+class Probed:
+    """The provider whose breaker is checked."""
+
+class Healthy:
+    """A provider that always answers."""
+
+class StubCompletions:
+    def __init__(self, client: "StubClient") -> None:
+        self.client = client
+
+    def create(self, model: str, messages: List[dict], provider=None, proxy=None, stream: bool = False, timeout: Optional[float] = None, **kwargs):
+        if stream:
+            return self.client._stream(provider)
+        return self.client._complete(provider)
+
+class StubClient:
+    """
+    Stand-in for `g4f.client.AsyncClient` answering right away.
+
+    Attributes:
+        errors (dict): Error raised by each provider, by name, the others answer.
+        requests (dict): Number of requests received by each provider, by name.
+    """
+
+    def __init__(self) -> None:
+        self.errors: Dict[str, Exception] = {}
+        self.requests: Dict[str, int] = {}
+        self.chat = SimpleNamespace(completions=StubCompletions(self))
+
+    def _answer(self, provider) -> str:
+        self.requests[provider.__name__] = self.requests.get(provider.__name__, 0) + 1
+        if provider.__name__ in self.errors:
+            raise self.errors[provider.__name__]
+        return f"Answer from {provider.__name__}"
+
+    async def _complete(self, provider):
+        message = SimpleNamespace(role="assistant", content=self._answer(provider))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self, provider):
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self._answer(provider)))])
+
+class Checks:
+    def __init__(self) -> None:
+        self.failed: List[str] = []
+
+    def check(self, name: str, passed: bool, detail: object = "") -> None:
+        print(f"{'ok  ' if passed else 'FAIL'}  {name}" + (f": {detail}" if not passed and detail != "" else ""))
+        if not passed:
+            self.failed.append(name)
+
+async def complete(controller: PromptController) -> str:
+    return await controller._complete(HISTORY)
+
+async def stream(controller: PromptController) -> str:
+    return "".join([chunk async for chunk in controller._stream(HISTORY)])
+
+async def check_probe(checks: Checks, controller: PromptController, client: StubClient, request, error: Optional[Exception], expected: str, tried_next: bool) -> None:
+    """Sends a request while the breaker of `Probed` is due for a probe, and checks the state it's left in."""
+    stats = controller.router.get_stats(Probed)
+    stats.state, stats.opened_at, stats.cooldown = ProviderStats.OPEN, 0.0, 0.0
+    client.errors = {Probed.__name__: error} if error is not None else {}
+    client.requests = {}
+
+    answer = await request(controller)
+    name = f"{request.__name__}, {'no error' if error is None else repr(error)}"
+    checks.check(f"{name}: answered", answer.startswith("Answer from"), answer)
+    checks.check(f"{name}: probe sent", client.requests.get(Probed.__name__, 0) > 0, client.requests)
+    checks.check(f"{name}: breaker {expected}", stats.state == expected, stats.state)
+    # A provider error extends the cooldown, while a probe only the proxies failed is due again
+    checks.check(f"{name}: {'tried' if tried_next else 'skipped'} by the next request", (Probed in controller.router.order(controller.providers)) == tried_next)
+
+async def check_summary(checks: Checks, controller: PromptController, client: StubClient) -> None:
+    """Gets a summary while the breaker of `Probed` is due for a probe."""
+    stats = controller.router.get_stats(Probed)
+    stats.state, stats.opened_at, stats.cooldown = ProviderStats.OPEN, 0.0, 0.0
+    client.errors = {}
+    client.requests = {}
+    before = {name: (list(stats.latencies), list(stats.outcomes)) for name, stats in controller.router.stats.items()}
+
+    answer = await controller._summarize(HISTORY)
+    checks.check("summary: answered without the probe", answer == f"Answer from {Healthy.__name__}", answer)
+    checks.check("summary: breaker left open", stats.state == ProviderStats.OPEN, stats.state)
+    after = {name: (list(stats.latencies), list(stats.outcomes)) for name, stats in controller.router.stats.items()}
+    checks.check("summary: statistics unchanged", after == before)
+    checks.check("summary: model call slot freed", controller.prompt_queue.in_flight == 0, controller.prompt_queue.in_flight)
+
+async def main() -> int:
+    controller = PromptController()
+    controller.client = client = StubClient()
+    controller._providers = [Probed, Healthy]
+    controller.config.hedge_requests = False
+    controller.router.stats = {}
+    controller.proxy_manager.proxies = {address: ProxyStats(address) for address in ("127.0.0.1:1", "127.0.0.1:2")}
+    controller.router.get_stats(Healthy).latencies.append(1.0)
+
+    checks = Checks()
+    for request in (complete, stream):
+        await check_probe(checks, controller, client, request, None, ProviderStats.CLOSED, True)
+        await check_probe(checks, controller, client, request, RuntimeError("Provider error"), ProviderStats.OPEN, False)
+        await check_probe(checks, controller, client, request, ConnectionError("Proxy refused the connection"), ProviderStats.OPEN, True)
+
+    await check_summary(checks, controller, client)
+
+    # Nothing is persisted
+    if controller.router._save_task is not None:
+        controller.router._save_task.cancel()
+
+    print(f"\n{len(checks.failed)} check(s) failed." if checks.failed else "\nAll checks passed.")
+    return 1 if checks.failed else 0
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,151 @@
+"""
+Latency benchmark of room creation against a stubbed Discord HTTP layer.
+
+Every REST call of the stubbed guild, channel and interaction takes a fixed round trip time,
+so the results show how many sequential round trips each flow costs.
+
+Usage:
+    python -m benchmarks.room_provisioning [rooms] [round trip ms] [hidden roles]
+"""
+import os, sys, time, asyncio, itertools, tempfile, statistics
+
+# The config singleton expects these to be set
+os.environ.setdefault("CHAT_CATEGORY", "0")
+os.environ.setdefault("DEV_GUILD_ID", "0")
+
+from src.helper.config import Config
+from src.database.loader import DatabaseLoader
+from src.database.backend.sqlite import SQLiteBackend
+from src.database.schema.sessions import SessionSchema
+from src.database.controller.sessions import SessionsController
+from src.controller.discord.room_controller import RoomController
+
+channel_ids = itertools.count(1000)
+
+class StubHTTP:
+    def __init__(self, rtt: float) -> None:
+        self.rtt = rtt
+        self.calls = 0
+
+    async def request(self) -> None:
+        self.calls += 1
+        await asyncio.sleep(self.rtt)
+
+class StubObject:
+    def __init__(self, id: int) -> None:
+        self.id = id
+        self.mention = f"<@{id}>"
+
+class StubChannel(StubObject):
+    def __init__(self, http: StubHTTP, id: int) -> None:
+        super().__init__(id)
+        self.http = http
+        self.category = None
+
+    async def set_permissions(self, target, **permissions) -> None:
+        await self.http.request()
+
+    async def send(self, **kwargs) -> None:
+        await self.http.request()
+
+class StubGuild:
+    def __init__(self, http: StubHTTP, roles: int) -> None:
+        self.http = http
+        self.default_role = StubObject(0)
+        self.me = StubObject(1)
+        self.roles = {100 + i: StubObject(100 + i) for i in range(roles)}
+
+    def get_role(self, role_id: int):
+        return self.roles.get(role_id)
+
+    def get_channel(self, channel_id: int):
+        return None
+
+    async def create_text_channel(self, name: str, category=None, overwrites=None) -> StubChannel:
+        await self.http.request()
+        return StubChannel(self.http, next(channel_ids))
+
+class StubResponse:
+    def __init__(self, http: StubHTTP) -> None:
+        self.http = http
+        self.answered_at = None
+
+    async def _answer(self) -> None:
+        await self.http.request()
+        self.answered_at = self.answered_at or time.perf_counter()
+
+    async def defer(self, **kwargs) -> None:
+        await self._answer()
+
+    async def send_message(self, *args, **kwargs) -> None:
+        await self._answer()
+
+class StubFollowup:
+    def __init__(self, http: StubHTTP) -> None:
+        self.http = http
+
+    async def send(self, *args, **kwargs) -> None:
+        await self.http.request()
+
+class StubInteraction:
+    def __init__(self, http: StubHTTP, guild: StubGuild, user_id: int) -> None:
+        self.guild = guild
+        self.user = StubObject(user_id)
+        self.channel = StubChannel(http, 0)
+        self.response = StubResponse(http)
+        self.followup = StubFollowup(http)
+
+async def legacy_create_room(interaction: StubInteraction) -> None:
+    """The sequential flow the panel used before: create, one call per overwrite, welcome, reply."""
+    guild = interaction.guild
+    channel = await guild.create_text_channel("room", category=None)
+    await channel.set_permissions(interaction.user, read_messages=True, send_messages=True)
+    await channel.set_permissions(guild.me, read_messages=True, send_messages=True)
+    await channel.set_permissions(guild.default_role, read_messages=False)
+    for role_id in Config().additional_hide_roles:
+        await channel.set_permissions(guild.get_role(role_id), read_messages=False)
+    await SessionsController().create_session(SessionSchema(owner_id=interaction.user.id, discord_channel_id=channel.id))
+    await channel.send(content="welcome")
+    await interaction.response.send_message("created", ephemeral=True)
+
+async def provisioned_create_room(interaction: StubInteraction) -> None:
+    """The current flow: deferred reply, single creation call with overwrites, concurrent welcome and reply."""
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    await RoomController().open_room(interaction)
+
+async def measure(label: str, rooms: int, rtt: float, roles: int, create_room, first_user_id: int) -> None:
+    http = StubHTTP(rtt)
+    guild = StubGuild(http, roles)
+    totals, responses = [], []
+    for i in range(rooms):
+        interaction = StubInteraction(http, guild, first_user_id + i)
+        start = time.perf_counter()
+        await create_room(interaction)
+        totals.append((time.perf_counter() - start) * 1000)
+        responses.append((interaction.response.answered_at - start) * 1000)
+    print(
+        f"{label:<12} total p50={statistics.median(totals):7.1f}ms  "
+        f"first response p50={statistics.median(responses):7.1f}ms  "
+        f"REST calls/room={http.calls / rooms:4.1f}"
+    )
+
+async def main(rooms: int, rtt_ms: float, roles: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        SQLiteBackend().db_path = os.path.join(directory, "sessions.sqlite")
+        loader = DatabaseLoader()
+        await loader.setup()
+
+        Config().additional_hide_roles = [100 + i for i in range(roles)]
+        print(f"{rooms} rooms, {rtt_ms}ms round trips, {roles} hidden role(s)\n")
+        await measure("legacy", rooms, rtt_ms / 1000, roles, legacy_create_room, 1_000_000)
+        await measure("provisioned", rooms, rtt_ms / 1000, roles, provisioned_create_room, 2_000_000)
+
+        await loader.close()
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(main(
+        int(args[0]) if len(args) > 0 else 20,
+        float(args[1]) if len(args) > 1 else 50,
+        int(args[2]) if len(args) > 2 else 3
+    ))
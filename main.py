@@ -1,66 +1,109 @@
 # Imports
-import os, discord, time
+import sys, time, asyncio
+from src.helper.startup import StartupProfiler
+
+# Time the imports below too when profiling the startup
+if __name__ == "__main__" and "--profile-startup" in sys.argv:
+    StartupProfiler().start()
+
+import discord
 from loguru import logger
 from traceback import format_exc
 from discord.ext import commands
 from src.helper.config import Config
+from src.helper.metrics import Metrics
 from src.database.loader import DatabaseLoader
+from src.controller.ai.provider_router import ProviderRouter
+from src.controller.ai.response_cache import ResponseCache
+from src.controller.discord.rest_scheduler import RestScheduler
 from src.manager.file_manager import FileManager
+from src.manager.log_manager import LogManager
+from src.cogs.manifest import get_extensions
+
+def get_gateway_options() -> dict:
+    """
+    Returns the gateway options of the bot.
+
+    In production mode, only the intents the cogs need are requested (guilds, guild messages and
+    their content), members are only cached when they come with an event and the message cache
+    is capped, so memory doesn't grow with the members of the guilds. The shards can be split
+    across processes with `SHARD_COUNT` and `SHARD_IDS`.
+    """
+    config = Config()
+    if not config.production_mode:
+        return {"intents": discord.Intents.all()}
+
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.message_content = True
+
+    options = {
+        "intents": intents,
+        "member_cache_flags": discord.MemberCacheFlags.from_intents(intents),
+        "chunk_guilds_at_startup": False,
+        "max_messages": config.max_messages,
+    }
+    if config.shard_count > 0:
+        options["shard_count"] = config.shard_count
+        if config.shard_ids:
+            options["shard_ids"] = config.shard_ids
+    return options
 
-class Bot(commands.Bot):
+class Bot(commands.AutoShardedBot if Config().production_mode else commands.Bot):
     def __init__(self) -> None:
         """Initializes the Bot class."""
         super().__init__(
             command_prefix=Config().bot_prefix, 
             help_command=None, 
-            intents=discord.Intents.all()
+            **get_gateway_options()
         )
         self.start_time = time.time()
 
-        # Ensure log file directory exists
-        log_file = Config().log_file
-        log_directory = os.path.dirname(log_file)
-        
-        if not os.path.exists(log_directory):
-            os.makedirs(log_directory, exist_ok=True)
+        # Set up the console and file log sinks
+        LogManager().setup()
+
+        # Count the REST requests, so background work is scheduled around interactive replies
+        RestScheduler().install(self.http)
+
+    async def setup_storage(self) -> None:
+        """Sets up the database and the response cache, then serves the metrics endpoint if enabled."""
+        profiler = StartupProfiler()
+        logger.debug("Setting up databases...")
+        with profiler.step("database"):
+            await DatabaseLoader().setup()
+        with profiler.step("response cache"):
+            await ResponseCache().load()
+
+        with profiler.step("metrics server"):
+            await Metrics().start_server()
+
+    async def load_cogs(self) -> None:
+        """Loads the cogs of the manifest concurrently."""
+        profiler = StartupProfiler()
+
+        async def load(extension: str) -> None:
+            with profiler.step(extension):
+                await self.load_extension(extension)
 
-        if not os.path.exists(log_file):
-            with open(log_file, 'w') as f:
-                pass  # Create the log file if it doesn't exist
-        
-        logger.add(log_file, mode="w+")
+        logger.debug("Loading cogs...")
+        await asyncio.gather(*(load(extension) for extension in get_extensions()))
 
     async def setup_hook(self) -> None:
         """Loads the necessary things, and initializes the bot."""
+        profiler = StartupProfiler()
         try:
-            os.system("cls||clear")
             logger.info("Setting up bot...")
 
             # Check for file inputs
             logger.debug("Checking for file inputs...")
-            FileManager().check_input()
+            with profiler.step("file inputs"):
+                FileManager().check_input()
 
-            # Set-up the database
-            logger.debug("Setting up databases...")
-            await DatabaseLoader().setup()
-
-            # Load the cogs
-            logger.debug("Loading cogs...")
-            for filename in os.listdir("./src/cogs/commands"):
-                if filename.endswith(".py") and not filename.startswith("_"):
-                    await self.load_extension(f"src.cogs.commands.{filename[:-3]}")
-
-            # Load the events
-            logger.debug("Loading events...")
-            for filename in os.listdir("./src/cogs/events"):
-                if filename.endswith(".py") and not filename.startswith("_"):
-                    await self.load_extension(f"src.cogs.events.{filename[:-3]}")
-
-            # Load the loops
-            logger.debug("Loading loops...")
-            for filename in os.listdir("./src/cogs/loops"):
-                if filename.endswith(".py") and not filename.startswith("_"):
-                    await self.load_extension(f"src.cogs.loops.{filename[:-3]}")
+            # The cogs don't touch the database until the bot is ready, so they're imported
+            # while the database is being set up
+            with profiler.step("setup"):
+                await asyncio.gather(self.setup_storage(), self.load_cogs())
 
             # Done!
             logger.info("Setup completed!")
@@ -72,9 +115,34 @@ class Bot(commands.Bot):
         """Shuts down the bot."""
         await super().close()
 
+        # Stop serving metrics
+        await Metrics().stop_server()
+
+        # Persist the provider statistics and the cached responses
+        await ProviderRouter().close()
+        await ResponseCache().close()
+
+        # Close the database connections
+        await DatabaseLoader().close()
+
+        # Write the queued log records
+        await LogManager().close()
+
+async def profile_startup() -> None:
+    """Sets the bot up without connecting to Discord and logs where the startup time went."""
+    profiler = StartupProfiler()
+    async with Bot() as bot:
+        await bot.setup_hook()
+        profiler.stop_imports()
+        logger.info(profiler.report())
+
 # Run the bot
 if __name__ == "__main__":
     try:
+        if StartupProfiler().enabled:
+            asyncio.run(profile_startup())
+            exit()
+
         bot = Bot()
         bot.run(Config().bot_token)
     except KeyboardInterrupt:
@@ -0,0 +1,56 @@
+import discord
+from loguru import logger
+from discord.ext import commands
+from discord import app_commands
+from src.helper.memory import ShardReport
+from src.controller.ai.response_cache import ResponseCache
+from src.controller.discord.schema.embed_schema import EmbedSchema
+from src.controller.discord.embed_controller import EmbedController
+
+class Cache(commands.Cog):
+    """
+    A class representing the Cache command cog.
+
+    This cog provides functionality to check the hit rate of the response cache, and to clear it.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.response_cache = ResponseCache()
+
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.command(name="cache", description="Command to show the hit rate of the response cache.")
+    @app_commands.describe(clear="Whether to clear the cached responses.")
+    async def cache_command(self, interaction: discord.Interaction, clear: bool = False):
+        try:
+            if clear:
+                self.response_cache.clear()
+
+            stats = self.response_cache.stats()
+            embed_schema = EmbedSchema(
+                title="🗃️ Response cache",
+                description=(
+                    f"Status: `{'enabled' if stats['enabled'] else 'disabled'}`{' (cleared)' if clear else ''}\n"
+                    f"Entries: `{stats['entries']}` (`{ShardReport.format_bytes(stats['bytes'])}`)\n"
+                    f"Hit rate: `{stats['hit_rate']:.1%}` (`{stats['hits']}` hit(s), `{stats['misses']}` miss(es))\n"
+                    f"Not cacheable: `{stats['bypassed']}`"
+                ),
+                color=0xb34760
+            )
+
+            embed = await EmbedController().build_embed(embed_schema)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except Exception as e:
+            logger.critical(f"Failed to respond to cache command: {e}")
+            await interaction.response.send_message("There was an error trying to execute that command!", ephemeral=True)
+
+    @cache_command.error
+    async def cache_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.errors.MissingPermissions):
+            await interaction.response.send_message(f"You don't have the necessary permissions to use this command.",ephemeral=True)
+        else:
+            await interaction.response.send_message(f"An error occurred: {error}", ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Cache(bot))
+    logger.debug("Cache command loaded!")
@@ -0,0 +1,75 @@
+import discord
+from loguru import logger
+from discord.ext import commands
+from discord import app_commands
+from src.helper.metrics import Metrics
+from src.controller.discord.rest_scheduler import RestScheduler
+from src.controller.discord.schema.embed_schema import EmbedSchema
+from src.controller.discord.embed_controller import EmbedController
+
+class Latency(commands.Cog):
+    """
+    A class representing the Latency command cog.
+
+    This cog provides functionality to check the p50 and p99 latency of each measured stage, and
+    the queue of background Discord jobs.
+    """
+
+    MAX_LENGTH = 4000
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.metrics = Metrics()
+
+    @staticmethod
+    def format_seconds(value) -> str:
+        return "n/a" if value is None else f"{value * 1000:.1f}ms"
+
+    def build_report(self) -> str:
+        """Returns the p50 and p99 of every measured series, one per line, then the REST scheduler's queue."""
+        if not self.metrics.enabled:
+            return "Metrics are disabled, set `METRICS=true` to measure latencies."
+
+        lines = []
+        for name, labels, count, p50, p99 in self.metrics.get_percentiles():
+            series = name + (f"[{', '.join(str(value) for value in labels.values())}]" if labels else "")
+            lines.append(f"{series}: p50 {self.format_seconds(p50)}, p99 {self.format_seconds(p99)} (n={count})")
+        if not lines:
+            return "Nothing was measured yet."
+
+        rest = RestScheduler().get_stats()
+        lines.append(
+            f"rest: {rest['queued']} queued, {rest['running']} running background job(s), "
+            f"{rest['requests']} request(s) in the last second (background budget {rest['budget']}/s)"
+        )
+        report = "\n".join(lines)
+        if len(report) > self.MAX_LENGTH:
+            report = report[:self.MAX_LENGTH].rsplit("\n", 1)[0] + "\n..."
+        return f"```\n{report}\n```"
+
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.command(name="latency", description="Command to show the p50 and p99 latency of each stage of a prompt.")
+    async def latency_command(self, interaction: discord.Interaction):
+        try:
+            embed_schema = EmbedSchema(
+                title="⏱️ Latency",
+                description=self.build_report(),
+                color=0xb34760
+            )
+
+            embed = await EmbedController().build_embed(embed_schema)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except Exception as e:
+            logger.critical(f"Failed to respond to latency command: {e}")
+            await interaction.response.send_message("There was an error trying to execute that command!", ephemeral=True)
+
+    @latency_command.error
+    async def latency_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.errors.MissingPermissions):
+            await interaction.response.send_message(f"You don't have the necessary permissions to use this command.",ephemeral=True)
+        else:
+            await interaction.response.send_message(f"An error occurred: {error}", ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Latency(bot))
+    logger.debug("Latency command loaded!")
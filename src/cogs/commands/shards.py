@@ -0,0 +1,44 @@
+import discord
+from loguru import logger
+from discord.ext import commands
+from discord import app_commands
+from src.helper.memory import ShardReport
+from src.controller.discord.schema.embed_schema import EmbedSchema
+from src.controller.discord.embed_controller import EmbedController
+
+class Shards(commands.Cog):
+    """
+    A class representing the Shards command cog.
+
+    This cog provides functionality to check the memory usage and cache size of each shard.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.command(name="shards", description="Command to show the memory usage and cache size of each shard.")
+    async def shards_command(self, interaction: discord.Interaction):
+        try:
+            embed_schema = EmbedSchema(
+                title="🧩 Shards",
+                description=f"```\n{ShardReport(self.bot).format()}\n```",
+                color=0xb34760
+            )
+
+            embed = await EmbedController().build_embed(embed_schema)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except Exception as e:
+            logger.critical(f"Failed to respond to shards command: {e}")
+            await interaction.response.send_message("There was an error trying to execute that command!", ephemeral=True)
+
+    @shards_command.error
+    async def shards_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.errors.MissingPermissions):
+            await interaction.response.send_message(f"You don't have the necessary permissions to use this command.",ephemeral=True)
+        else:
+            await interaction.response.send_message(f"An error occurred: {error}", ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Shards(bot))
+    logger.debug("Shards command loaded!")
@@ -1,30 +1,37 @@
 import discord
 from loguru import logger
+from typing import Optional
 from discord.ext import commands
 from src.helper.config import Config
+from src.manager.command_sync_manager import CommandSyncManager
 
 class SyncCommand(commands.Cog):
     """
     A Discord bot command cog for syncing slash commands.
 
+    Commands that didn't change since their last sync aren't synced again, unless forced.
+
     Attributes:
         bot (commands.Bot): The Discord bot instance.
         config (Config): The configuration object.
+        sync_manager (CommandSyncManager): The slash command sync manager.
     """
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.config = Config()
+        self.sync_manager = CommandSyncManager()
 
     @commands.command()
     @commands.has_permissions(administrator=True)
-    async def sync(self, ctx: commands.Context, guild: discord.Guild = None):
+    async def sync(self, ctx: commands.Context, guild: Optional[discord.Guild] = None, force: bool = False):
         """
-        Syncs slash commands globally or for a specific guild.
+        Syncs slash commands globally or for a specific guild, if they changed since their last sync.
 
         Args:
             ctx (commands.Context): The command context.
             guild (discord.Guild, optional): The guild to sync slash commands for. Defaults to None.
+            force (bool, optional): Whether to sync even if the commands didn't change. Defaults to False.
         """
         try:
             await ctx.message.delete()
@@ -33,15 +40,14 @@ class SyncCommand(commands.Cog):
             pass
 
         try:
-            if guild is None:
-                await self.bot.tree.sync()
-                success_message = "✅ Successfully synced slash commands globally!"
+            scope = "globally" if guild is None else f"in {guild.name}"
+            if await self.sync_manager.sync(self.bot.tree, guild=guild, force=force):
+                success_message = f"✅ Successfully synced slash commands {scope}!"
+                logger.info("Slash commands were synced by an admin.")
             else:
-                await self.bot.tree.sync(guild=guild)
-                success_message = f"✅ Successfully synced slash commands in {guild.name}!"
+                command = f"{ctx.prefix}sync {guild.id} true" if guild else f"{ctx.prefix}sync true"
+                success_message = f"✅ Slash commands are already synced {scope}, use `{command}` to sync them anyway."
             msg = await ctx.send(success_message)
-            
-            logger.info("Slash commands were synced by an admin.")
 
             # Delete the success message after a delay
             await msg.delete(delay=5)
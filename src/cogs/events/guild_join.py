@@ -1,9 +1,15 @@
 from loguru import logger
 from discord.ext import commands
+from src.controller.discord.rest_scheduler import RestScheduler
+from src.manager.command_sync_manager import CommandSyncManager
 
 class GuildJoin(commands.Cog):
     """
     A class representing the event handler for when the bot joins a guild.
+
+    The global commands, and the guild's own commands if it has any, are only synced if they
+    changed since their last sync. Nobody waits on the sync and the DM to the owner, so they run
+    as background jobs of the REST scheduler.
     """
 
     def __init__(self, bot):
@@ -19,17 +25,22 @@ class GuildJoin(commands.Cog):
         """
 
         try:
-            # Sync the commands
-            await self.bot.tree.sync()
+            # Sync the commands that changed
+            async with RestScheduler().background("command_sync"):
+                sync_manager = CommandSyncManager()
+                await sync_manager.sync(self.bot.tree)
+                await sync_manager.sync(self.bot.tree, guild=guild)
         except Exception as e:
             logger.critical(f"❌ Failed to sync slash commands: {e}")
             return
 
-        # Send a DM to the guild owner
+        # Send a DM to the guild owner, who isn't cached when members aren't
         try:
-            await guild.owner.send(f"Hello `{guild.owner.name}`, your guild `{guild.name}` has successfully synced commands with the bot!")
+            async with RestScheduler().background("dm"):
+                owner = guild.owner or await self.bot.fetch_user(guild.owner_id)
+                await owner.send(f"Hello `{owner.name}`, your guild `{guild.name}` has successfully synced commands with the bot!")
         except:
-            logger.error(f"❌ Couldn't send a DM to the guild owner of {guild.name} ({guild.owner.id}).")
+            logger.error(f"❌ Couldn't send a DM to the guild owner of {guild.name} ({guild.owner_id}).")
             return
         
         # Log the event
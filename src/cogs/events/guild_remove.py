@@ -1,5 +1,6 @@
 from loguru import logger
 from discord.ext import commands
+from src.manager.command_sync_manager import CommandSyncManager
 
 class GuildRemove(commands.Cog):
     """
@@ -20,6 +21,9 @@ class GuildRemove(commands.Cog):
         Returns:
         - None
         """
+        # The guild's commands go away with the bot
+        await CommandSyncManager().forget(guild)
+
         logger.info(f"The bot left the guild {guild.name} ({guild.id}).")
 
 async def setup(bot: commands.Bot) -> None:
@@ -1,9 +1,13 @@
 import discord
 from loguru import logger
 from discord.ext import commands
+from src.helper.config import Config
+from src.helper.metrics import Metrics
 from src.database.schema.sessions import SessionSchema
 from src.database.controller.sessions import SessionsController
 from src.controller.ai.prompt_controller import PromptController
+from src.controller.ai.prompt_queue import PromptQueue, QueueFullError
+from src.controller.discord.stream_renderer import StreamRenderer
 
 class OnMessage(commands.Cog):
     """
@@ -11,14 +15,20 @@ class OnMessage(commands.Cog):
 
     Attributes:
         bot (discord.ext.commands.Bot): The Discord bot instance.
+        config (Config): The configuration object.
         sessions_controller (SessionsController): The controller for managing user sessions.
         prompt_controller (PromptController): The controller for sending prompts to the AI model.
+        prompt_queue (PromptQueue): The queue serializing prompts per session.
+        metrics (Metrics): The latency metrics of each stage of a prompt.
     """
 
     def __init__(self, bot):
         self.bot = bot
+        self.config = Config()
         self.sessions_controller = SessionsController()
         self.prompt_controller = PromptController()
+        self.prompt_queue = PromptQueue()
+        self.metrics = Metrics()
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message) -> None:
@@ -35,33 +45,75 @@ class OnMessage(commands.Cog):
         if message.author == self.bot.user:
             return
 
-        session_channels = await self.sessions_controller.get_session_channels()
+        # Ignore messages outside of session rooms (in-memory lookup, no database I/O)
+        with self.metrics.timer("prompt_stage_seconds", stage="channel_filter"):
+            channel_session = self.sessions_controller.get_channel_session(message.channel.id)
+        if channel_session is None:
+            return
 
-        if message.channel.id in session_channels:
-            try:
-                # Get the message author's session
+        # Records logged while answering carry the session, channel and user
+        with self.metrics.timer("prompt_seconds"), logger.contextualize(session_id=channel_session.id, channel_id=message.channel.id, user_id=message.author.id):
+            await self.handle_prompt(message)
+
+    async def handle_prompt(self, message: discord.Message) -> None:
+        """
+        Answers a message sent in a session room.
+
+        Args:
+            message (discord.Message): The message object representing the received message.
+        """
+        try:
+            # Get the message author's session
+            with self.metrics.timer("prompt_stage_seconds", stage="session_lookup"):
                 fetch_session = await self.sessions_controller.get_session(message.author.id)
-                session_id = fetch_session.id if fetch_session is not None else None
-                if session_id is None:
-                    await message.channel.send('You do not have an active session. Please start a session first.')
-                    return
-
-                # Sending prompt to AI model
-                response = await self.prompt_controller.send_prompt(session_id, message.content)
-                if response is None:
-                    await message.channel.send('The model failed to respond. Please try again either now or later.')
-                    return
-
-                # Sending AI model's response to the channel
-                await message.channel.send(response)
-
-                # Updating the session
-                session_schema = SessionSchema(owner_id=message.author.id, discord_channel_id=message.channel.id)
+            session_id = fetch_session.id if fetch_session is not None else None
+            if session_id is None:
+                await message.channel.send('You do not have an active session. Please start a session first.')
+                return
+
+            # Reserving a place in the session's prompt queue
+            try:
+                ticket = self.prompt_queue.reserve(session_id)
+            except QueueFullError:
+                await message.channel.send('You already have too many prompts waiting for an answer. Please wait for them first.')
+                return
+
+            # Letting the user know right away if the prompt has to wait
+            reply = None
+            if ticket.position > 0:
+                try:
+                    reply = await message.channel.send(f'⏳ Queued (position {ticket.position}), your prompt will be answered shortly...')
+                except BaseException:
+                    ticket.release()
+                    raise
+
+            async with ticket:
+                if self.config.stream_responses:
+                    # Streaming the AI model's response into the channel as it is generated
+                    renderer = StreamRenderer(message.channel.send, message=reply)
+                    await renderer.render(self.prompt_controller.stream_prompt(session_id, message.content))
+                else:
+                    # Sending prompt to AI model
+                    response = await self.prompt_controller.send_prompt(session_id, message.content)
+                    if response is None:
+                        await message.channel.send('The model failed to respond. Please try again either now or later.')
+                        return
+
+                    # Sending AI model's response to the channel
+                    with self.metrics.timer("prompt_stage_seconds", stage="discord_send"):
+                        if reply is not None:
+                            await reply.edit(content=response)
+                        else:
+                            await message.channel.send(response)
+
+            # Updating the session
+            session_schema = SessionSchema(owner_id=message.author.id, discord_channel_id=message.channel.id)
+            with self.metrics.timer("prompt_stage_seconds", stage="session_update"):
                 await self.sessions_controller.update_session(session_schema)
 
-            except Exception as e:
-                logger.error(f'An error occurred while processing the message: {e}')
-                await message.channel.send('An error occurred while processing your message. Please try again later.')
+        except Exception as e:
+            logger.error(f'An error occurred while processing the message: {e}')
+            await message.channel.send('An error occurred while processing your message. Please try again later.')
 
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(OnMessage(bot))
@@ -1,12 +1,14 @@
-import os
+import sys, asyncio
 from time import time
 from loguru import logger
-from pyfiglet import Figlet
 from discord.ext import commands
 from src.helper.config import Config
+from src.manager.cluster_manager import ClusterManager
+from src.manager.command_sync_manager import CommandSyncManager
+from src.controller.discord.rest_scheduler import RestScheduler
 from src.views.panel.view import PanelView
-from pystyle import Colors, Colorate, Center
 from src.views.channel.control_view import ControlView
+from src.controller.ai.prompt_controller import PromptController
 
 class OnReady(commands.Cog):
     """
@@ -21,29 +23,63 @@ class OnReady(commands.Cog):
         self.bot = bot
         self.config = Config()
 
+    def print_banner(self) -> None:
+        """Clears the console and prints the logo, the banner libraries are only imported here."""
+        try:
+            from pyfiglet import Figlet
+            from pystyle import Colors, Colorate, Center
+        except ImportError as e:
+            return logger.debug(f"Skipping the banner, {e}.")
+
+        if sys.stdout.isatty():
+            print("\033[2J\033[H", end="")
+
+        logo = Figlet(font="big").renderText(self.config.app_name)
+        centered_logo = Center.XCenter(Colorate.Vertical(Colors.white_to_blue, logo, 1))
+        divider = Center.XCenter(Colorate.Vertical(Colors.white_to_blue, "────────────────────────────────────────────", 1))
+        print(f"{centered_logo}\n{divider}\n\n")
+
+    async def preload_client(self) -> None:
+        """Imports g4f in the background, so the first prompt doesn't wait for it."""
+        try:
+            await asyncio.to_thread(PromptController().preload)
+        except Exception as e:
+            logger.error(f"Error preloading the GPT client: {e}")
+
+    async def sync_commands(self) -> None:
+        """Syncs the global slash commands if they changed since their last sync, from a single process of the cluster."""
+        try:
+            if not await ClusterManager().acquire("command_sync"):
+                return
+            async with RestScheduler().background("command_sync"):
+                if await CommandSyncManager().sync(self.bot.tree):
+                    logger.info("Synced the changed slash commands globally.")
+        except Exception as e:
+            logger.error(f"Error syncing the slash commands: {e}")
+
     @commands.Cog.listener()
     async def on_ready(self):
         """
         A coroutine that is called when the bot is ready.
 
-        It clears the console, prints a logo, sets persistent views, and logs the login information.
+        It prints the banner if enabled, sets persistent views, preloads the GPT client, syncs the
+        changed slash commands and logs the login information.
         """
 
-        os.system("cls||clear")
-
-        logo = Figlet(font="big").renderText(self.config.app_name)
-        centered_logo = Center.XCenter(Colorate.Vertical(Colors.white_to_blue, logo, 1))
-        divider = Center.XCenter(Colorate.Vertical(Colors.white_to_blue, "────────────────────────────────────────────", 1))
-        print(f"{centered_logo}\n{divider}\n\n")
+        if self.config.startup_banner:
+            self.print_banner()
 
         # Make the views persistent
         logger.debug("Setting persistent views...")
         self.bot.add_view(PanelView())
         self.bot.add_view(ControlView())
-        
+
+        asyncio.get_running_loop().create_task(self.preload_client())
+        asyncio.get_running_loop().create_task(self.sync_commands())
+
         elapsed_time = time() - self.bot.start_time
         logger.info(f"Logged in as {self.bot.user.name}#{self.bot.user.discriminator} ({elapsed_time:.2f}s)")
 
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(OnReady(bot))
-    return logger.debug("On ready event registered!")
\ No newline at end of file
+    return logger.debug("On ready event registered!")
@@ -1,45 +1,61 @@
-import discord
+import asyncio, discord
 from loguru import logger
 from discord.ext import commands, tasks
+from src.helper.metrics import Metrics
+from src.controller.discord.rest_scheduler import RestScheduler
+from src.manager.expiry_manager import ExpiryManager
 from src.database.controller.sessions import SessionsController
 
 class ExpiredSessionsLoop(commands.Cog):
     """
     A Discord bot cog that handles expired sessions.
 
-    This cog periodically checks for expired sessions, deletes the corresponding Discord channels,
-    and notifies the users about their expired sessions.
+    This cog waits for the next session expiry scheduled by the expiry manager, deletes the
+    expired sessions, then deletes their Discord channels and notifies their owners concurrently,
+    as background jobs of the REST scheduler so they never hold interactive replies back.
     """
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
         self.sessions_controller = SessionsController()
+        self.expiry_manager = ExpiryManager()
+        self.metrics = Metrics()
+        self.rest_scheduler = RestScheduler()
         self.del_exp_sessions.start()
 
-    # Rest of the code...
-class ExpiredSessionsLoop(commands.Cog):
-
-    def __init__(self, bot: commands.Bot) -> None:
-        self.bot = bot
-        self.sessions_controller = SessionsController()
-        self.del_exp_sessions.start()
+    def cog_unload(self) -> None:
+        self.del_exp_sessions.cancel()
 
-    @tasks.loop(minutes=30)
+    @tasks.loop()
     async def del_exp_sessions(self):
         try:
-            expired_sessions = await self.sessions_controller.get_expired_sessions()
-            await self.handle_expired_sessions(expired_sessions)
-            await self.sessions_controller.delete_expired_sessions()
+            owner_ids = await self.expiry_manager.wait_due()
+            with self.metrics.timer("expiry_seconds"):
+                expired_sessions = await self.sessions_controller.expire_sessions(owner_ids)
+                await self.handle_expired_sessions(expired_sessions)
+            self.metrics.inc("expired_sessions_total", len(expired_sessions))
         except Exception as e:
             logger.error(f"Error processing expired sessions: {e}")
 
     async def handle_expired_sessions(self, sessions):
-        for session in sessions:
-            await self.delete_discord_channel(session.discord_channel_id)
-            await self.notify_user(session.owner_id)
+        await asyncio.gather(*(self.handle_expired_session(session) for session in sessions))
+
+    async def handle_expired_session(self, session):
+        await self.delete_discord_channel(session.discord_channel_id)
+        await self.notify_user(session.owner_id)
 
     async def delete_discord_channel(self, channel_id):
+        async with self.rest_scheduler.background("channel_delete"):
+            await self._delete_discord_channel(channel_id)
+
+    async def _delete_discord_channel(self, channel_id):
+        # The channel may belong to a guild of another process of the cluster
         channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            try:
+                channel = await self.bot.fetch_channel(channel_id)
+            except discord.HTTPException:
+                channel = None
         if channel:
             try:
                 await channel.delete()
@@ -51,7 +67,17 @@ class ExpiredSessionsLoop(commands.Cog):
             logger.error(f"Failed to find channel with ID {channel_id} to delete for expired session.")
 
     async def notify_user(self, user_id):
+        async with self.rest_scheduler.background("dm"):
+            await self._notify_user(user_id)
+
+    async def _notify_user(self, user_id):
+        # Members aren't cached in production mode, so the user may have to be fetched
         user = self.bot.get_user(user_id)
+        if user is None:
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except discord.HTTPException:
+                user = None
         if user:
             try:
                 await user.send("Your session has expired.")
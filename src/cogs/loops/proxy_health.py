@@ -0,0 +1,28 @@
+from loguru import logger
+from discord.ext import commands, tasks
+from src.manager.proxy_manager import ProxyManager
+
+class ProxyHealthLoop(commands.Cog):
+    """
+    A class representing a loop that health-checks the quarantined proxies periodically.
+    """
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.proxy_manager = ProxyManager()
+        if not self.proxy_manager.proxyless:
+            self.check_proxies.start()
+
+    def cog_unload(self) -> None:
+        self.check_proxies.cancel()
+
+    @tasks.loop(minutes=1)
+    async def check_proxies(self):
+        try:
+            await self.proxy_manager.health_check()
+        except Exception as e:
+            logger.error(f"Error health-checking proxies: {e}")
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(ProxyHealthLoop(bot))
+    return logger.debug("Proxy health loop loaded!")
@@ -0,0 +1,28 @@
+from loguru import logger
+from discord.ext import commands, tasks
+from src.database.retention import RetentionEngine
+
+class RetentionLoop(commands.Cog):
+    """
+    A class representing a loop that applies the database retention policy periodically.
+    """
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.retention_engine = RetentionEngine()
+        self.apply_retention.start()
+
+    def cog_unload(self) -> None:
+        self.apply_retention.cancel()
+
+    @tasks.loop(hours=1)
+    async def apply_retention(self):
+        await self.retention_engine.run()
+
+    @apply_retention.before_loop
+    async def before_apply_retention(self) -> None:
+        await self.bot.wait_until_ready()
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(RetentionLoop(bot))
+    return logger.debug("Retention loop loaded!")
@@ -0,0 +1,44 @@
+from loguru import logger
+from discord.ext import commands, tasks
+from src.controller.discord.room_pool import RoomPool
+from src.controller.discord.room_controller import RoomController
+
+class RoomPoolLoop(commands.Cog):
+    """
+    A class representing a loop that keeps the warm room pool filled.
+    """
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.room_pool = RoomPool()
+        self.rooms = RoomController()
+        if self.room_pool.enabled:
+            self.refill_room_pool.start()
+
+    def cog_unload(self) -> None:
+        self.refill_room_pool.cancel()
+        self.room_pool.cancel()
+
+    @tasks.loop(minutes=1)
+    async def refill_room_pool(self):
+        try:
+            for guild in self.bot.guilds:
+                category = self.rooms.get_pool_category(guild)
+                if category is not None:
+                    self.rooms.refill_pool(category)
+        except Exception as e:
+            logger.error(f"Error refilling the room pool: {e}")
+
+    @refill_room_pool.before_loop
+    async def before_refill_room_pool(self) -> None:
+        await self.bot.wait_until_ready()
+
+        # Pick the pooled channels of the previous run back up before creating new ones
+        for guild in self.bot.guilds:
+            category = self.rooms.get_pool_category(guild)
+            if category is not None:
+                self.room_pool.adopt(category)
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(RoomPoolLoop(bot))
+    return logger.debug("Room pool loop loaded!")
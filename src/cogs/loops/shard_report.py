@@ -0,0 +1,31 @@
+from loguru import logger
+from discord.ext import commands, tasks
+from src.helper.memory import ShardReport
+
+class ShardReportLoop(commands.Cog):
+    """
+    A class representing a loop that logs the memory usage and cache size of each shard.
+    """
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        self.shard_report = ShardReport(bot)
+        self.log_shard_report.start()
+
+    def cog_unload(self) -> None:
+        self.log_shard_report.cancel()
+
+    @tasks.loop(minutes=15)
+    async def log_shard_report(self):
+        try:
+            logger.info(f"Shard report:\n{self.shard_report.format()}")
+        except Exception as e:
+            logger.error(f"Error reporting the shards: {e}")
+
+    @log_shard_report.before_loop
+    async def before_log_shard_report(self) -> None:
+        await self.bot.wait_until_ready()
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(ShardReportLoop(bot))
+    return logger.debug("Shard report loop loaded!")
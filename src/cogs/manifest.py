@@ -0,0 +1,12 @@
+from typing import List
+
+# Extensions loaded at startup, by group. Cogs that aren't listed here aren't loaded.
+COGS = {
+    "commands": ("cache", "latency", "panel", "ping", "shards", "sync"),
+    "events": ("guild_join", "guild_remove", "message", "ready"),
+    "loops": ("bot_status", "expired_sessions", "proxy_health", "retention", "room_pool", "shard_report"),
+}
+
+def get_extensions() -> List[str]:
+    """Returns the module names of the extensions of the manifest."""
+    return [f"src.cogs.{group}.{name}" for group, names in COGS.items() for name in names]
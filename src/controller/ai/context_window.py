@@ -0,0 +1,109 @@
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional, Tuple
+from src.helper.config import Config
+from src.database.controller.sessions import SessionsController
+
+class ContextWindow:
+    """
+    Builds the message list sent to the model for a session, within a token budget.
+
+    Only the most recent turns that fit in the budget are kept. Each session's tail is cached
+    in memory, so follow-up prompts append to it instead of re-reading and decompressing old rows.
+    The cache holds a bounded number of sessions and evicts the least recently used one.
+    The summary of a session's archived messages, if any, always leads the context.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.sessions_controller = SessionsController()
+            self._tails: "OrderedDict[int, Deque[Tuple[dict, int]]]" = OrderedDict()
+            self._tokens: dict = {}
+            self._summaries: "dict[int, Optional[Tuple[dict, int]]]" = {}
+
+    @staticmethod
+    def estimate_tokens(content: str) -> int:
+        """Roughly estimates the token count of a message (~4 characters per token plus role overhead)."""
+        return len(content) // 4 + 4
+
+    async def build(self, session_id: int) -> List[dict]:
+        """
+        Returns the most recent messages of a session that fit in the token budget.
+
+        Args:
+            session_id (int): The ID of the session.
+
+        Returns:
+            list: The messages, oldest first, in the format expected by the model.
+        """
+        if session_id not in self._tails:
+            await self._load(session_id)
+        self._tails.move_to_end(session_id)
+        messages = [dict(message) for message, _ in self._tails[session_id]]
+        summary = self._summaries.get(session_id)
+        if summary is not None:
+            messages.insert(0, dict(summary[0]))
+        return messages
+
+    def add(self, session_id: int, role: str, content: str) -> None:
+        """
+        Appends a stored message to the session's cached tail, if the session is cached.
+
+        Uncached sessions are skipped, their tail is loaded from the database on the next build.
+        """
+        tail = self._tails.get(session_id)
+        if tail is None:
+            return
+        tokens = self.estimate_tokens(content)
+        tail.append(({"role": role, "content": content}, tokens))
+        self._tokens[session_id] += tokens
+        self._trim(session_id)
+
+    def forget(self, session_id: int) -> None:
+        """Drops the cached tail of a session."""
+        self._tails.pop(session_id, None)
+        self._tokens.pop(session_id, None)
+        self._summaries.pop(session_id, None)
+
+    async def _load(self, session_id: int) -> None:
+        """Loads the summary and recent tail of a session from the database."""
+        # Messages first: if a compaction lands in between, they overlap the summary instead of missing from both
+        messages = await self.sessions_controller.get_recent_messages(session_id, self.config.context_max_messages)
+        summary = await self.sessions_controller.get_summary(session_id)
+        if summary is not None:
+            content = f"Summary of the earlier conversation:\n{summary}"
+            self._summaries[session_id] = ({"role": "system", "content": content}, self.estimate_tokens(content))
+        else:
+            self._summaries[session_id] = None
+
+        tail = deque((message, self.estimate_tokens(message["content"])) for message in messages)
+        self._tails[session_id] = tail
+        self._tokens[session_id] = sum(tokens for _, tokens in tail)
+        self._trim(session_id)
+
+        while len(self._tails) > self.config.context_cached_sessions:
+            evicted, _ = self._tails.popitem(last=False)
+            self._tokens.pop(evicted, None)
+            self._summaries.pop(evicted, None)
+
+    def _trim(self, session_id: int) -> None:
+        """Drops the oldest messages until the tail fits in the token budget and message limit."""
+        tail = self._tails[session_id]
+        summary = self._summaries.get(session_id)
+        budget = self.config.context_token_budget - (summary[1] if summary is not None else 0)
+        while len(tail) > 1 and (self._tokens[session_id] > budget or len(tail) > self.config.context_max_messages):
+            _, tokens = tail.popleft()
+            self._tokens[session_id] -= tokens
+
+        # Don't start the context on a reply whose prompt was trimmed away
+        while len(tail) > 1 and tail[0][0]["role"] == "assistant":
+            _, tokens = tail.popleft()
+            self._tokens[session_id] -= tokens
@@ -0,0 +1,106 @@
+import asyncio
+from loguru import logger
+from typing import Awaitable, Callable, Dict, List
+from src.helper.config import Config
+from src.controller.ai.context_window import ContextWindow
+from src.database.controller.sessions import SessionsController
+
+class HistoryCompactor:
+    """
+    Compacts long session histories off the hot path by summarizing their oldest turns.
+
+    Once a session has more than `compaction_threshold` active messages, its oldest ones are
+    folded into the session's rolling summary by the model and archived, leaving the most recent
+    `compaction_keep` messages untouched. Prompts then carry the summary plus the recent turns,
+    so their size doesn't grow with the age of the room.
+    """
+    _instance = None
+    _batch_size = 50
+    _max_message_length = 2000
+    _concurrency = 2
+    _instructions = (
+        "Summarize the conversation below between a user and an assistant, so that it can be "
+        "continued without it. Keep every fact, name, decision, code identifier and open question, "
+        "drop greetings and filler. Merge the previous summary in, if any. Answer with the summary only."
+    )
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.sessions_controller = SessionsController()
+            self.context_window = ContextWindow()
+            self._tasks: Dict[int, asyncio.Task] = {}
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.compaction_threshold > 0
+
+    def schedule(self, session_id: int, complete: Callable[[List[dict]], Awaitable[str]]) -> None:
+        """
+        Compacts the session in the background if it isn't already being compacted.
+
+        Args:
+            session_id (int): The ID of the session.
+            complete (Callable): Coroutine function returning the model's answer to a message list.
+        """
+        if not self.enabled or session_id in self._tasks:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(session_id, complete))
+        self._tasks[session_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session_id, None))
+
+    async def _run(self, session_id: int, complete: Callable[[List[dict]], Awaitable[str]]) -> None:
+        try:
+            async with self._semaphore:
+                while await self.compact(session_id, complete):
+                    pass
+        except Exception as e:
+            logger.error(f"Error compacting history of session {session_id}: {e}")
+
+    async def compact(self, session_id: int, complete: Callable[[List[dict]], Awaitable[str]]) -> bool:
+        """
+        Summarizes and archives one batch of the session's oldest messages, if it's over the threshold.
+
+        Returns:
+            bool: Whether messages were archived, in which case the session may still be over the threshold.
+        """
+        active = await self.sessions_controller.count_active_messages(session_id)
+        if active <= self.config.compaction_threshold:
+            return False
+
+        # A negative limit would read every active message, the kept ones included
+        limit = max(0, min(active - self.config.compaction_keep, self._batch_size))
+        if limit == 0:
+            return False
+
+        batch = await self.sessions_controller.get_oldest_active_messages(session_id, limit)
+        # Don't separate a prompt from its reply
+        if batch and batch[-1][1]["role"] == "user":
+            batch.pop()
+        if not batch:
+            return False
+
+        summary = await complete(self._summary_request(await self.sessions_controller.get_summary(session_id), batch))
+        if not summary or not summary.strip():
+            raise ValueError("Empty summary")
+
+        await self.sessions_controller.archive_messages(session_id, summary.strip(), batch[-1][0])
+        self.context_window.forget(session_id)
+        logger.debug(f"Archived {len(batch)} message(s) of session {session_id} into its summary.")
+        return True
+
+    def _summary_request(self, summary: str, batch: list) -> List[dict]:
+        """Builds the messages asking the model to fold a batch of messages into the summary."""
+        transcript = "\n\n".join(
+            f"{message['role']}: {message['content'][:self._max_message_length]}" for _, message in batch
+        )
+        previous = f"Previous summary:\n{summary}\n\n" if summary else ""
+        return [{"role": "user", "content": f"{self._instructions}\n\n{previous}Conversation:\n{transcript}"}]
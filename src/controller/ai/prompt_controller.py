@@ -1,16 +1,29 @@
+import time, asyncio
 from loguru import logger
+from typing import AsyncIterator, List
 from src.helper.config import Config
-from g4f.client import AsyncClient
+from src.helper.metrics import Metrics
+from src.controller.ai.context_window import ContextWindow
+from src.controller.ai.history_compactor import HistoryCompactor
+from src.manager.proxy_manager import ProxyManager
+from src.controller.ai.prompt_queue import PromptQueue
+from src.controller.ai.provider_router import ProviderRouter
+from src.controller.ai.response_cache import ResponseCache
 from src.database.controller.sessions import SessionsController
-from g4f.Provider import RetryProvider, Phind, FreeChatgpt, Liaobots, You
 
 class PromptController:
     """
     The PromptController class handles sending prompts to the GPT model and managing chat history.
+
+    g4f and its providers take a while to import, so they're only imported on first use (the
+    first prompt, unless `preload` ran first).
     """
 
     _instance = None
-    _my_providers = [Phind, FreeChatgpt, Liaobots, You]
+    _failure_message = 'The model failed to respond. Please try again later.'
+    _interrupted_notice = '\n\n*(response interrupted)*'
+    _proxy_attempts = 2
+    _provider_names = ("Phind", "FreeChatgpt", "Liaobots", "You")
 
     def __new__(cls):
         if cls._instance is None:
@@ -19,50 +32,316 @@ class PromptController:
         return cls._instance
 
     def __init__(self):
-        """Initializes the PromptController, sets up the GPT client with or without proxy."""
+        """Initializes the PromptController and sets up the GPT client."""
         if not self._initialized:
+            self._initialized = True
             self.config = Config()
             self.sessions_controller = SessionsController()
+            self.context_window = ContextWindow()
+            self.compactor = HistoryCompactor()
+            self.router = ProviderRouter()
+            self.response_cache = ResponseCache()
+            self.proxy_manager = ProxyManager()
+            self.prompt_queue = PromptQueue()
+            self.metrics = Metrics()
+
+            # The GPT client and the providers, created on first use
+            self._client = None
+            self._providers = None
+
+    @staticmethod
+    def _import_g4f():
+        import g4f.debug, g4f.client, g4f.Provider
+        # Skip the blocking PyPI version check g4f runs on its first request
+        g4f.debug.version_check = False
+        return g4f
+
+    @property
+    def client(self):
+        """The GPT client, providers and proxies are picked per request."""
+        if self._client is None:
+            self._client = self._import_g4f().client.AsyncClient()
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+
+    @property
+    def providers(self) -> list:
+        """The providers to pick from."""
+        if self._providers is None:
+            g4f = self._import_g4f()
+            self._providers = [getattr(g4f.Provider, name) for name in self._provider_names]
+        return self._providers
+
+    def preload(self) -> None:
+        """Imports g4f and creates the client ahead of the first prompt."""
+        self.client
+        self.providers
+
+    def _record_failure(self, provider, proxy: str, error: Exception, record_stats: bool = True) -> bool:
+        """
+        Blames a failed request on the proxy or on the provider, depending on the error.
+
+        Proxies are blamed even if `record_stats` is False, providers only if it's True.
+
+        Returns:
+            bool: True if the proxy was blamed.
+        """
+        proxy_label = self.proxy_manager.get_label(proxy)
+        self.metrics.inc("provider_errors_total", provider=provider.__name__, proxy=proxy_label)
+        log = logger.bind(provider=provider.__name__, proxy=proxy_label)
+        if proxy is not None and self.proxy_manager.is_proxy_error(error):
+            self.proxy_manager.record_failure(proxy)
+            log.warning(f'Proxy {proxy_label} failed with provider {provider.__name__}: {error}')
+            return True
+
+        if record_stats:
+            self.router.record_failure(provider)
+        log.warning(f'Provider {provider.__name__} failed: {error}')
+        return False
+
+    async def _prepare_history(self, session_id: int, user_input: str) -> List[dict]:
+        """Saves the user input and returns the chat history to send to the model."""
+        # Save user input to chat history
+        await self.sessions_controller.add_message(session_id, "user", user_input)
+        self.context_window.add(session_id, "user", user_input)
+
+        # Build the recent chat history that fits in the token budget
+        with self.metrics.timer("prompt_stage_seconds", stage="history_load"):
+            return await self.context_window.build(session_id)
+
+    async def _save_response(self, session_id: int, response_content: str) -> None:
+        """Saves the model's response to the chat history and compacts the history if it grew too long."""
+        await self.sessions_controller.add_message(session_id, "assistant", response_content)
+        self.context_window.add(session_id, "assistant", response_content)
+        self.compactor.schedule(session_id, self._summarize)
+
+    async def _summarize(self, chat_history: List[dict]) -> str:
+        """
+        Gets a completion for the history compactor.
+
+        It holds a slot of the global limit of model calls like prompts do, but its long prompts
+        are left out of the provider and proxy statistics, which rank providers for prompts.
+        """
+        async with self.prompt_queue.slot():
+            return await self._complete(chat_history, record_stats=False)
+
+    async def _attempt(self, provider, chat_history: List[dict], record_stats: bool = True) -> str:
+        """
+        Gets a completion from a single provider and records the outcome, if `record_stats` is True.
+
+        Requests that fail because of the proxy are retried once through another proxy.
+        """
+        for attempt in range(self._proxy_attempts):
+            proxy = self.proxy_manager.acquire()
+            start = time.monotonic()
+            try:
+                response = await self.client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=chat_history,
+                    provider=provider,
+                    proxy=self.proxy_manager.get_url(proxy),
+                    timeout=self.config.prompt_timeout
+                )
+                response_content = response.choices[0].message.content
+                if not response_content:
+                    raise ValueError("Empty response")
+                if record_stats:
+                    latency = time.monotonic() - start
+                    self.router.record_success(provider, latency)
+                    self.proxy_manager.record_success(proxy, latency)
+                    self.metrics.observe("provider_request_seconds", latency, provider=provider.__name__, proxy=self.proxy_manager.get_label(proxy))
+                return response_content
+            except asyncio.CancelledError:
+                if record_stats:
+                    self.router.record_cancelled(provider)
+                raise
+            except Exception as e:
+                if not self._record_failure(provider, proxy, e, record_stats):
+                    raise
+                if attempt == self._proxy_attempts - 1:
+                    # The provider wasn't to blame, so a pending probe of it is left to a later request
+                    if record_stats:
+                        self.router.record_cancelled(provider)
+                    raise
+
+    async def _complete(self, chat_history: List[dict], record_stats: bool = True) -> str:
+        """
+        Gets a completion, trying the providers in the order picked by the router.
 
-            # Initialize the GPT client with or without a proxy
-            proxy_url = self._get_proxy_url() if not self.config.proxyless else None
-            self.client = AsyncClient(
-                provider=RetryProvider(self._my_providers, shuffle=False), 
-                proxies=proxy_url
-            )
+        Without `record_stats`, the outcome isn't recorded, so no half-open probe is taken and
+        requests aren't hedged.
+        """
+        if record_stats and self.config.hedge_requests:
+            return await self._hedged_complete(chat_history)
 
-    def _get_proxy_url(self) -> str:
-        """Retrieves a proxy URL from the configuration, logs it, and returns the formatted proxy URL."""
-        proxy = self.config.get_proxy()
-        return f"http://{proxy}"
+        last_error = None
+        for provider in self.router.order(self.providers, probe=record_stats):
+            try:
+                return await self._attempt(provider, chat_history, record_stats)
+            except Exception as e:
+                last_error = e
+        raise RuntimeError(f'All providers failed, last error: {last_error}')
 
-    def _rotate_proxy(self):
-        """Rotates the proxy used by the GPT client."""
-        proxy_url = self._get_proxy_url()
-        self.client.proxies = proxy_url
+    def _hedge_delay(self, provider) -> float:
+        """Returns how long to wait on a provider before hedging, from its historical latency."""
+        delay = self.router.get_stats(provider).percentile(self.config.hedge_percentile)
+        return delay if delay is not None else self.config.prompt_timeout / 2
+
+    async def _hedged_complete(self, chat_history: List[dict]) -> str:
+        """
+        Gets a completion, hedging slow requests with a second provider.
+
+        When the running request has taken longer than the configured percentile of its
+        provider's historical latency, the same messages are sent to the next provider.
+        The first successful answer wins and the other request is cancelled.
+        """
+        providers = list(self.router.order(self.providers))
+        running = {}
+        last_error = None
+
+        def launch() -> None:
+            provider = providers.pop(0)
+            task = asyncio.create_task(self._attempt(provider, chat_history))
+            running[task] = (provider, time.monotonic())
+
+        launch()
+        try:
+            while running:
+                # Hedge once the running request goes past its provider's latency percentile
+                timeout = None
+                if len(running) < 2 and providers:
+                    provider, started = next(iter(running.values()))
+                    timeout = max(0.0, started + self._hedge_delay(provider) - time.monotonic())
+
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.debug(f'Hedging slow request to {provider.__name__} with {providers[0].__name__}.')
+                    launch()
+                    continue
+
+                for task in done:
+                    running.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+
+                if not running and providers:
+                    launch()
+        finally:
+            for task in running:
+                task.cancel()
+
+        raise RuntimeError(f'All providers failed, last error: {last_error}')
+
+    async def _stream(self, chat_history: List[dict]) -> AsyncIterator[str]:
+        """
+        Streams a completion, trying the providers in the order picked by the router.
+
+        The router gets the time to the first chunk as latency. Once a provider has produced
+        a chunk it is committed to, later errors end the stream instead of failing over.
+        """
+        last_error = None
+        providers = list(self.router.order(self.providers))
+        retried = set()
+        while providers:
+            provider = providers.pop(0)
+            proxy = self.proxy_manager.acquire()
+            start = time.monotonic()
+            started = False
+            try:
+                stream = self.client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=chat_history,
+                    provider=provider,
+                    proxy=self.proxy_manager.get_url(proxy),
+                    stream=True,
+                    timeout=self.config.stream_timeout
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    if not started:
+                        started = True
+                        latency = time.monotonic() - start
+                        self.router.record_success(provider, latency)
+                        self.proxy_manager.record_success(proxy, latency)
+                        self.metrics.observe("provider_request_seconds", latency, provider=provider.__name__, proxy=self.proxy_manager.get_label(proxy))
+                    yield delta
+                if started:
+                    return
+                raise ValueError("Empty response")
+            except (asyncio.CancelledError, GeneratorExit):
+                if not started:
+                    self.router.record_cancelled(provider)
+                raise
+            except Exception as e:
+                if started:
+                    raise
+                # Retry once through another proxy if the proxy was to blame
+                if self._record_failure(provider, proxy, e):
+                    if provider not in retried:
+                        retried.add(provider)
+                        providers.insert(0, provider)
+                    else:
+                        self.router.record_cancelled(provider)
+                last_error = e
+        raise RuntimeError(f'All providers failed, last error: {last_error}')
 
     async def send_prompt(self, session_id: int, user_input: str) -> str:
         """Sends a prompt to the GPT model and saves the interaction in the database."""
         try:
-            # Save user input to chat history
-            await self.sessions_controller.add_message(session_id, "user", user_input)
-
-            # Retrieve chat history for the session
-            chat_history = await self.sessions_controller.get_chat_history(session_id)
+            chat_history = await self._prepare_history(session_id, user_input)
 
-            # Send the updated chat history to the GPT model
-            response = await self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=chat_history,
-                timeout=10
-            )
-            response_content = response.choices[0].message.content
+            # Send the updated chat history to the GPT model, unless it was answered before
+            response_content = self.response_cache.get(chat_history)
+            if response_content is None:
+                response_content = await self._complete(chat_history)
+                self.response_cache.put(chat_history, response_content)
 
             # Save model's response to chat history
-            await self.sessions_controller.add_message(session_id, "assistant", response_content)
+            await self._save_response(session_id, response_content)
             return response_content
 
         except Exception as e:
-            self._rotate_proxy()
             logger.error(f'Error in sending prompt: {e}')
-            return 'The model failed to respond. Please try again later.'
+            return self._failure_message
+
+    async def stream_prompt(self, session_id: int, user_input: str) -> AsyncIterator[str]:
+        """
+        Sends a prompt to the GPT model and yields the response as it is generated.
+
+        The full response is saved in the database once the stream ends. If the model fails
+        before producing anything, the failure message is yielded instead. If it fails midway,
+        an interruption notice is yielded, and the partial response is saved with it.
+        """
+        response_content = ""
+        interrupted = False
+        try:
+            chat_history = await self._prepare_history(session_id, user_input)
+
+            cached = self.response_cache.get(chat_history)
+            if cached is not None:
+                response_content = cached
+                yield cached
+            else:
+                async for delta in self._stream(chat_history):
+                    response_content += delta
+                    yield delta
+                self.response_cache.put(chat_history, response_content)
+
+        except Exception as e:
+            logger.error(f'Error in streaming prompt: {e}')
+            interrupted = bool(response_content)
+
+        if interrupted:
+            # The user and the model's next context both see the answer was cut off
+            response_content += self._interrupted_notice
+            yield self._interrupted_notice
+        if response_content:
+            await self._save_response(session_id, response_content)
+        else:
+            yield self._failure_message
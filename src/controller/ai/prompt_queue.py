@@ -0,0 +1,149 @@
+import asyncio
+from typing import Dict
+from contextlib import asynccontextmanager
+from src.helper.config import Config
+
+class QueueFullError(Exception):
+    """Raised when a session already has the maximum number of prompts queued."""
+
+class PromptTicket:
+    """
+    A reserved place in a session's prompt queue.
+
+    Entering the ticket waits for the prompts ahead of it in the same session, then for a free
+    slot in the global limit of in-flight model calls. Leaving it frees both. A ticket that is
+    never entered has to be given back with `release`.
+
+    Attributes:
+        session_id (int): The ID of the session the prompt belongs to.
+        position (int): Number of prompts ahead of this one when it was reserved.
+    """
+
+    def __init__(self, queue: "PromptQueue", session_id: int, position: int) -> None:
+        self.queue = queue
+        self.session_id = session_id
+        self.position = position
+        self._lock_acquired = False
+        self._released = False
+
+    async def __aenter__(self) -> "PromptTicket":
+        try:
+            await self.queue._session_lock(self.session_id).acquire()
+            self._lock_acquired = True
+            await self.queue._acquire_slot()
+        except BaseException:
+            self._release(slot=False)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._release(slot=True)
+
+    def release(self) -> None:
+        """Gives the reserved place back without entering the ticket."""
+        self._release(slot=False)
+
+    def _release(self, slot: bool) -> None:
+        if self._released:
+            return
+        self._released = True
+        if slot:
+            self.queue._release_slot()
+        if self._lock_acquired:
+            self.queue._session_lock(self.session_id).release()
+        self.queue._leave(self.session_id)
+
+class PromptQueue:
+    """
+    Serializes the prompts of each session and bounds the number of concurrent model calls.
+
+    Each session gets a FIFO queue of at most `max_queued_prompts` prompts (running one included),
+    so a user firing several messages gets them answered one after the other, on top of each other's
+    history. A global limit of `max_concurrent_prompts` in-flight prompts keeps the providers and
+    proxies from being flooded, prompts over it wait for a free slot.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self._semaphore = asyncio.Semaphore(self.config.max_concurrent_prompts)
+            self._locks: Dict[int, asyncio.Lock] = {}
+            self._depth: Dict[int, int] = {}
+            self._waiting = 0
+            self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of prompts currently holding a model call slot."""
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        """Number of prompts waiting for a model call slot."""
+        return self._waiting
+
+    def reserve(self, session_id: int) -> PromptTicket:
+        """
+        Reserves a place in the session's queue.
+
+        Args:
+            session_id (int): The ID of the session.
+
+        Returns:
+            PromptTicket: The ticket to enter (`async with`) around the prompt.
+
+        Raises:
+            QueueFullError: If the session already has the maximum number of prompts queued.
+        """
+        depth = self._depth.get(session_id, 0)
+        if depth >= self.config.max_queued_prompts:
+            raise QueueFullError(f"Session {session_id} already has {depth} prompt(s) queued.")
+
+        position = depth
+        if self._semaphore.locked():
+            position += self._waiting + 1
+
+        self._depth[session_id] = depth + 1
+        return PromptTicket(self, session_id, position)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds a slot of the global limit around a model call made outside of any session's queue."""
+        await self._acquire_slot()
+        try:
+            yield
+        finally:
+            self._release_slot()
+
+    def _session_lock(self, session_id: int) -> asyncio.Lock:
+        if session_id not in self._locks:
+            self._locks[session_id] = asyncio.Lock()
+        return self._locks[session_id]
+
+    async def _acquire_slot(self) -> None:
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+
+    def _release_slot(self) -> None:
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    def _leave(self, session_id: int) -> None:
+        depth = self._depth.get(session_id, 1) - 1
+        if depth <= 0:
+            self._depth.pop(session_id, None)
+            self._locks.pop(session_id, None)
+        else:
+            self._depth[session_id] = depth
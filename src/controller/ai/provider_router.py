@@ -0,0 +1,238 @@
+import os, json, time, asyncio
+from loguru import logger
+from collections import deque
+from typing import Dict, List, Optional
+from src.helper.config import Config
+from src.manager.cluster_manager import ClusterManager
+
+class ProviderStats:
+    """
+    Rolling latency and error statistics of a provider, plus its circuit breaker state.
+
+    The breaker opens after `failure_threshold` consecutive failures. Once its cooldown is over
+    a single probe request is let through (half-open): a success closes it again, a failure
+    re-opens it with a doubled cooldown.
+    """
+
+    WINDOW = 100
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.latencies = deque(maxlen=self.WINDOW)
+        self.outcomes = deque(maxlen=self.WINDOW)
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = 0.0
+        self.opened_at = 0.0
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Returns the given latency percentile (0-1) of successful requests, or None without data."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile))]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def expected_latency(self, default: float) -> float:
+        """
+        Estimates the time to get a successful answer, penalizing providers that often fail.
+
+        Providers that were never tried rank first so they get measured, providers that never
+        succeeded are assumed to take `default` seconds.
+        """
+        median = self.percentile(0.5)
+        if median is None:
+            median = default if self.outcomes else 0.0
+        return median / max(1 - self.error_rate, 0.05)
+
+    def serialize(self) -> dict:
+        return {
+            "latencies": list(self.latencies),
+            "outcomes": list(self.outcomes),
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "cooldown": self.cooldown,
+        }
+
+    @staticmethod
+    def deserialize(name: str, data: dict) -> "ProviderStats":
+        stats = ProviderStats(name)
+        stats.latencies.extend(data.get("latencies", []))
+        stats.outcomes.extend(bool(outcome) for outcome in data.get("outcomes", []))
+        stats.consecutive_failures = data.get("consecutive_failures", 0)
+        stats.cooldown = data.get("cooldown", 0.0)
+        # Breakers that were open before a restart get probed again right away
+        if data.get("state", ProviderStats.CLOSED) != ProviderStats.CLOSED:
+            stats.state = ProviderStats.OPEN
+        return stats
+
+class ProviderRouter:
+    """
+    Orders providers by expected latency using rolling per-provider statistics.
+
+    Statistics are kept in memory and persisted to `data/provider_stats.json`, so the ordering
+    survives restarts. Providers whose circuit breaker is open are skipped until their cooldown
+    is over, then probed once before being trusted again. Breakers opened by a process are
+    opened in the other processes of the cluster too, so they don't each have to find out.
+    """
+    _instance = None
+    _save_delay = 60
+    _max_cooldown = 600
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.stats_file = 'data/provider_stats.json'
+            self.stats: Dict[str, ProviderStats] = {}
+            self._save_task: Optional[asyncio.Task] = None
+            self.cluster_manager = ClusterManager()
+            self.cluster_manager.on("provider_tripped", self._on_provider_tripped)
+            self._load()
+
+    def _get_stats(self, provider) -> ProviderStats:
+        name = provider if isinstance(provider, str) else provider.__name__
+        if name not in self.stats:
+            self.stats[name] = ProviderStats(name)
+        return self.stats[name]
+
+    def get_stats(self, provider) -> ProviderStats:
+        """Returns the statistics of a provider."""
+        return self._get_stats(provider)
+
+    def order(self, providers: List, probe: bool = True) -> List:
+        """
+        Returns the providers to try, fastest expected first.
+
+        Providers with an open breaker are left out, unless their cooldown is over (the first
+        one of those is let through as a half-open probe) or every breaker is open, in which case
+        they are tried in the order their breakers opened.
+
+        Parameters:
+            providers (list): The providers to order.
+            probe (bool, optional): Whether a half-open probe can be let through. Requests whose
+                outcome isn't recorded must not take probes, they would never settle them.
+        """
+        now = time.monotonic()
+        default = self.config.prompt_timeout
+        available, probes, tripped = [], [], []
+
+        for provider in providers:
+            stats = self._get_stats(provider)
+            if stats.state == ProviderStats.CLOSED:
+                available.append(provider)
+            elif stats.state == ProviderStats.OPEN and now - stats.opened_at >= stats.cooldown:
+                probes.append(provider)
+            else:
+                tripped.append(provider)
+
+        available.sort(key=lambda provider: self._get_stats(provider).expected_latency(default))
+
+        if probes and probe:
+            provider = probes.pop(0)
+            self._get_stats(provider).state = ProviderStats.HALF_OPEN
+            logger.debug(f"Probing provider {provider.__name__} (half-open).")
+            available.insert(0, provider)
+
+        if not available:
+            available = sorted(tripped + probes, key=lambda provider: self._get_stats(provider).opened_at)
+        return available
+
+    def record_success(self, provider, latency: float) -> None:
+        """Records a successful request and closes the provider's breaker."""
+        stats = self._get_stats(provider)
+        stats.latencies.append(latency)
+        stats.outcomes.append(True)
+        stats.consecutive_failures = 0
+        if stats.state != ProviderStats.CLOSED:
+            logger.bind(provider=stats.name).info(f"Provider {stats.name} recovered, closing its circuit breaker.")
+        stats.state = ProviderStats.CLOSED
+        stats.cooldown = 0.0
+        self._schedule_save()
+
+    def record_failure(self, provider) -> None:
+        """Records a failed request and opens the provider's breaker if needed."""
+        stats = self._get_stats(provider)
+        stats.outcomes.append(False)
+        stats.consecutive_failures += 1
+
+        if stats.state == ProviderStats.HALF_OPEN or stats.consecutive_failures >= self.config.provider_failure_threshold:
+            if stats.state == ProviderStats.HALF_OPEN:
+                stats.cooldown = min(max(stats.cooldown * 2, self.config.provider_cooldown), self._max_cooldown)
+            else:
+                stats.cooldown = self.config.provider_cooldown
+            stats.state = ProviderStats.OPEN
+            stats.opened_at = time.monotonic()
+            logger.bind(provider=stats.name).warning(f"Opened circuit breaker of provider {stats.name} for {stats.cooldown:.0f}s.")
+            self.cluster_manager.publish_nowait("provider_tripped", name=stats.name, cooldown=stats.cooldown)
+        self._schedule_save()
+
+    def _on_provider_tripped(self, data: dict) -> None:
+        """Opens the breaker of a provider another process opened, unless it's already open or probed."""
+        stats = self._get_stats(data["name"])
+        if stats.state != ProviderStats.CLOSED:
+            return
+        stats.state = ProviderStats.OPEN
+        stats.cooldown = data["cooldown"]
+        stats.opened_at = time.monotonic()
+        logger.bind(provider=stats.name).warning(f"Opened circuit breaker of provider {stats.name} for {stats.cooldown:.0f}s, as another process did.")
+
+    def record_cancelled(self, provider) -> None:
+        """Records a request that was cancelled, or that only its proxies failed, freeing a pending probe."""
+        stats = self._get_stats(provider)
+        if stats.state == ProviderStats.HALF_OPEN:
+            stats.state = ProviderStats.OPEN
+
+    def _load(self) -> None:
+        """Loads persisted statistics, if any."""
+        try:
+            with open(self.stats_file, 'r') as file:
+                data = json.load(file)
+            self.stats = {name: ProviderStats.deserialize(name, entry) for name, entry in data.items()}
+            logger.debug(f"Loaded statistics of {len(self.stats)} provider(s).")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error loading provider statistics: {e}")
+
+    def _write(self, data: dict) -> None:
+        os.makedirs(os.path.dirname(self.stats_file), exist_ok=True)
+        temp_file = f"{self.stats_file}.tmp"
+        with open(temp_file, 'w') as file:
+            json.dump(data, file)
+        os.replace(temp_file, self.stats_file)
+
+    async def save(self) -> None:
+        """Persists the statistics without blocking the event loop."""
+        try:
+            data = {name: stats.serialize() for name, stats in self.stats.items()}
+            await asyncio.to_thread(self._write, data)
+        except Exception as e:
+            logger.error(f"Error saving provider statistics: {e}")
+
+    def _schedule_save(self) -> None:
+        """Saves the statistics after a short delay, batching the records made in the meantime."""
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.get_running_loop().create_task(self._save_later())
+
+    async def _save_later(self) -> None:
+        await asyncio.sleep(self._save_delay)
+        await self.save()
+
+    async def close(self) -> None:
+        """Cancels the pending delayed save and saves right away."""
+        if self._save_task is not None and not self._save_task.done():
+            self._save_task.cancel()
+        await self.save()
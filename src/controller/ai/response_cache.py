@@ -0,0 +1,207 @@
+import os, re, json, time, asyncio, hashlib, aiosqlite
+from loguru import logger
+from collections import OrderedDict
+from typing import List, Optional, Set, Tuple
+from src.helper.config import Config
+
+class ResponseCache:
+    """
+    Opt-in cache of model responses to short, history-less contexts.
+
+    Many rooms open with the same questions. Contexts of at most `response_cache_max_messages`
+    messages, without a summary of earlier messages, are answered from the cache when the same
+    messages (compared case-insensitively, with collapsed whitespace) were answered before.
+    Entries expire after `response_cache_ttl` seconds, and the least recently used ones are
+    evicted past `response_cache_max_entries` entries or `response_cache_max_bytes` bytes.
+    With `response_cache_persist`, entries are also kept in `data/response_cache.sqlite`, so the
+    cache is warm after a restart.
+    """
+    _instance = None
+    _entry_overhead = 200
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.db_path = 'data/response_cache.sqlite'
+            # key -> (response, expires at (epoch seconds), size in bytes)
+            self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+            self._bytes = 0
+            self._db: Optional[aiosqlite.Connection] = None
+            self._write_lock = asyncio.Lock()
+            # Pending writes to the persisted cache, awaited before it's closed
+            self._pending: Set[asyncio.Task] = set()
+            self.hits = 0
+            self.misses = 0
+            self.bypassed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.response_cache
+
+    @staticmethod
+    def _normalize(content: str) -> str:
+        return re.sub(r"\s+", " ", content).strip().casefold()
+
+    def make_key(self, messages: List[dict]) -> Optional[str]:
+        """
+        Returns the cache key of a context, or None if it isn't cacheable.
+
+        Contexts longer than `response_cache_max_messages` or holding a system message (the
+        summary of a longer history) are specific to their session.
+        """
+        if not messages or len(messages) > self.config.response_cache_max_messages:
+            return None
+        if any(message["role"] not in ("user", "assistant") for message in messages):
+            return None
+        normalized = [[message["role"], self._normalize(message["content"])] for message in messages]
+        return hashlib.sha256(json.dumps(normalized).encode()).hexdigest()
+
+    def get(self, messages: List[dict]) -> Optional[str]:
+        """Returns the cached response to a context, if any, and counts the lookup."""
+        if not self.enabled:
+            return None
+        key = self.make_key(messages)
+        if key is None:
+            self.bypassed += 1
+            return None
+
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, messages: List[dict], response: str) -> None:
+        """Caches the response to a context, if it's cacheable."""
+        if not self.enabled:
+            return
+        key = self.make_key(messages)
+        if key is None:
+            return
+
+        expires_at = time.time() + self.config.response_cache_ttl
+        self._store(key, response, expires_at)
+        if self._db is not None:
+            self._schedule(self._persist(key, response, expires_at))
+
+    def _schedule(self, write) -> None:
+        # Writes take the write lock in the order they're scheduled
+        task = asyncio.get_running_loop().create_task(write)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _store(self, key: str, response: str, expires_at: float) -> None:
+        size = len(key) + len(response.encode()) + self._entry_overhead
+        if size > self.config.response_cache_max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (response, expires_at, size)
+        self._bytes += size
+        while len(self._entries) > self.config.response_cache_max_entries or self._bytes > self.config.response_cache_max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def clear(self) -> None:
+        """Drops every cached response, from the persisted cache too."""
+        self._entries.clear()
+        self._bytes = 0
+        if self._db is not None:
+            self._schedule(self._delete_all())
+
+    def stats(self) -> dict:
+        """Returns the size and hit rate of the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    async def load(self) -> None:
+        """Opens the persisted cache, if enabled, and loads its entries that didn't expire."""
+        if not self.enabled or not self.config.response_cache_persist or self._db is not None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._db = await aiosqlite.connect(self.db_path)
+            await self._db.execute('PRAGMA journal_mode=WAL;')
+            await self._db.execute('''
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    used_at REAL NOT NULL
+                );
+            ''')
+            await self._db.execute('DELETE FROM response_cache WHERE expires_at <= ?;', (time.time(),))
+            await self._db.commit()
+
+            # Least recently used first, so the most recent entries survive the caps
+            async with self._db.execute('SELECT key, response, expires_at FROM response_cache ORDER BY used_at;') as cursor:
+                rows = await cursor.fetchall()
+            for key, response, expires_at in rows:
+                self._store(key, response, expires_at)
+            logger.debug(f"Loaded {len(self._entries)} cached response(s).")
+        except Exception as e:
+            logger.error(f"Error loading the response cache: {e}")
+
+    async def _persist(self, key: str, response: str, expires_at: float) -> None:
+        try:
+            async with self._write_lock:
+                if self._db is None:
+                    return
+                await self._db.execute('''
+                    INSERT INTO response_cache (key, response, expires_at, used_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (key) DO UPDATE SET response = excluded.response, expires_at = excluded.expires_at, used_at = excluded.used_at;
+                ''', (key, response, expires_at, time.time()))
+                await self._db.commit()
+        except Exception as e:
+            logger.error(f"Error persisting a cached response: {e}")
+
+    async def _delete_all(self) -> None:
+        try:
+            async with self._write_lock:
+                if self._db is None:
+                    return
+                await self._db.execute('DELETE FROM response_cache;')
+                await self._db.commit()
+        except Exception as e:
+            logger.error(f"Error clearing the persisted response cache: {e}")
+
+    async def close(self) -> None:
+        """Waits for the pending writes, trims the persisted cache down to the entries held in memory and closes it."""
+        if self._db is None:
+            return
+        if self._pending:
+            await asyncio.gather(*self._pending)
+        try:
+            async with self._write_lock:
+                await self._db.execute('DELETE FROM response_cache;')
+                await self._db.executemany('''
+                    INSERT INTO response_cache (key, response, expires_at, used_at) VALUES (?, ?, ?, ?);
+                ''', [(key, response, expires_at, index) for index, (key, (response, expires_at, _)) in enumerate(self._entries.items())])
+                await self._db.commit()
+                await self._db.close()
+                self._db = None
+        except Exception as e:
+            logger.error(f"Error saving the response cache: {e}")
@@ -0,0 +1,152 @@
+import time, asyncio
+from collections import deque
+from contextvars import ContextVar
+from contextlib import asynccontextmanager
+from typing import Deque, Optional
+from src.helper.config import Config
+from src.helper.metrics import Metrics
+
+# Set while a background job runs, so the requests it makes are told apart from interactive ones
+_background: ContextVar[bool] = ContextVar("rest_background", default=False)
+
+class RestScheduler:
+    """
+    Schedules the Discord REST calls of background work after interactive ones.
+
+    Every request of the bot's HTTP client is counted once `install` is called. Requests made
+    inside a `background` block are background ones, all the others (replies, streamed edits,
+    room creation...) are interactive and are never held back. Background jobs wait in a queue
+    for a slot: at most `rest_background_concurrency` run at the same time, and only as many as
+    the part of `rest_global_rate` left to them (`rest_background_share`) minus the requests
+    of the last second allows, so the rest of the global budget stays free for interactive
+    requests. Background jobs also wait while Discord's global rate limit is hit.
+    """
+    _instance = None
+    _window = 1.0
+    _global_poll_interval = 0.25
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.metrics = Metrics()
+            self._http = None
+            self._sent: Deque[float] = deque()
+            self._waiters: Deque[asyncio.Future] = deque()
+            self._running = 0
+            self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def background_budget(self) -> int:
+        """Requests per second background jobs can use."""
+        return max(1, int(self.config.rest_global_rate * self.config.rest_background_share))
+
+    def install(self, http) -> None:
+        """Counts the requests of the bot's HTTP client from now on."""
+        if self._http is not None:
+            return
+        self._http = http
+        request = http.request
+
+        async def counted_request(route, **kwargs):
+            background = _background.get()
+            now = time.monotonic()
+            self._prune(now)
+            self._sent.append(now)
+            self.metrics.inc("rest_requests_total", priority="background" if background else "interactive")
+            return await request(route, **kwargs)
+
+        http.request = counted_request
+
+    def _prune(self, now: float) -> None:
+        while self._sent and now - self._sent[0] >= self._window:
+            self._sent.popleft()
+
+    def _global_limited(self) -> bool:
+        # discord.py clears this event while the global rate limit is hit
+        global_over = getattr(self._http, "_global_over", None)
+        return isinstance(global_over, asyncio.Event) and not global_over.is_set()
+
+    def _get_delay(self) -> Optional[float]:
+        """Returns how long the next background job has to wait, or None until a running one finishes."""
+        if self._running >= self.config.rest_background_concurrency:
+            return None
+        if self._global_limited():
+            return self._global_poll_interval
+
+        now = time.monotonic()
+        self._prune(now)
+        if len(self._sent) + self._running < self.background_budget:
+            return 0.0
+        if self._sent:
+            return self._sent[0] + self._window - now
+        return None
+
+    def _dispatch(self) -> None:
+        """Hands slots out to the queued jobs, in order, as long as the budget allows."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._waiters:
+            if self._waiters[0].done():
+                self._waiters.popleft()
+                continue
+            delay = self._get_delay()
+            if delay is None:
+                break
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                break
+            self._running += 1
+            self._waiters.popleft().set_result(None)
+        self.metrics.set("rest_background_queue_depth", len(self._waiters))
+
+    def _release(self) -> None:
+        self._running -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def background(self, kind: str):
+        """
+        Waits for a slot of the background budget, then runs the block as a background job.
+
+        Parameters:
+            kind (str): Kind of job, labelling its wait time in the metrics.
+        """
+        start = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed out as the job was cancelled
+                self._release()
+            raise
+
+        self.metrics.observe("rest_background_wait_seconds", time.perf_counter() - start, kind=kind)
+
+        token = _background.set(True)
+        try:
+            yield
+        finally:
+            _background.reset(token)
+            self._release()
+
+    def get_stats(self) -> dict:
+        """Returns the queued and running background jobs, and the requests of the last second."""
+        now = time.monotonic()
+        return {
+            "queued": sum(1 for waiter in self._waiters if not waiter.done()),
+            "running": self._running,
+            "requests": sum(1 for sent in self._sent if now - sent < self._window),
+            "budget": self.background_budget,
+        }
@@ -0,0 +1,140 @@
+import uuid, asyncio, discord
+from loguru import logger
+from typing import Dict, Optional, Set, Union
+from src.helper.config import Config
+from src.helper.metrics import Metrics
+from src.views.channel.control_view import ControlView
+from src.database.schema.sessions import SessionSchema
+from src.database.controller.sessions import SessionsController
+from src.controller.discord.schema.embed_schema import EmbedSchema
+from src.controller.discord.embed_controller import EmbedController
+from src.controller.discord.room_pool import RoomPool
+
+class RoomController:
+    """
+    Provisions private room channels.
+
+    Every permission overwrite is passed to the channel creation call, so a room costs a single
+    REST call instead of one per overwrite, and the welcome message is sent alongside the
+    interaction's reply. If the warm room pool is enabled, rooms are claimed from it instead.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.sessions = SessionsController()
+            self.pool = RoomPool()
+            self.metrics = Metrics()
+            self._creating: Set[int] = set()
+
+    def reserve(self, user_id: int) -> bool:
+        """
+        Marks a room as being created for the user, so double clicks don't create two rooms.
+
+        Returns:
+            bool: False if a room is already being created for the user.
+        """
+        if user_id in self._creating:
+            return False
+        self._creating.add(user_id)
+        return True
+
+    def release(self, user_id: int) -> None:
+        """Clears the mark set by `reserve`."""
+        self._creating.discard(user_id)
+
+    def build_overwrites(self, guild: discord.Guild, member: Optional[Union[discord.Member, discord.User]] = None) -> Dict[object, discord.PermissionOverwrite]:
+        """
+        Builds the permission overwrites of a room: visible to its owner and the bot only.
+
+        Without a member, the room is visible to the bot only, as pooled rooms are. Roles from
+        `additional_hide_roles` that don't exist in the guild are skipped.
+        """
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+        }
+        if member is not None:
+            overwrites[member] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+
+        # Hide additional roles if specified in the config
+        for role_id in self.config.additional_hide_roles:
+            role = guild.get_role(role_id)
+            if role is None:
+                logger.warning(f"Role ID {role_id} not found in guild.")
+                continue
+            overwrites[role] = discord.PermissionOverwrite(read_messages=False)
+        return overwrites
+
+    async def create_room(self, interaction: discord.Interaction) -> discord.TextChannel:
+        """
+        Creates a room for the user of the interaction and stores its session.
+
+        Args:
+            interaction (discord.Interaction): The interaction that requested the room.
+
+        Returns:
+            discord.TextChannel: The created channel.
+        """
+        guild = interaction.guild
+        chat_category = guild.get_channel(self.config.chat_category) or interaction.channel.category
+
+        channel = await self.claim_pooled_room(guild, interaction.user)
+        if channel is None:
+            channel = await guild.create_text_channel(
+                f"room-{uuid.uuid4()}",
+                category=chat_category,
+                overwrites=self.build_overwrites(guild, interaction.user)
+            )
+
+        # Add the session to the database
+        await self.sessions.create_session(SessionSchema(owner_id=interaction.user.id, discord_channel_id=channel.id))
+        return channel
+
+    def get_pool_category(self, guild: discord.Guild) -> Optional[discord.CategoryChannel]:
+        """Returns the chat category if it belongs to the guild, pooled rooms are only kept there."""
+        category = guild.get_channel(self.config.chat_category)
+        return category if isinstance(category, discord.CategoryChannel) else None
+
+    async def claim_pooled_room(self, guild: discord.Guild, member: Union[discord.Member, discord.User]) -> Optional[discord.TextChannel]:
+        """Claims a room from the warm pool for the user and refills the pool, if the pool is enabled."""
+        category = self.get_pool_category(guild)
+        if not self.pool.enabled or category is None:
+            return None
+        channel = await self.pool.claim(guild, member)
+        self.refill_pool(category)
+        return channel
+
+    def refill_pool(self, category: discord.CategoryChannel) -> None:
+        """Refills the warm pool of the category in the background."""
+        self.pool.schedule_refill(category, self.build_overwrites(category.guild))
+
+    async def welcome(self, channel: discord.TextChannel, user: Union[discord.Member, discord.User]) -> discord.Message:
+        """Sends the welcome message with the control view in a new room."""
+        embed_schema = EmbedSchema(
+            description="*Keep in mind the bot's using a reversed API and it might fail sometimes, if that's the case, retry or try later.*",
+            color=0x00ff00
+        )
+        embed = await EmbedController().build_embed(embed_schema)
+        return await channel.send(content=f"Hey {user.mention}! Welcome to your room!", embed=embed, view=ControlView())
+
+    async def open_room(self, interaction: discord.Interaction) -> discord.TextChannel:
+        """
+        Creates a room for a deferred interaction, then welcomes the user in it and answers
+        the interaction concurrently.
+        """
+        with self.metrics.timer("room_creation_seconds"):
+            channel = await self.create_room(interaction)
+            await asyncio.gather(
+                self.welcome(channel, interaction.user),
+                interaction.followup.send(f"Your room has been created! You can access it at <#{channel.id}>.", ephemeral=True)
+            )
+        return channel
@@ -0,0 +1,107 @@
+import uuid, asyncio, discord
+from loguru import logger
+from typing import Dict, List, Optional, Union
+from src.helper.config import Config
+from src.controller.discord.rest_scheduler import RestScheduler
+from src.database.controller.sessions import SessionsController
+
+class RoomPool:
+    """
+    Warm pool of pre-created, hidden room channels.
+
+    Up to `room_pool_size` channels per guild are created ahead of time in the chat category,
+    visible to nobody but the bot. Claiming one for a user only costs a single permission
+    overwrite instead of a channel creation, which is what Discord rate-limits the hardest.
+    The pool is refilled in the background, one channel every few seconds, as background jobs
+    of the REST scheduler.
+    """
+    _instance = None
+    _create_interval = 2.0
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.sessions = SessionsController()
+            self._channels: Dict[int, List[int]] = {}
+            self._refills: Dict[int, asyncio.Task] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.room_pool_size > 0
+
+    def size(self, guild_id: int) -> int:
+        """Returns the number of pooled channels of a guild."""
+        return len(self._channels.get(guild_id, []))
+
+    def adopt(self, category: discord.CategoryChannel) -> int:
+        """
+        Adds the pooled channels left over by a previous run to the pool.
+
+        Room channels of the category without a session and without a member overwrite (besides
+        the bot's) were never handed out, channels that belonged to a user are left alone.
+
+        Returns:
+            int: The number of adopted channels.
+        """
+        pooled = self._channels.setdefault(category.guild.id, [])
+        adopted = 0
+        for channel in category.text_channels:
+            if not channel.name.startswith("room-") or channel.id in pooled or self.sessions.is_session_channel(channel.id):
+                continue
+            if any(not isinstance(target, discord.Role) and target.id != category.guild.me.id for target in channel.overwrites):
+                continue
+            pooled.append(channel.id)
+            adopted += 1
+        if adopted:
+            logger.info(f"Adopted {adopted} pooled room channel(s) in guild {category.guild.id}.")
+        return adopted
+
+    async def claim(self, guild: discord.Guild, member: Union[discord.Member, discord.User]) -> Optional[discord.TextChannel]:
+        """
+        Hands a pooled channel out to a user by letting them see it.
+
+        Returns:
+            discord.TextChannel or None: The channel, or None if the pool of the guild is empty.
+        """
+        pooled = self._channels.get(guild.id, [])
+        while pooled:
+            channel = guild.get_channel(pooled.pop(0))
+            if channel is None:
+                continue
+            try:
+                await channel.set_permissions(member, read_messages=True, send_messages=True)
+                return channel
+            except discord.HTTPException as e:
+                logger.warning(f"Failed to claim pooled room channel {channel.id}: {e}")
+        return None
+
+    def schedule_refill(self, category: discord.CategoryChannel, overwrites: dict) -> None:
+        """Refills the pool of the category's guild in the background, unless it's already being refilled."""
+        guild_id = category.guild.id
+        if not self.enabled or (guild_id in self._refills and not self._refills[guild_id].done()):
+            return
+        self._refills[guild_id] = asyncio.get_running_loop().create_task(self._refill(category, overwrites))
+
+    async def _refill(self, category: discord.CategoryChannel, overwrites: dict) -> None:
+        """Creates pooled channels until the pool is full, spaced out to stay within the rate limits."""
+        pooled = self._channels.setdefault(category.guild.id, [])
+        try:
+            while len(pooled) < self.config.room_pool_size:
+                async with RestScheduler().background("room_pool"):
+                    channel = await category.guild.create_text_channel(f"room-{uuid.uuid4()}", category=category, overwrites=overwrites)
+                pooled.append(channel.id)
+                await asyncio.sleep(self._create_interval)
+        except discord.HTTPException as e:
+            logger.error(f"Failed to refill the room pool of guild {category.guild.id}: {e}")
+
+    def cancel(self) -> None:
+        """Cancels the running refills."""
+        for task in self._refills.values():
+            task.cancel()
@@ -0,0 +1,79 @@
+import time, discord
+from loguru import logger
+from src.helper.config import Config
+from src.helper.metrics import Metrics
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+class StreamRenderer:
+    """
+    Renders a streamed model response by progressively editing a Discord message.
+
+    The first chunk is sent right away, later chunks are coalesced into at most one edit per
+    `stream_edit_interval` seconds, which keeps the bot within Discord's per-channel edit rate
+    limits. Responses longer than a message can hold continue in a new message.
+
+    Attributes:
+        send (Callable): Coroutine function used to send a new message with the given content.
+        message (discord.Message): The message being edited, if any.
+        edit_interval (float): Minimum number of seconds between two edits of the same message.
+    """
+
+    MAX_LENGTH = 2000
+
+    def __init__(self, send: Callable[[str], Awaitable[discord.Message]], message: Optional[discord.Message] = None) -> None:
+        self.send = send
+        self.message = message
+        self.edit_interval = Config().stream_edit_interval
+        self.metrics = Metrics()
+        self._rendered = ""
+        self._last_edit = 0.0
+
+    async def render(self, chunks: AsyncIterator[str]) -> str:
+        """
+        Consumes the stream and keeps the Discord message(s) up to date.
+
+        Args:
+            chunks (AsyncIterator[str]): The streamed response chunks.
+
+        Returns:
+            str: The full response.
+        """
+        response = ""
+        pending = ""
+        async for chunk in chunks:
+            response += chunk
+            pending += chunk
+
+            # Move on to a new message once the current one is full
+            while len(pending) > self.MAX_LENGTH:
+                split = pending.rfind("\n", 0, self.MAX_LENGTH)
+                split = split if split > 0 else self.MAX_LENGTH
+                await self._show(pending[:split], force=True)
+                self.message = None
+                self._rendered = ""
+                pending = pending[split:].lstrip("\n")
+
+            await self._show(pending)
+
+        await self._show(pending, force=True)
+        return response
+
+    async def _show(self, content: str, force: bool = False) -> None:
+        """Sends or edits the current message, skipping edits that come too soon after the last one."""
+        if not content.strip() or content == self._rendered:
+            return
+
+        now = time.monotonic()
+        if self.message is not None and not force and now - self._last_edit < self.edit_interval:
+            return
+
+        try:
+            with self.metrics.timer("prompt_stage_seconds", stage="discord_send"):
+                if self.message is None:
+                    self.message = await self.send(content)
+                else:
+                    await self.message.edit(content=content)
+            self._rendered = content
+            self._last_edit = now
+        except discord.HTTPException as e:
+            logger.error(f"Failed to render streamed response: {e}")
@@ -0,0 +1,192 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+from src.helper.config import Config
+from src.database.schema.sessions import SessionSchema
+
+# (session_id, role, stored content)
+StoredMessage = Tuple[int, str, object]
+# (owner_id, discord_channel_id, last_used)
+SessionTouch = Tuple[int, int, str]
+
+class StorageBackend(ABC):
+    """
+    Interface of the store behind the sessions controller, the write buffer, the message codec
+    and the retention engine.
+
+    Timestamps are exchanged as UTC strings in SQLite's CURRENT_TIMESTAMP format and message
+    contents as stored by the message codec, whatever the backend stores them as. Besides
+    storage, a backend coordinates the bot processes sharing it: named locks are held by one
+    process at a time and events published by a process reach the listeners of the others.
+    A backend that isn't `shared` has a single process, so every lock is granted to it and
+    events have nobody to reach, which is what the non-abstract methods default to. A backend
+    missing an abstract method fails when it's created.
+    """
+    name = "base"
+    shared = False
+
+    @property
+    @abstractmethod
+    def is_open(self) -> bool:
+        ...
+
+    @abstractmethod
+    async def open(self) -> None:
+        """Opens the connections to the store."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Closes the connections to the store, releasing the held locks."""
+
+    @abstractmethod
+    async def migrate(self) -> None:
+        """Creates the tables and brings the schema up to date."""
+
+    # [SESSIONS]
+
+    @abstractmethod
+    async def get_sessions(self) -> List[SessionSchema]:
+        ...
+
+    @abstractmethod
+    async def get_recent_sessions(self) -> List[SessionSchema]:
+        """Returns the sessions used within the last day."""
+
+    @abstractmethod
+    async def fetch_session(self, owner_id: int) -> Optional[SessionSchema]:
+        ...
+
+    @abstractmethod
+    async def insert_session(self, owner_id: int, discord_channel_id: int, last_used: str) -> int:
+        """Stores a new session and returns its ID."""
+
+    @abstractmethod
+    async def delete_session(self, owner_id: int) -> None:
+        ...
+
+    @abstractmethod
+    async def delete_expired_sessions(self, session_ids: List[int], cutoff: str) -> List[int]:
+        """
+        Deletes the given sessions that weren't used since the cutoff, and only those.
+
+        Returns:
+            list: The IDs of the deleted sessions.
+        """
+
+    # [MESSAGES]
+
+    @abstractmethod
+    async def write_batch(self, messages: List[StoredMessage], touches: List[SessionTouch]) -> None:
+        """Inserts messages and updates the `last_used` of sessions in a single transaction."""
+
+    @abstractmethod
+    async def get_messages(self, session_id: int) -> List[Tuple[str, object]]:
+        """Returns the roles and stored contents of every message of a session, oldest first."""
+
+    @abstractmethod
+    async def get_recent_messages(self, session_id: int, limit: int) -> List[Tuple[str, object]]:
+        """Returns the roles and stored contents of the newest messages of a session that aren't archived, oldest first."""
+
+    @abstractmethod
+    async def count_active_messages(self, session_id: int) -> int:
+        ...
+
+    @abstractmethod
+    async def get_oldest_active_messages(self, session_id: int, limit: int) -> List[Tuple[int, str, object]]:
+        """Returns the IDs, roles and stored contents of the oldest messages of a session that aren't archived."""
+
+    @abstractmethod
+    async def get_summary(self, session_id: int) -> Optional[object]:
+        """Returns the stored summary of a session, if any."""
+
+    @abstractmethod
+    async def archive_messages(self, session_id: int, summary, updated_at: str, last_message_id: int) -> None:
+        """Replaces the stored summary of a session and archives its messages up to the given ID, in one transaction."""
+
+    # [MESSAGE CODEC]
+
+    @abstractmethod
+    async def get_dictionaries(self) -> List[Tuple[int, bytes]]:
+        ...
+
+    @abstractmethod
+    async def add_dictionary(self, data: bytes) -> int:
+        """Stores a codec dictionary and returns its ID."""
+
+    @abstractmethod
+    async def get_message_samples(self, limit: int) -> List[object]:
+        """Returns the stored contents of the newest messages."""
+
+    async def get_legacy_messages(self, after_id: int, limit: int) -> List[Tuple[int, str]]:
+        """Returns the messages still stored in the legacy base64 gzip format, in ID order."""
+        return []
+
+    async def update_legacy_messages(self, updates: List[Tuple[object, int]]) -> None:
+        """Rewrites legacy messages that weren't deleted or rewritten in the meantime."""
+        return None
+
+    # [RETENTION]
+
+    @abstractmethod
+    async def get_orphaned_session_ids(self) -> List[int]:
+        """Returns the IDs of deleted sessions that still have messages."""
+
+    @abstractmethod
+    async def delete_session_messages(self, session_id: int, limit: int) -> int:
+        ...
+
+    @abstractmethod
+    async def delete_orphaned_summaries(self) -> None:
+        ...
+
+    @abstractmethod
+    async def delete_messages_older_than(self, days: int, limit: int) -> int:
+        """Deletes up to `limit` messages older than the given number of days, oldest first."""
+
+    @abstractmethod
+    async def get_excess_message_counts(self, cap: int) -> Dict[int, int]:
+        """Returns how many messages each session has over the cap, for the sessions over it."""
+
+    @abstractmethod
+    async def delete_oldest_messages(self, session_id: int, limit: int) -> int:
+        ...
+
+    async def vacuum(self, pages: int) -> None:
+        """Returns up to `pages` free pages to the file system, if the store needs to be told."""
+        return None
+
+    # [COORDINATION]
+
+    async def try_lock(self, name: str) -> bool:
+        """
+        Acquires a named lock for this process without waiting.
+
+        The lock is held until it's released or this process disconnects from the store.
+
+        Returns:
+            bool: Whether this process holds the lock.
+        """
+        return True
+
+    async def unlock(self, name: str) -> None:
+        return None
+
+    async def notify(self, payload: str) -> None:
+        """Publishes an event payload to the other processes."""
+        return None
+
+    async def listen(self, callback: Callable[[str], None]) -> None:
+        """Calls back with the payload of every event published by a process."""
+        return None
+
+    def on_reconnect(self, callback: Callable[[], None]) -> None:
+        """Calls back once events come in again after a lost connection, the events published meanwhile being lost."""
+        return None
+
+def get_backend() -> StorageBackend:
+    """Returns the configured storage backend: PostgreSQL if `database_url` is set, the local SQLite file otherwise."""
+    if Config().database_url:
+        from src.database.backend.postgres import PostgresBackend
+        return PostgresBackend()
+
+    from src.database.backend.sqlite import SQLiteBackend
+    return SQLiteBackend()
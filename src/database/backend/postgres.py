@@ -0,0 +1,369 @@
+import asyncio
+from loguru import logger
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from src.helper.config import Config
+from src.database.schema.sessions import SessionSchema
+from src.database.backend.base import StorageBackend, StoredMessage, SessionTouch
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+_UTC_NOW = "(now() AT TIME ZONE 'utc')"
+
+class PostgresBackend(StorageBackend):
+    """
+    Storage backend on a PostgreSQL database shared by several bot processes.
+
+    Queries run on an asyncpg connection pool. Locks are session-level advisory locks held on a
+    dedicated connection, so they're released by the server as soon as the process holding
+    them disconnects, and events are sent with NOTIFY and received with LISTEN on that same
+    connection.
+
+    Like with SQLite, `chat_messages.session_id` has no enforced foreign key: buffered messages
+    of a session deleted in the meantime are still written, and cleaned up by the retention engine.
+    """
+    _instance = None
+    _channel = "gpt_discord_events"
+    _reconnect_delay = 5
+    name = "postgres"
+    shared = True
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self._pool = None
+            self._connection = None
+            self._connection_lock = asyncio.Lock()
+            self._locks: Set[str] = set()
+            self._listeners: List[Callable[[str], None]] = []
+            self._reconnect_callbacks: List[Callable[[], None]] = []
+
+    @property
+    def is_open(self) -> bool:
+        return self._pool is not None
+
+    @staticmethod
+    def _to_timestamp(value: Optional[str]) -> Optional[datetime]:
+        return datetime.strptime(value, _TIMESTAMP_FORMAT) if value else None
+
+    @staticmethod
+    def _from_timestamp(value: Optional[datetime]) -> Optional[str]:
+        return value.strftime(_TIMESTAMP_FORMAT) if value is not None else None
+
+    def _session(self, row) -> SessionSchema:
+        return SessionSchema(
+            id=row['id'],
+            owner_id=row['owner_id'],
+            discord_channel_id=row['discord_channel_id'],
+            last_used=self._from_timestamp(row['last_used'])
+        )
+
+    @staticmethod
+    def _count(status: str) -> int:
+        """Returns the row count of a command status such as `DELETE 42`."""
+        try:
+            return int(status.split()[-1])
+        except (AttributeError, IndexError, ValueError):
+            return 0
+
+    async def open(self) -> None:
+        if self.is_open:
+            return
+        if asyncpg is None:
+            raise RuntimeError("DATABASE_URL is set but asyncpg isn't installed.")
+
+        self._pool = await asyncpg.create_pool(
+            self.config.database_url,
+            min_size=1,
+            max_size=max(1, self.config.db_readers) + 1
+        )
+        logger.debug("Opened PostgreSQL connection pool.")
+
+    async def close(self) -> None:
+        if not self.is_open:
+            return
+
+        async with self._connection_lock:
+            connection, self._connection = self._connection, None
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+            self._locks.clear()
+        await self._pool.close()
+        self._pool = None
+        logger.debug("Closed PostgreSQL connection pool.")
+
+    async def migrate(self) -> None:
+        async with self._pool.acquire() as db:
+            async with db.transaction():
+                # Processes starting together would race on CREATE ... IF NOT EXISTS
+                await db.execute("SELECT pg_advisory_xact_lock(hashtext('schema'));")
+                await db.execute(f'''
+                    CREATE TABLE IF NOT EXISTS ssh_sessions (
+                        id BIGSERIAL PRIMARY KEY,
+                        owner_id BIGINT NOT NULL UNIQUE,
+                        discord_channel_id BIGINT NOT NULL UNIQUE,
+                        last_used TIMESTAMP NOT NULL DEFAULT {_UTC_NOW}
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_ssh_sessions_last_used ON ssh_sessions (last_used);
+
+                    CREATE TABLE IF NOT EXISTS chat_messages (
+                        id BIGSERIAL PRIMARY KEY,
+                        session_id BIGINT,
+                        message_role TEXT,
+                        message_content BYTEA,
+                        timestamp TIMESTAMP NOT NULL DEFAULT {_UTC_NOW},
+                        archived BOOLEAN NOT NULL DEFAULT FALSE
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages (session_id, id);
+                    CREATE INDEX IF NOT EXISTS idx_chat_messages_active ON chat_messages (session_id, id) WHERE NOT archived;
+
+                    CREATE TABLE IF NOT EXISTS session_summaries (
+                        session_id BIGINT PRIMARY KEY,
+                        summary BYTEA NOT NULL,
+                        updated_at TIMESTAMP NOT NULL DEFAULT {_UTC_NOW}
+                    );
+
+                    CREATE TABLE IF NOT EXISTS message_codec_dictionaries (
+                        id SERIAL PRIMARY KEY,
+                        data BYTEA NOT NULL,
+                        created_at TIMESTAMP NOT NULL DEFAULT {_UTC_NOW}
+                    );
+                ''')
+
+    # [SESSIONS]
+
+    async def get_sessions(self) -> List[SessionSchema]:
+        rows = await self._pool.fetch('SELECT * FROM ssh_sessions;')
+        return [self._session(row) for row in rows]
+
+    async def get_recent_sessions(self) -> List[SessionSchema]:
+        rows = await self._pool.fetch(f"SELECT * FROM ssh_sessions WHERE last_used > {_UTC_NOW} - INTERVAL '1 day';")
+        return [self._session(row) for row in rows]
+
+    async def fetch_session(self, owner_id: int) -> Optional[SessionSchema]:
+        row = await self._pool.fetchrow('SELECT * FROM ssh_sessions WHERE owner_id = $1;', owner_id)
+        return self._session(row) if row is not None else None
+
+    async def insert_session(self, owner_id: int, discord_channel_id: int, last_used: str) -> int:
+        return await self._pool.fetchval('''
+            INSERT INTO ssh_sessions (owner_id, discord_channel_id, last_used)
+            VALUES ($1, $2, $3) RETURNING id;
+        ''', owner_id, discord_channel_id, self._to_timestamp(last_used))
+
+    async def delete_session(self, owner_id: int) -> None:
+        await self._pool.execute('DELETE FROM ssh_sessions WHERE owner_id = $1;', owner_id)
+
+    async def delete_expired_sessions(self, session_ids: List[int], cutoff: str) -> List[int]:
+        rows = await self._pool.fetch('''
+            DELETE FROM ssh_sessions WHERE id = ANY($1::BIGINT[]) AND last_used <= $2 RETURNING id;
+        ''', session_ids, self._to_timestamp(cutoff))
+        return [row['id'] for row in rows]
+
+    # [MESSAGES]
+
+    async def write_batch(self, messages: List[StoredMessage], touches: List[SessionTouch]) -> None:
+        async with self._pool.acquire() as db:
+            async with db.transaction():
+                if messages:
+                    await db.executemany('''
+                        INSERT INTO chat_messages (session_id, message_role, message_content)
+                        VALUES ($1, $2, $3);
+                    ''', messages)
+                if touches:
+                    await db.executemany('''
+                        UPDATE ssh_sessions
+                        SET discord_channel_id = $1, last_used = $2
+                        WHERE owner_id = $3;
+                    ''', [(channel_id, self._to_timestamp(last_used), owner_id) for owner_id, channel_id, last_used in touches])
+
+    async def get_messages(self, session_id: int) -> List[Tuple[str, object]]:
+        rows = await self._pool.fetch('''
+            SELECT message_role, message_content FROM chat_messages
+            WHERE session_id = $1 ORDER BY id;
+        ''', session_id)
+        return [(row[0], row[1]) for row in rows]
+
+    async def get_recent_messages(self, session_id: int, limit: int) -> List[Tuple[str, object]]:
+        rows = await self._pool.fetch('''
+            SELECT message_role, message_content FROM chat_messages
+            WHERE session_id = $1 AND NOT archived ORDER BY id DESC LIMIT $2;
+        ''', session_id, limit)
+        return [(row[0], row[1]) for row in reversed(rows)]
+
+    async def count_active_messages(self, session_id: int) -> int:
+        return await self._pool.fetchval('''
+            SELECT COUNT(*) FROM chat_messages WHERE session_id = $1 AND NOT archived;
+        ''', session_id)
+
+    async def get_oldest_active_messages(self, session_id: int, limit: int) -> List[Tuple[int, str, object]]:
+        rows = await self._pool.fetch('''
+            SELECT id, message_role, message_content FROM chat_messages
+            WHERE session_id = $1 AND NOT archived ORDER BY id LIMIT $2;
+        ''', session_id, limit)
+        return [(row[0], row[1], row[2]) for row in rows]
+
+    async def get_summary(self, session_id: int) -> Optional[object]:
+        return await self._pool.fetchval('SELECT summary FROM session_summaries WHERE session_id = $1;', session_id)
+
+    async def archive_messages(self, session_id: int, summary, updated_at: str, last_message_id: int) -> None:
+        async with self._pool.acquire() as db:
+            async with db.transaction():
+                await db.execute('''
+                    INSERT INTO session_summaries (session_id, summary, updated_at) VALUES ($1, $2, $3)
+                    ON CONFLICT (session_id) DO UPDATE SET summary = excluded.summary, updated_at = excluded.updated_at;
+                ''', session_id, summary, self._to_timestamp(updated_at))
+                await db.execute('''
+                    UPDATE chat_messages SET archived = TRUE
+                    WHERE session_id = $1 AND id <= $2 AND NOT archived;
+                ''', session_id, last_message_id)
+
+    # [MESSAGE CODEC]
+
+    async def get_dictionaries(self) -> List[Tuple[int, bytes]]:
+        rows = await self._pool.fetch('SELECT id, data FROM message_codec_dictionaries ORDER BY id;')
+        return [(row[0], row[1]) for row in rows]
+
+    async def add_dictionary(self, data: bytes) -> int:
+        return await self._pool.fetchval('INSERT INTO message_codec_dictionaries (data) VALUES ($1) RETURNING id;', data)
+
+    async def get_message_samples(self, limit: int) -> List[object]:
+        rows = await self._pool.fetch('SELECT message_content FROM chat_messages ORDER BY id DESC LIMIT $1;', limit)
+        return [row[0] for row in rows]
+
+    # [RETENTION]
+
+    async def get_orphaned_session_ids(self) -> List[int]:
+        rows = await self._pool.fetch('''
+            SELECT DISTINCT m.session_id FROM chat_messages m
+            WHERE m.session_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM ssh_sessions s WHERE s.id = m.session_id);
+        ''')
+        return [row[0] for row in rows]
+
+    async def delete_session_messages(self, session_id: int, limit: int) -> int:
+        return self._count(await self._pool.execute('''
+            DELETE FROM chat_messages WHERE id IN (
+                SELECT id FROM chat_messages WHERE session_id = $1 LIMIT $2
+            );
+        ''', session_id, limit))
+
+    async def delete_orphaned_summaries(self) -> None:
+        await self._pool.execute('''
+            DELETE FROM session_summaries su
+            WHERE NOT EXISTS (SELECT 1 FROM ssh_sessions s WHERE s.id = su.session_id);
+        ''')
+
+    async def delete_messages_older_than(self, days: int, limit: int) -> int:
+        return self._count(await self._pool.execute(f'''
+            DELETE FROM chat_messages WHERE id IN (
+                SELECT id FROM chat_messages WHERE timestamp < {_UTC_NOW} - make_interval(days => $1) ORDER BY id LIMIT $2
+            );
+        ''', int(days), limit))
+
+    async def get_excess_message_counts(self, cap: int) -> Dict[int, int]:
+        rows = await self._pool.fetch('''
+            SELECT session_id, COUNT(*) FROM chat_messages
+            WHERE session_id IS NOT NULL
+            GROUP BY session_id HAVING COUNT(*) > $1;
+        ''', cap)
+        return {row[0]: row[1] - cap for row in rows}
+
+    async def delete_oldest_messages(self, session_id: int, limit: int) -> int:
+        return self._count(await self._pool.execute('''
+            DELETE FROM chat_messages WHERE id IN (
+                SELECT id FROM chat_messages WHERE session_id = $1 ORDER BY id LIMIT $2
+            );
+        ''', session_id, limit))
+
+    # Freed space is reclaimed by the server's autovacuum, `vacuum` is left a no-op
+
+    # [COORDINATION]
+
+    async def _get_connection(self):
+        """
+        Returns the dedicated connection of the locks and listeners, reconnecting if it was lost.
+
+        Locks held on a lost connection were released by the server, so they're forgotten, and
+        the listeners are registered again on the new connection. NOTIFY is at-most-once, the
+        events published while the connection was down are lost, so the reconnect callbacks are
+        called once the listeners are back.
+        """
+        if self._connection is None or self._connection.is_closed():
+            reconnecting = self._connection is not None
+            if reconnecting:
+                logger.warning("Lost the PostgreSQL coordination connection, reconnecting...")
+            self._locks.clear()
+            self._connection = await asyncpg.connect(self.config.database_url)
+            self._connection.add_termination_listener(self._on_termination)
+            if self._listeners:
+                await self._connection.add_listener(self._channel, self._on_notification)
+                if reconnecting:
+                    for callback in self._reconnect_callbacks:
+                        try:
+                            callback()
+                        except Exception as e:
+                            logger.error(f"Error handling the PostgreSQL reconnection: {e}")
+        return self._connection
+
+    def _on_termination(self, connection) -> None:
+        # Connections closed on purpose were already swapped out
+        if connection is self._connection and self.is_open:
+            asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        """Reconnects the lost coordination connection, so events keep coming in."""
+        while self.is_open:
+            try:
+                async with self._connection_lock:
+                    if self.is_open:
+                        await self._get_connection()
+                return
+            except Exception as e:
+                logger.error(f"Error reconnecting the PostgreSQL coordination connection: {e}")
+                await asyncio.sleep(self._reconnect_delay)
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        for callback in self._listeners:
+            callback(payload)
+
+    async def try_lock(self, name: str) -> bool:
+        async with self._connection_lock:
+            if name in self._locks and self._connection is not None and not self._connection.is_closed():
+                return True
+            connection = await self._get_connection()
+            # Advisory locks stack, so a held lock is only taken once
+            if await connection.fetchval('SELECT pg_try_advisory_lock(hashtext($1));', name):
+                self._locks.add(name)
+                return True
+            return False
+
+    async def unlock(self, name: str) -> None:
+        async with self._connection_lock:
+            if name not in self._locks:
+                return
+            self._locks.discard(name)
+            if self._connection is not None and not self._connection.is_closed():
+                await self._connection.execute('SELECT pg_advisory_unlock(hashtext($1));', name)
+
+    async def notify(self, payload: str) -> None:
+        await self._pool.execute('SELECT pg_notify($1, $2);', self._channel, payload)
+
+    async def listen(self, callback: Callable[[str], None]) -> None:
+        async with self._connection_lock:
+            connection = await self._get_connection()
+            if not self._listeners:
+                await connection.add_listener(self._channel, self._on_notification)
+            self._listeners.append(callback)
+
+    def on_reconnect(self, callback: Callable[[], None]) -> None:
+        self._reconnect_callbacks.append(callback)
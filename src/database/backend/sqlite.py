@@ -0,0 +1,287 @@
+from loguru import logger
+from typing import Dict, List, Optional, Tuple
+from src.database.pool import ConnectionPool
+from src.database.migrations import MigrationRunner
+from src.database.schema.sessions import SessionSchema
+from src.database.backend.base import StorageBackend, StoredMessage, SessionTouch
+
+class SQLiteBackend(StorageBackend):
+    """
+    Storage backend on the local SQLite file, through the connection pool.
+
+    The file can't be shared between processes, so a single bot process runs on it.
+    """
+    _instance = None
+    name = "sqlite"
+    shared = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.db_path = 'src/database/storage/sessions.sqlite'
+            self.pool = ConnectionPool()
+
+    @property
+    def is_open(self) -> bool:
+        return self.pool.is_open
+
+    async def open(self) -> None:
+        await self.pool.open(self.db_path)
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    async def migrate(self) -> None:
+        async with self.pool.writer() as db:
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS ssh_sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    owner_id INTEGER NOT NULL,
+                    discord_channel_id INTEGER NOT NULL,
+                    last_used TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+            ''')
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS chat_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id INTEGER,
+                    message_role TEXT,
+                    message_content TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (session_id) REFERENCES ssh_sessions(id)
+                );
+            ''')
+        await MigrationRunner().run()
+
+    # [SESSIONS]
+
+    async def get_sessions(self) -> List[SessionSchema]:
+        async with self.pool.reader() as db:
+            cursor = await db.execute('SELECT * FROM ssh_sessions;')
+            rows = await cursor.fetchall()
+        return [SessionSchema.deserialize(row) for row in rows]
+
+    async def get_recent_sessions(self) -> List[SessionSchema]:
+        async with self.pool.reader() as db:
+            cursor = await db.execute('''
+                SELECT * FROM ssh_sessions WHERE last_used > datetime('now', '-1 day');
+            ''')
+            rows = await cursor.fetchall()
+        return [SessionSchema.deserialize(row) for row in rows]
+
+    async def fetch_session(self, owner_id: int) -> Optional[SessionSchema]:
+        async with self.pool.reader() as db:
+            async with db.execute('''
+                SELECT * FROM ssh_sessions WHERE owner_id = ?;
+            ''', (owner_id,)) as cursor:
+                row = await cursor.fetchone()
+        return SessionSchema.deserialize(row) if row is not None else None
+
+    async def insert_session(self, owner_id: int, discord_channel_id: int, last_used: str) -> int:
+        async with self.pool.writer() as db:
+            cursor = await db.execute('''
+                INSERT INTO ssh_sessions (owner_id, discord_channel_id, last_used)
+                VALUES (?, ?, ?);
+            ''', (owner_id, discord_channel_id, last_used))
+        return cursor.lastrowid
+
+    async def delete_session(self, owner_id: int) -> None:
+        async with self.pool.writer() as db:
+            await db.execute('DELETE FROM ssh_sessions WHERE owner_id = ?;', (owner_id,))
+
+    async def delete_expired_sessions(self, session_ids: List[int], cutoff: str) -> List[int]:
+        deleted = []
+        async with self.pool.writer() as db:
+            for session_id in session_ids:
+                cursor = await db.execute('''
+                    DELETE FROM ssh_sessions WHERE id = ? AND last_used <= ?;
+                ''', (session_id, cutoff))
+                if cursor.rowcount:
+                    deleted.append(session_id)
+        return deleted
+
+    # [MESSAGES]
+
+    async def write_batch(self, messages: List[StoredMessage], touches: List[SessionTouch]) -> None:
+        async with self.pool.writer() as db:
+            if messages:
+                await db.executemany('''
+                    INSERT INTO chat_messages (session_id, message_role, message_content)
+                    VALUES (?, ?, ?);
+                ''', messages)
+            if touches:
+                await db.executemany('''
+                    UPDATE ssh_sessions
+                    SET discord_channel_id = ?, last_used = ?
+                    WHERE owner_id = ?;
+                ''', [(channel_id, last_used, owner_id) for owner_id, channel_id, last_used in touches])
+
+    async def get_messages(self, session_id: int) -> List[Tuple[str, object]]:
+        async with self.pool.reader() as db:
+            cursor = await db.execute('''
+                SELECT message_role, message_content FROM chat_messages
+                WHERE session_id = ? ORDER BY id;
+            ''', (session_id,))
+            rows = await cursor.fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    async def get_recent_messages(self, session_id: int, limit: int) -> List[Tuple[str, object]]:
+        async with self.pool.reader() as db:
+            cursor = await db.execute('''
+                SELECT message_role, message_content FROM chat_messages
+                WHERE session_id = ? AND archived = 0 ORDER BY id DESC LIMIT ?;
+            ''', (session_id, limit))
+            rows = await cursor.fetchall()
+        return [(row[0], row[1]) for row in reversed(rows)]
+
+    async def count_active_messages(self, session_id: int) -> int:
+        async with self.pool.reader() as db:
+            async with db.execute('''
+                SELECT COUNT(*) FROM chat_messages WHERE session_id = ? AND archived = 0;
+            ''', (session_id,)) as cursor:
+                row = await cursor.fetchone()
+        return row[0]
+
+    async def get_oldest_active_messages(self, session_id: int, limit: int) -> List[Tuple[int, str, object]]:
+        async with self.pool.reader() as db:
+            async with db.execute('''
+                SELECT id, message_role, message_content FROM chat_messages
+                WHERE session_id = ? AND archived = 0 ORDER BY id LIMIT ?;
+            ''', (session_id, limit)) as cursor:
+                rows = await cursor.fetchall()
+        return [(row[0], row[1], row[2]) for row in rows]
+
+    async def get_summary(self, session_id: int) -> Optional[object]:
+        async with self.pool.reader() as db:
+            async with db.execute('''
+                SELECT summary FROM session_summaries WHERE session_id = ?;
+            ''', (session_id,)) as cursor:
+                row = await cursor.fetchone()
+        return row[0] if row is not None else None
+
+    async def archive_messages(self, session_id: int, summary, updated_at: str, last_message_id: int) -> None:
+        async with self.pool.writer() as db:
+            await db.execute('''
+                INSERT INTO session_summaries (session_id, summary, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET summary = excluded.summary, updated_at = excluded.updated_at;
+            ''', (session_id, summary, updated_at))
+            await db.execute('''
+                UPDATE chat_messages SET archived = 1
+                WHERE session_id = ? AND id <= ? AND archived = 0;
+            ''', (session_id, last_message_id))
+
+    # [MESSAGE CODEC]
+
+    async def get_dictionaries(self) -> List[Tuple[int, bytes]]:
+        async with self.pool.reader() as db:
+            async with db.execute('SELECT id, data FROM message_codec_dictionaries ORDER BY id;') as cursor:
+                rows = await cursor.fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    async def add_dictionary(self, data: bytes) -> int:
+        async with self.pool.writer() as db:
+            cursor = await db.execute('INSERT INTO message_codec_dictionaries (data) VALUES (?);', (data,))
+        return cursor.lastrowid
+
+    async def get_message_samples(self, limit: int) -> List[object]:
+        async with self.pool.reader() as db:
+            async with db.execute('''
+                SELECT message_content FROM chat_messages ORDER BY id DESC LIMIT ?;
+            ''', (limit,)) as cursor:
+                rows = await cursor.fetchall()
+        return [row[0] for row in rows]
+
+    async def get_legacy_messages(self, after_id: int, limit: int) -> List[Tuple[int, str]]:
+        async with self.pool.reader() as db:
+            async with db.execute('''
+                SELECT id, message_content FROM chat_messages
+                WHERE id > ? AND typeof(message_content) = 'text'
+                ORDER BY id LIMIT ?;
+            ''', (after_id, limit)) as cursor:
+                rows = await cursor.fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    async def update_legacy_messages(self, updates: List[Tuple[object, int]]) -> None:
+        async with self.pool.writer() as db:
+            await db.executemany('''
+                UPDATE chat_messages SET message_content = ?
+                WHERE id = ? AND typeof(message_content) = 'text';
+            ''', updates)
+
+    # [RETENTION]
+
+    async def get_orphaned_session_ids(self) -> List[int]:
+        async with self.pool.reader() as db:
+            async with db.execute('''
+                SELECT DISTINCT session_id FROM chat_messages
+                WHERE session_id NOT IN (SELECT id FROM ssh_sessions);
+            ''') as cursor:
+                rows = await cursor.fetchall()
+        return [row[0] for row in rows if row[0] is not None]
+
+    async def delete_session_messages(self, session_id: int, limit: int) -> int:
+        async with self.pool.writer() as db:
+            cursor = await db.execute('''
+                DELETE FROM chat_messages WHERE id IN (
+                    SELECT id FROM chat_messages WHERE session_id = ? LIMIT ?
+                );
+            ''', (session_id, limit))
+        return cursor.rowcount
+
+    async def delete_orphaned_summaries(self) -> None:
+        async with self.pool.writer() as db:
+            await db.execute('DELETE FROM session_summaries WHERE session_id NOT IN (SELECT id FROM ssh_sessions);')
+
+    async def delete_messages_older_than(self, days: int, limit: int) -> int:
+        # Old rows come first in ID order, so each batch stops scanning right after the rows it deletes
+        async with self.pool.writer() as db:
+            cursor = await db.execute('''
+                DELETE FROM chat_messages WHERE id IN (
+                    SELECT id FROM chat_messages WHERE timestamp < datetime('now', ?) ORDER BY id LIMIT ?
+                );
+            ''', (f'-{int(days)} days', limit))
+        return cursor.rowcount
+
+    async def get_excess_message_counts(self, cap: int) -> Dict[int, int]:
+        async with self.pool.reader() as db:
+            async with db.execute('''
+                SELECT session_id, COUNT(*) FROM chat_messages
+                GROUP BY session_id HAVING COUNT(*) > ?;
+            ''', (cap,)) as cursor:
+                rows = await cursor.fetchall()
+        return {row[0]: row[1] - cap for row in rows if row[0] is not None}
+
+    async def delete_oldest_messages(self, session_id: int, limit: int) -> int:
+        async with self.pool.writer() as db:
+            cursor = await db.execute('''
+                DELETE FROM chat_messages WHERE id IN (
+                    SELECT id FROM chat_messages WHERE session_id = ? ORDER BY id LIMIT ?
+                );
+            ''', (session_id, limit))
+        return cursor.rowcount
+
+    async def vacuum(self, pages: int) -> None:
+        """
+        Databases created before incremental auto-vacuum was enabled are converted with a
+        one-time full VACUUM, after which each run only frees a bounded number of pages.
+        """
+        async with self.pool.writer() as db:
+            async with db.execute('PRAGMA auto_vacuum;') as cursor:
+                mode = (await cursor.fetchone())[0]
+
+        if mode != 2:
+            logger.info("Enabling incremental auto-vacuum on the database, running a one-time VACUUM...")
+            async with self.pool.writer() as db:
+                await db.execute('PRAGMA auto_vacuum = INCREMENTAL;')
+                await db.execute('VACUUM;')
+            return
+
+        async with self.pool.writer() as db:
+            async with db.execute(f'PRAGMA incremental_vacuum({int(pages)});') as cursor:
+                await cursor.fetchall()
@@ -0,0 +1,229 @@
+import gzip, zlib, base64, asyncio, struct
+from loguru import logger
+from typing import Dict, List, Optional, Tuple, Union
+from src.helper.config import Config
+from src.database.backend.base import get_backend
+from src.manager.cluster_manager import ClusterManager
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class MessageCodec:
+    """
+    Pluggable codec for stored chat message contents.
+
+    Messages are stored as BLOBs prefixed with a one byte header telling how they're encoded:
+    raw UTF-8, zlib, zstd, or zstd with a dictionary trained from the stored messages (followed by
+    the 4 byte ID of the dictionary). Messages shorter than `message_codec_min_size` bytes, or
+    that don't get smaller, are stored raw. Legacy rows (base64 encoded gzip in TEXT) are still
+    decoded, and rewritten by `migrate_legacy_rows`.
+
+    The codec is picked with `message_codec` (`none`, `zlib` or `zstd`), zstd falls back to zlib
+    if the optional `zstandard` package isn't installed. When several processes share the store,
+    dictionaries are trained by a single one of them and loaded by the others as they're added.
+    """
+    _instance = None
+
+    RAW, ZLIB, ZSTD, ZSTD_DICT = 0, 1, 2, 3
+    CODECS = ("none", "zlib", "zstd")
+
+    _zlib_level = 6
+    _zstd_level = 3
+    _dictionary_size = 16384
+    _training_samples = 5000
+    _min_training_samples = 1000
+    _migration_batch_size = 500
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.backend = get_backend()
+            self.cluster_manager = ClusterManager()
+            self.cluster_manager.on("dictionary_added", self._on_dictionary_added)
+            self.codec = self._resolve_codec(self.config.message_codec)
+            self.min_size = self.config.message_codec_min_size
+            self._dictionary_id: Optional[int] = None
+            self._dict_compressor = None
+            self._compressor = zstandard.ZstdCompressor(level=self._zstd_level) if zstandard else None
+            self._decompressors: Dict[int, object] = {}
+            self._migration_task: Optional[asyncio.Task] = None
+
+    def _resolve_codec(self, codec: str) -> str:
+        codec = (codec or "").lower()
+        if codec not in self.CODECS:
+            logger.warning(f"Unknown message codec '{codec}', using zlib.")
+            return "zlib"
+        if codec == "zstd" and zstandard is None:
+            logger.warning("The zstandard package isn't installed, using zlib as message codec.")
+            return "zlib"
+        return codec
+
+    def encode(self, message: str) -> bytes:
+        """
+        Encodes a message for storage.
+
+        Args:
+            message (str): The message content.
+
+        Returns:
+            bytes: The header byte followed by the (possibly compressed) content.
+        """
+        data = message.encode()
+        if self.codec == "none" or len(data) < self.min_size:
+            return bytes((self.RAW,)) + data
+
+        if self.codec == "zlib":
+            encoded = bytes((self.ZLIB,)) + zlib.compress(data, self._zlib_level)
+        elif self._dict_compressor is not None:
+            encoded = bytes((self.ZSTD_DICT,)) + struct.pack(">I", self._dictionary_id) + self._dict_compressor.compress(data)
+        else:
+            encoded = bytes((self.ZSTD,)) + self._compressor.compress(data)
+
+        if len(encoded) >= len(data) + 1:
+            return bytes((self.RAW,)) + data
+        return encoded
+
+    def decode(self, value: Union[bytes, str]) -> str:
+        """
+        Decodes a stored message, whatever codec it was stored with.
+
+        Args:
+            value (bytes or str): The stored content.
+
+        Returns:
+            str: The message content.
+        """
+        if isinstance(value, str):
+            return gzip.decompress(base64.b64decode(value)).decode()
+
+        header, payload = value[0], memoryview(value)[1:]
+        if header == self.RAW:
+            return bytes(payload).decode()
+        if header == self.ZLIB:
+            return zlib.decompress(payload).decode()
+        if zstandard is None:
+            raise RuntimeError("A message is stored with zstd, but the zstandard package isn't installed.")
+        if header == self.ZSTD:
+            return self._get_decompressor(None).decompress(payload).decode()
+        if header == self.ZSTD_DICT:
+            dictionary_id = struct.unpack(">I", payload[:4])[0]
+            return self._get_decompressor(dictionary_id).decompress(payload[4:]).decode()
+        raise ValueError(f"Unknown message codec header {header}.")
+
+    def _get_decompressor(self, dictionary_id: Optional[int]):
+        key = dictionary_id or 0
+        if key not in self._decompressors:
+            if dictionary_id is not None:
+                raise KeyError(f"Message codec dictionary {dictionary_id} isn't loaded.")
+            self._decompressors[key] = zstandard.ZstdDecompressor()
+        return self._decompressors[key]
+
+    def add_dictionary(self, dictionary_id: int, data: bytes) -> None:
+        """Registers a trained dictionary, the last one added is used to compress new messages."""
+        dictionary = zstandard.ZstdCompressionDict(data)
+        self._decompressors[dictionary_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+        self._dict_compressor = zstandard.ZstdCompressor(level=self._zstd_level, dict_data=dictionary)
+        self._dictionary_id = dictionary_id
+
+    @classmethod
+    def train(cls, samples: List[bytes], size: Optional[int] = None) -> bytes:
+        """Trains a zstd dictionary from sample messages."""
+        return zstandard.train_dictionary(size or cls._dictionary_size, samples).as_bytes()
+
+    async def load_dictionaries(self) -> None:
+        """Loads the stored dictionaries, which stored messages may need to be decoded."""
+        if zstandard is None:
+            return
+        rows = [row for row in await self.backend.get_dictionaries() if row[0] not in self._decompressors]
+        for dictionary_id, data in rows:
+            self.add_dictionary(dictionary_id, data)
+        if rows:
+            logger.debug(f"Loaded {len(rows)} message codec dictionary(ies).")
+
+    def _on_dictionary_added(self, data: dict) -> None:
+        """Loads a dictionary trained by another process, which its messages need to be decoded."""
+        asyncio.get_running_loop().create_task(self.load_dictionaries())
+
+    async def train_dictionary(self) -> bool:
+        """
+        Trains a dictionary from the most recent stored messages and stores it.
+
+        Returns:
+            bool: Whether a dictionary was trained, which needs enough messages.
+        """
+        rows = await self.backend.get_message_samples(self._training_samples)
+        if len(rows) < self._min_training_samples:
+            return False
+
+        samples = [self.decode(row).encode() for row in rows]
+        data = await asyncio.to_thread(self.train, samples)
+        dictionary_id = await self.backend.add_dictionary(data)
+        self.add_dictionary(dictionary_id, data)
+        await self.cluster_manager.publish("dictionary_added", id=dictionary_id)
+        logger.info(f"Trained message codec dictionary {dictionary_id} from {len(samples)} messages.")
+        return True
+
+    async def migrate_legacy_rows(self) -> int:
+        """
+        Re-encodes legacy base64 gzip rows with the current codec, in small batches so the
+        writer is never held for long.
+
+        Returns:
+            int: The number of migrated rows.
+        """
+        migrated, last_id = 0, 0
+        while True:
+            rows = await self.backend.get_legacy_messages(last_id, self._migration_batch_size)
+            if not rows:
+                return migrated
+
+            updates: List[Tuple[bytes, int]] = []
+            for row_id, content in rows:
+                try:
+                    updates.append((self.encode(self.decode(content)), row_id))
+                except Exception as e:
+                    logger.error(f"Skipping undecodable message {row_id} during codec migration: {e}")
+
+            # Only rewrite rows that are still legacy, they may have been deleted in the meantime
+            await self.backend.update_legacy_messages(updates)
+            migrated += len(updates)
+            last_id = rows[-1][0]
+            await asyncio.sleep(0)
+
+    def start_background_migration(self) -> None:
+        """Starts `run_background_migration` in the background."""
+        if self._migration_task is None or self._migration_task.done():
+            self._migration_task = asyncio.get_running_loop().create_task(self.run_background_migration())
+
+    async def stop_background_migration(self) -> None:
+        """Cancels the background migration, it resumes with the remaining rows on the next start."""
+        if self._migration_task is not None and not self._migration_task.done():
+            self._migration_task.cancel()
+            try:
+                await self._migration_task
+            except asyncio.CancelledError:
+                pass
+
+    async def run_background_migration(self) -> None:
+        """Trains the first zstd dictionary if needed, then migrates the legacy rows, in a single process of the cluster."""
+        try:
+            if not await self.cluster_manager.acquire("message_codec"):
+                return
+            if self.codec == "zstd" and self._dictionary_id is None:
+                await self.train_dictionary()
+            migrated = await self.migrate_legacy_rows()
+            if migrated:
+                logger.info(f"Migrated {migrated} legacy message(s) to the {self.codec} codec.")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error migrating messages to the {self.codec} codec: {e}")
@@ -1,14 +1,33 @@
-import aiosqlite, gzip, base64
+import asyncio
 from loguru import logger
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 from src.helper.config import Config
+from src.helper.metrics import Metrics
+from src.database.codec import MessageCodec
+from src.database.backend.base import get_backend
+from src.manager.expiry_manager import ExpiryManager
+from src.manager.cluster_manager import ClusterManager
+from src.database.write_buffer import WriteBuffer
 from src.database.schema.sessions import SessionSchema
 
 class SessionsController:
     """
-    Controller class for managing sessions in the database.
+    Controller class for managing sessions in the storage backend.
+
+    Sessions are mirrored in a write-through in-memory index (by channel ID and by owner ID)
+    which is loaded once at startup, so hot paths like the message filter don't hit the database.
+    Message inserts and `last_used` touches go through a write-behind buffer that batches them
+    into a single transaction, reads merge in the writes that are still buffered. Indexed
+    sessions are scheduled for expiry in the expiry manager, rescheduled on every touch.
+
+    When several processes share the backend, session creations and deletions are published
+    to the other processes so their indexes stay in sync, and sessions are only expired by the
+    process holding the expiry lock, against the stored `last_used` which every process touches.
+    Events missed while disconnected from the cluster are caught up on by resyncing the index.
     """
     _instance = None
+    _expiry_retry_delay = 60
 
     def __new__(cls):
         if cls._instance is None:
@@ -18,162 +37,290 @@ class SessionsController:
 
     def __init__(self):
         if not self._initialized:
+            self._initialized = True
             self.config = Config()
-            self.db_path = 'src/database/storage/sessions.sqlite'
-
-    async def create_table(self) -> None:
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS ssh_sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    owner_id INTEGER NOT NULL,
-                    discord_channel_id INTEGER NOT NULL,
-                    last_used TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-                );
-            ''')
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS chat_messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id INTEGER,
-                    message_role TEXT,
-                    message_content TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (session_id) REFERENCES ssh_sessions(id)
-                );
-            ''')
-            await db.commit()
+            self.backend = get_backend()
+            self.write_buffer = WriteBuffer()
+            self.codec = MessageCodec()
+            self.expiry_manager = ExpiryManager()
+            self.cluster_manager = ClusterManager()
+            self.metrics = Metrics()
+            self._sessions_by_channel: Dict[int, SessionSchema] = {}
+            self._sessions_by_owner: Dict[int, SessionSchema] = {}
+            self.cluster_manager.on("session_created", self._on_session_created)
+            self.cluster_manager.on("session_deleted", self._on_session_deleted)
+            self.cluster_manager.on_reconnect(self._on_reconnect)
+            self._resync_task: Optional[asyncio.Task] = None
+
+    async def load_index(self) -> None:
+        """Loads every stored session into the in-memory index."""
+        sessions = await self.backend.get_sessions()
+
+        self._sessions_by_channel.clear()
+        self._sessions_by_owner.clear()
+        for session in sessions:
+            self._index_session(session)
+        logger.debug(f"Loaded {len(sessions)} session(s) into the session index.")
+
+    async def resync_index(self) -> None:
+        """
+        Brings the in-memory index in line with the stored sessions.
+
+        Buffered touches are flushed first, so the stored `last_used` aren't older than the
+        indexed ones. Sessions indexed, replaced or unindexed by this process while the stored
+        ones are read are left alone.
+        """
+        try:
+            await self.write_buffer.flush()
+            indexed = dict(self._sessions_by_owner)
+            sessions = await self.backend.get_sessions()
+
+            stored = {session.owner_id for session in sessions}
+            removed = 0
+            for owner_id, session in indexed.items():
+                if owner_id not in stored and self._sessions_by_owner.get(owner_id) is session:
+                    self._unindex_session(owner_id)
+                    removed += 1
+            for session in sessions:
+                if self._sessions_by_owner.get(session.owner_id) is indexed.get(session.owner_id):
+                    self._index_session(session)
+            logger.info(f"Resynced the session index: {len(sessions)} stored session(s), {removed} gone.")
+        except Exception as e:
+            logger.error(f"Error resyncing the session index: {e}")
+
+    def _on_reconnect(self) -> None:
+        """Resyncs the index, the sessions created or deleted by other processes meanwhile were missed."""
+        if self._resync_task is None or self._resync_task.done():
+            self._resync_task = asyncio.get_running_loop().create_task(self.resync_index())
+
+    def _index_session(self, session: SessionSchema) -> None:
+        """Adds or replaces a session in the in-memory index."""
+        self._unindex_session(session.owner_id)
+        self._sessions_by_owner[session.owner_id] = session
+        self._sessions_by_channel[session.discord_channel_id] = session
+        self.expiry_manager.touch(session.owner_id, session.last_used)
+
+    def _unindex_session(self, owner_id: int) -> Optional[SessionSchema]:
+        """Removes a session from the in-memory index and returns it, if any."""
+        session = self._sessions_by_owner.pop(owner_id, None)
+        if session is not None and self._sessions_by_channel.get(session.discord_channel_id) is session:
+            del self._sessions_by_channel[session.discord_channel_id]
+        self.expiry_manager.remove(owner_id)
+        return session
+
+    def _on_session_created(self, data: dict) -> None:
+        """Indexes a session created by another process."""
+        self._index_session(SessionSchema(
+            id=data["id"],
+            owner_id=data["owner_id"],
+            discord_channel_id=data["discord_channel_id"],
+            last_used=data["last_used"]
+        ))
+
+    def _on_session_deleted(self, data: dict) -> None:
+        """Unindexes a session deleted by another process, unless it was replaced in the meantime."""
+        session = self._sessions_by_owner.get(data["owner_id"])
+        if session is not None and session.id == data["id"]:
+            self._unindex_session(session.owner_id)
+            self.write_buffer.discard_session(session.id, session.owner_id)
+
+    def _now(self) -> str:
+        """Returns the current UTC time in SQLite's CURRENT_TIMESTAMP format."""
+        return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+    def is_session_channel(self, channel_id: int) -> bool:
+        """Returns whether the given channel belongs to a session, without any database I/O."""
+        return channel_id in self._sessions_by_channel
+
+    def get_channel_session(self, channel_id: int) -> Optional[SessionSchema]:
+        """Returns the session bound to the given channel from the in-memory index."""
+        return self._sessions_by_channel.get(channel_id)
 
     async def create_session(self, session: SessionSchema) -> None:
-        async with aiosqlite.connect(self.db_path) as db:
-            try:
-                await db.execute('''
-                    INSERT INTO ssh_sessions (owner_id, discord_channel_id, last_used)
-                    VALUES (?, ?, CURRENT_TIMESTAMP);
-                ''', (session.owner_id, session.discord_channel_id))
-                await db.commit()
-            except Exception as e:
-                logger.error(f"An error occurred while trying to create session: {e}")
-                await db.rollback()
+        try:
+            last_used = self._now()
+            session_id = await self.backend.insert_session(session.owner_id, session.discord_channel_id, last_used)
+
+            self._index_session(SessionSchema(
+                id=session_id,
+                owner_id=session.owner_id,
+                discord_channel_id=session.discord_channel_id,
+                last_used=last_used
+            ))
+            await self.cluster_manager.publish(
+                "session_created",
+                id=session_id,
+                owner_id=session.owner_id,
+                discord_channel_id=session.discord_channel_id,
+                last_used=last_used
+            )
+        except Exception as e:
+            logger.error(f"An error occurred while trying to create session: {e}")
 
     async def delete_session(self, owner_id: int) -> None:
-        async with aiosqlite.connect(self.db_path) as db:
-            try:
-                await db.execute('DELETE FROM ssh_sessions WHERE owner_id = ?;', (owner_id,))
-                await db.commit()
-            except Exception as e:
-                logger.error(f"An error occurred while trying to delete session: {e}")
-                await db.rollback()
+        try:
+            await self.backend.delete_session(owner_id)
+            session = self._unindex_session(owner_id)
+            if session is not None:
+                self.write_buffer.discard_session(session.id, owner_id)
+                await self.cluster_manager.publish("session_deleted", id=session.id, owner_id=owner_id)
+        except Exception as e:
+            logger.error(f"An error occurred while trying to delete session: {e}")
 
     async def update_session(self, session: SessionSchema) -> None:
-        async with aiosqlite.connect(self.db_path) as db:
-            try:
-                await db.execute('''
-                    UPDATE ssh_sessions
-                    SET discord_channel_id = ?, last_used = CURRENT_TIMESTAMP
-                    WHERE owner_id = ?;
-                ''', (session.discord_channel_id, session.owner_id))
-                await db.commit()
-            except Exception as e:
-                logger.error(f"An error occurred while trying to update session: {e}")
-                await db.rollback()
+        try:
+            last_used = self._now()
+            self.write_buffer.touch(session.owner_id, session.discord_channel_id, last_used)
+
+            indexed = self._sessions_by_owner.get(session.owner_id)
+            if indexed is not None:
+                self._index_session(SessionSchema(
+                    id=indexed.id,
+                    owner_id=session.owner_id,
+                    discord_channel_id=session.discord_channel_id,
+                    last_used=last_used
+                ))
+        except Exception as e:
+            logger.error(f"An error occurred while trying to update session: {e}")
 
     async def get_session(self, owner_id: int) -> Optional[SessionSchema]:
-        async with aiosqlite.connect(self.db_path) as db:
-            try:
-                cursor = await db.execute('''
-                    SELECT * FROM ssh_sessions WHERE owner_id = ?;
-                ''', (owner_id,))
-                row = await cursor.fetchone()
-                if row is None:
-                    return None
-                return SessionSchema.deserialize(row)
-            except Exception as e:
-                logger.error(f"An error occurred while trying to get session: {e}")
-                return None
+        return self._sessions_by_owner.get(owner_id)
+
+    async def fetch_session(self, owner_id: int) -> Optional[SessionSchema]:
+        try:
+            return await self.backend.fetch_session(owner_id)
+        except Exception as e:
+            logger.error(f"An error occurred while trying to get session: {e}")
+            return None
 
     async def get_all_sessions(self) -> List[SessionSchema]:
-        async with aiosqlite.connect(self.db_path) as db:
-            try:
-                cursor = await db.execute('SELECT * FROM ssh_sessions;')
-                rows = await cursor.fetchall()
-                return [SessionSchema.deserialize(row) for row in rows]
-            except Exception as e:
-                logger.error(f"An error occurred while trying to get all sessions: {e}")
-                return []
+        try:
+            return await self.backend.get_sessions()
+        except Exception as e:
+            logger.error(f"An error occurred while trying to get all sessions: {e}")
+            return []
 
     async def get_recent_sessions(self) -> List[SessionSchema]:
-        async with aiosqlite.connect(self.db_path) as db:
-            try:
-                cursor = await db.execute('''
-                    SELECT * FROM ssh_sessions WHERE last_used > datetime('now', '-1 day');
-                ''')
-                rows = await cursor.fetchall()
-                return [SessionSchema.deserialize(row) for row in rows]
-            except Exception as e:
-                logger.error(f"An error occurred while trying to get recent sessions: {e}")
-                return []
+        try:
+            return await self.backend.get_recent_sessions()
+        except Exception as e:
+            logger.error(f"An error occurred while trying to get recent sessions: {e}")
+            return []
 
     async def get_session_channels(self) -> List[int]:
-        async with aiosqlite.connect(self.db_path) as db:
-            try:
-                cursor = await db.execute('SELECT discord_channel_id FROM ssh_sessions;')
-                rows = await cursor.fetchall()
-                return [row[0] for row in rows]
-            except Exception as e:
-                logger.error(f"An error occurred while trying to get session channels: {e}")
-                return []
+        return list(self._sessions_by_channel)
+
+    async def expire_sessions(self, owner_ids: List[int]) -> List[SessionSchema]:
+        """
+        Deletes the given sessions if they're still expired, and only those.
 
-    async def get_expired_sessions(self) -> None:
-        async with aiosqlite.connect(self.db_path) as db:
-            try:
-                cursor = await db.execute('''
-                    SELECT * FROM ssh_sessions WHERE last_used < datetime('now', '-30 minutes');
-                ''')
-                rows = await cursor.fetchall()
-                return [SessionSchema.deserialize(row) for row in rows]
-            except Exception as e:
-                logger.error(f"An error occurred while trying to get expired sessions: {e}")
+        Each session is re-checked against its latest touch in the index, then deleted only if
+        its stored `last_used` is expired too, so a session touched after it was picked for
+        expiry, by this process or another one, is kept. Only the process holding the expiry
+        lock expires sessions, the others check back later in case it goes away.
+
+        Args:
+            owner_ids (list): The owner IDs of the sessions due for expiry.
+
+        Returns:
+            list: The deleted sessions.
+        """
+        expired = []
+        for owner_id in owner_ids:
+            session = self._sessions_by_owner.get(owner_id)
+            if session is not None and self.expiry_manager.is_expired(session.last_used):
+                expired.append(session)
+        if not expired:
+            return []
+
+        try:
+            if not await self.cluster_manager.acquire("session_expiry"):
+                for session in expired:
+                    self.expiry_manager.postpone(session.owner_id, self._expiry_retry_delay)
                 return []
 
-    async def delete_expired_sessions(self) -> None:
-        async with aiosqlite.connect(self.db_path) as db:
-            try:
-                await db.execute('''
-                    DELETE FROM ssh_sessions WHERE last_used < datetime('now', '-30 minutes');
-                ''')
-                await db.commit()
-            except Exception as e:
-                logger.error(f"An error occurred while trying to delete expired sessions: {e}")
-                await db.rollback()
+            cutoff = (datetime.utcnow() - timedelta(seconds=self.expiry_manager.ttl)).strftime('%Y-%m-%d %H:%M:%S')
+            deleted_ids = set(await self.backend.delete_expired_sessions([session.id for session in expired], cutoff))
+        except Exception as e:
+            logger.error(f"An error occurred while trying to delete expired sessions: {e}")
+            for session in expired:
+                self.expiry_manager.postpone(session.owner_id, self._expiry_retry_delay)
+            return []
+
+        deleted = []
+        for session in expired:
+            if session.id in deleted_ids:
+                self._unindex_session(session.owner_id)
+                self.write_buffer.discard_session(session.id, session.owner_id)
+                await self.cluster_manager.publish("session_deleted", id=session.id, owner_id=session.owner_id)
+                deleted.append(session)
+                continue
+
+            # Touched by another process, pick its latest touch up
+            stored = await self.fetch_session(session.owner_id)
+            if stored is not None and stored.id == session.id:
+                self._index_session(stored)
+            else:
+                self.expiry_manager.postpone(session.owner_id, self._expiry_retry_delay)
+        return deleted
 
     async def add_message(self, session_id: int, message_role: str, message_content: str) -> None:
-        compressed_content = self._compress_message(message_content)
-        async with aiosqlite.connect(self.db_path) as db:
-            try:
-                await db.execute('''
-                    INSERT INTO chat_messages (session_id, message_role, message_content)
-                    VALUES (?, ?, ?);
-                ''', (session_id, message_role, compressed_content))
-                await db.commit()
-            except Exception as e:
-                logger.error(f"Error adding message: {e}")
-                await db.rollback()
-
-    async def get_chat_history(self, session_id: int) -> List[dict]:
-        async with aiosqlite.connect(self.db_path) as db:
-            try:
-                cursor = await db.execute('''
-                    SELECT message_role, message_content FROM chat_messages
-                    WHERE session_id = ? ORDER BY timestamp;
-                ''', (session_id,))
-                rows = await cursor.fetchall()
-                return [{"role": row[0], "content": self._decompress_message(row[1])} for row in rows]
-            except Exception as e:
-                logger.error(f"Error retrieving chat history: {e}")
-                return []
+        try:
+            compressed_content = self._compress_message(message_content)
+            self.write_buffer.add_message(session_id, message_role, compressed_content, message_content)
+        except Exception as e:
+            logger.error(f"Error adding message: {e}")
+
+    async def get_recent_messages(self, session_id: int, limit: int) -> List[dict]:
+        try:
+            rows, pending = await self.write_buffer.read_with_pending(session_id, lambda: self.backend.get_recent_messages(session_id, limit))
+            with self.metrics.timer("prompt_stage_seconds", stage="decompression"):
+                messages = [{"role": role, "content": self._decompress_message(content)} for role, content in rows]
+            messages += pending
+            return messages[-limit:]
+        except Exception as e:
+            logger.error(f"Error retrieving recent messages: {e}")
+            return []
+
+    async def count_active_messages(self, session_id: int) -> int:
+        """Returns the number of stored messages of a session that aren't archived."""
+        try:
+            return await self.backend.count_active_messages(session_id)
+        except Exception as e:
+            logger.error(f"Error counting messages: {e}")
+            return 0
+
+    async def get_oldest_active_messages(self, session_id: int, limit: int) -> List[Tuple[int, dict]]:
+        """Returns the IDs and contents of the oldest messages of a session that aren't archived."""
+        try:
+            rows = await self.backend.get_oldest_active_messages(session_id, limit)
+            return [(message_id, {"role": role, "content": self._decompress_message(content)}) for message_id, role, content in rows]
+        except Exception as e:
+            logger.error(f"Error retrieving oldest messages: {e}")
+            return []
+
+    async def get_summary(self, session_id: int) -> Optional[str]:
+        """Returns the summary of the archived messages of a session, if any."""
+        try:
+            summary = await self.backend.get_summary(session_id)
+            return self._decompress_message(summary) if summary is not None else None
+        except Exception as e:
+            logger.error(f"Error retrieving session summary: {e}")
+            return None
+
+    async def archive_messages(self, session_id: int, summary: str, last_message_id: int) -> None:
+        """
+        Replaces the summary of a session and archives its messages up to the given ID, in one transaction.
+
+        Args:
+            session_id (int): The ID of the session.
+            summary (str): The summary covering every archived message, old summary included.
+            last_message_id (int): The ID of the newest message covered by the summary.
+        """
+        await self.backend.archive_messages(session_id, self._compress_message(summary), self._now(), last_message_id)
 
-    def _compress_message(self, message: str) -> str:
-        return base64.b64encode(gzip.compress(message.encode())).decode()
+    def _compress_message(self, message: str) -> bytes:
+        return self.codec.encode(message)
 
-    def _decompress_message(self, compressed_message: str) -> str:
-        return gzip.decompress(base64.b64decode(compressed_message)).decode()
\ No newline at end of file
+    def _decompress_message(self, compressed_message) -> str:
+        return self.codec.decode(compressed_message)
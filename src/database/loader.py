@@ -1,5 +1,9 @@
 import traceback
 from loguru import logger
+from src.database.codec import MessageCodec
+from src.database.backend.base import get_backend
+from src.database.write_buffer import WriteBuffer
+from src.manager.cluster_manager import ClusterManager
 from src.database.controller.sessions import SessionsController
 
 class DatabaseLoader:
@@ -9,15 +13,35 @@ class DatabaseLoader:
 
     def __init__(self) -> None:
         self.sessions_controller = SessionsController()
+        self.backend = get_backend()
 
     async def setup(self) -> bool:
         """
-        Sets up the database by creating the necessary table.
+        Sets up the database by opening the storage backend, creating the necessary tables,
+        applying pending migrations, joining the other bot processes sharing it and loading the
+        session index. Legacy messages are re-encoded with the configured codec in the background.
         """
         try:
-            await self.sessions_controller.create_table()
+            await self.backend.open()
+            await self.backend.migrate()
+            await ClusterManager().start()
+            await self.sessions_controller.load_index()
+            await MessageCodec().load_dictionaries()
+            MessageCodec().start_background_migration()
             return True
         except Exception as e:
             logger.critical(f"Error setting up database(s): {e}")
             traceback.print_exc()
-            return False
\ No newline at end of file
+            return False
+
+    async def close(self) -> None:
+        """
+        Flushes the buffered writes and closes the storage backend.
+        """
+        try:
+            if self.backend.is_open:
+                await MessageCodec().stop_background_migration()
+                await WriteBuffer().close()
+            await self.backend.close()
+        except Exception as e:
+            logger.error(f"Error closing database(s): {e}")
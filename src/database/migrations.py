@@ -0,0 +1,93 @@
+from loguru import logger
+from typing import List
+from src.database.pool import ConnectionPool
+
+class Migration:
+    """
+    A single versioned schema change.
+
+    Attributes:
+        version (int): The schema version the database is at once this migration is applied.
+        description (str): A short description of the change.
+        statements (list): The SQL statements to run, in order.
+    """
+
+    def __init__(self, version: int, description: str, statements: List[str]) -> None:
+        self.version = version
+        self.description = description
+        self.statements = statements
+
+# Ordered list of migrations, append new ones at the end with the next version number.
+MIGRATIONS = [
+    Migration(1, "Index chat_messages by session", [
+        "CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages (session_id, id);",
+    ]),
+    Migration(2, "Unique owner and channel indexes on ssh_sessions", [
+        # Older databases may hold duplicated rows, keep the newest one of each.
+        "DELETE FROM ssh_sessions WHERE id NOT IN (SELECT MAX(id) FROM ssh_sessions GROUP BY owner_id);",
+        "DELETE FROM ssh_sessions WHERE id NOT IN (SELECT MAX(id) FROM ssh_sessions GROUP BY discord_channel_id);",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_ssh_sessions_owner ON ssh_sessions (owner_id);",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_ssh_sessions_channel ON ssh_sessions (discord_channel_id);",
+    ]),
+    Migration(3, "Index ssh_sessions by last_used", [
+        "CREATE INDEX IF NOT EXISTS idx_ssh_sessions_last_used ON ssh_sessions (last_used);",
+    ]),
+    Migration(4, "Dictionaries of the zstd message codec", [
+        '''CREATE TABLE IF NOT EXISTS message_codec_dictionaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data BLOB NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );''',
+    ]),
+    Migration(5, "Archived chat messages and session summaries", [
+        "ALTER TABLE chat_messages ADD COLUMN archived INTEGER NOT NULL DEFAULT 0;",
+        "CREATE INDEX IF NOT EXISTS idx_chat_messages_active ON chat_messages (session_id, id) WHERE archived = 0;",
+        '''CREATE TABLE IF NOT EXISTS session_summaries (
+            session_id INTEGER PRIMARY KEY,
+            summary BLOB NOT NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (session_id) REFERENCES ssh_sessions(id)
+        );''',
+    ]),
+]
+
+class MigrationRunner:
+    """
+    Applies pending schema migrations, tracking the schema version in `PRAGMA user_version`.
+
+    Each migration runs in its own transaction on the writer connection together with the
+    version bump, so an interrupted upgrade leaves the database at the last fully applied
+    version. Readers keep being served from the WAL while a migration runs.
+    """
+
+    def __init__(self) -> None:
+        self.pool = ConnectionPool()
+
+    async def get_version(self) -> int:
+        async with self.pool.writer() as db:
+            async with db.execute('PRAGMA user_version;') as cursor:
+                row = await cursor.fetchone()
+        return row[0]
+
+    async def run(self) -> int:
+        """
+        Applies every migration newer than the current schema version.
+
+        Returns:
+            int: The schema version after running the migrations.
+        """
+        version = await self.get_version()
+        for migration in MIGRATIONS:
+            if migration.version <= version:
+                continue
+
+            logger.info(f"Applying database migration {migration.version}: {migration.description}...")
+            async with self.pool.writer() as db:
+                await db.execute('BEGIN IMMEDIATE;')
+                for statement in migration.statements:
+                    await db.execute(statement)
+                await db.execute(f'PRAGMA user_version = {int(migration.version)};')
+            version = migration.version
+
+        logger.debug(f"Database schema is at version {version}.")
+        return version
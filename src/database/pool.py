@@ -0,0 +1,115 @@
+import asyncio, aiosqlite
+from loguru import logger
+from typing import List, Optional
+from src.helper.config import Config
+from contextlib import asynccontextmanager
+
+class ConnectionPool:
+    """
+    Singleton pool of long-lived SQLite connections.
+
+    A single writer connection serializes every write, while a fixed set of reader connections
+    serve concurrent reads. Connections are opened once at startup in WAL mode, so readers
+    never block the writer and commits don't fsync on every write.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.db_path: Optional[str] = None
+            self._writer: Optional[aiosqlite.Connection] = None
+            self._write_lock = asyncio.Lock()
+            self._readers: List[aiosqlite.Connection] = []
+            self._idle_readers: Optional[asyncio.Queue] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    async def open(self, db_path: str) -> None:
+        """
+        Opens the writer and reader connections and applies the tuned pragmas.
+
+        Args:
+            db_path (str): Path to the SQLite database file.
+        """
+        if self.is_open:
+            return
+
+        self.db_path = db_path
+        self._writer = await self._connect()
+        # Only takes effect on a new database, existing ones are converted by the retention engine
+        await self._pragma(self._writer, 'auto_vacuum=INCREMENTAL')
+        await self._pragma(self._writer, 'journal_mode=WAL')
+
+        self._idle_readers = asyncio.Queue()
+        for _ in range(max(1, self.config.db_readers)):
+            reader = await self._connect()
+            await self._pragma(reader, 'query_only=ON')
+            self._readers.append(reader)
+            self._idle_readers.put_nowait(reader)
+
+        logger.debug(f"Opened database pool with 1 writer and {len(self._readers)} reader connection(s).")
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Opens a single connection with the shared pragmas applied."""
+        db = await aiosqlite.connect(self.db_path)
+        await self._pragma(db, 'synchronous=NORMAL')
+        await self._pragma(db, 'temp_store=MEMORY')
+        await self._pragma(db, 'busy_timeout=5000')
+        await self._pragma(db, f'mmap_size={int(self.config.db_mmap_size)}')
+        await self._pragma(db, f'cache_size=-{int(self.config.db_cache_size_kb)}')
+        return db
+
+    async def _pragma(self, db: aiosqlite.Connection, pragma: str) -> None:
+        """Runs a pragma and drains its result, so the statement doesn't keep holding a lock."""
+        async with db.execute(f'PRAGMA {pragma};') as cursor:
+            await cursor.fetchall()
+
+    @asynccontextmanager
+    async def reader(self):
+        """Borrows a read-only connection from the pool."""
+        db = await self._idle_readers.get()
+        try:
+            yield db
+        finally:
+            self._idle_readers.put_nowait(db)
+
+    @asynccontextmanager
+    async def writer(self):
+        """
+        Acquires the writer connection as a single transaction.
+
+        The transaction is committed when the block exits and rolled back if it raises.
+        """
+        async with self._write_lock:
+            try:
+                yield self._writer
+                await self._writer.commit()
+            except BaseException:
+                await self._writer.rollback()
+                raise
+
+    async def close(self) -> None:
+        """Closes every pooled connection."""
+        if not self.is_open:
+            return
+
+        async with self._write_lock:
+            for reader in self._readers:
+                await reader.close()
+            self._readers.clear()
+            self._idle_readers = None
+
+            await self._writer.close()
+            self._writer = None
+
+        logger.debug("Closed database pool.")
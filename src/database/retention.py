@@ -0,0 +1,92 @@
+import asyncio
+from loguru import logger
+from typing import Awaitable, Callable
+from src.helper.config import Config
+from src.database.backend.base import get_backend
+from src.manager.cluster_manager import ClusterManager
+
+class RetentionEngine:
+    """
+    Keeps the database from growing without bound.
+
+    Deletes the messages of deleted sessions, messages older than `retention_max_age_days` and
+    messages over the `retention_max_messages` cap of a session (oldest first), then returns the
+    freed pages to the file system with an incremental vacuum. Deletes run in bounded batches,
+    each in its own short write transaction, so buffered writes get through in between. When
+    several processes share the store, only one of them applies the retention policy.
+    """
+    _instance = None
+    _batch_size = 1000
+    _vacuum_pages = 2000
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.backend = get_backend()
+            self.cluster_manager = ClusterManager()
+
+    async def _delete_batches(self, delete: Callable[[int], Awaitable[int]]) -> int:
+        """Calls a batch delete with the batch size until it deletes less than a batch."""
+        deleted = 0
+        while True:
+            count = await delete(self._batch_size)
+            deleted += count
+            if count < self._batch_size:
+                return deleted
+            await asyncio.sleep(0)
+
+    async def delete_orphans(self) -> int:
+        """Deletes the messages and summaries of sessions that no longer exist."""
+        deleted = 0
+        for session_id in await self.backend.get_orphaned_session_ids():
+            deleted += await self._delete_batches(lambda limit: self.backend.delete_session_messages(session_id, limit))
+
+        await self.backend.delete_orphaned_summaries()
+        return deleted
+
+    async def delete_old_messages(self) -> int:
+        """Deletes the messages older than the configured maximum age, if any."""
+        days = self.config.retention_max_age_days
+        if days <= 0:
+            return 0
+        return await self._delete_batches(lambda limit: self.backend.delete_messages_older_than(days, limit))
+
+    async def enforce_session_cap(self) -> int:
+        """Deletes the oldest messages of the sessions over the configured per-session cap, if any."""
+        cap = self.config.retention_max_messages
+        if cap <= 0:
+            return 0
+
+        deleted = 0
+        for session_id, count in (await self.backend.get_excess_message_counts(cap)).items():
+            while count > 0:
+                batch = min(count, self._batch_size)
+                deleted += await self.backend.delete_oldest_messages(session_id, batch)
+                count -= batch
+                await asyncio.sleep(0)
+        return deleted
+
+    async def vacuum(self) -> None:
+        """Returns free pages to the file system."""
+        await self.backend.vacuum(self._vacuum_pages)
+
+    async def run(self) -> None:
+        """Runs every retention step, without blocking the event loop."""
+        try:
+            if not await self.cluster_manager.acquire("retention"):
+                return
+            orphans = await self.delete_orphans()
+            old = await self.delete_old_messages()
+            capped = await self.enforce_session_cap()
+            await self.vacuum()
+            if orphans or old or capped:
+                logger.info(f"Retention deleted {orphans} orphaned, {old} old and {capped} over-cap message(s).")
+        except Exception as e:
+            logger.error(f"Error running database retention: {e}")
@@ -0,0 +1,155 @@
+import asyncio
+from loguru import logger
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from src.helper.config import Config
+from src.database.backend.base import get_backend
+
+T = TypeVar("T")
+
+class WriteBuffer:
+    """
+    Write-behind buffer for chat message inserts and session `last_used` touches.
+
+    Writes are collected in memory and flushed together in a single transaction, either
+    `write_buffer_interval_ms` milliseconds after the first pending write or as soon as
+    `write_buffer_max_ops` writes are pending. Pending messages stay readable through
+    `read_with_pending`, so reads of a session see its unflushed writes.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.backend = get_backend()
+            # (session_id, role, stored content, plain content)
+            self._messages: List[Tuple[int, str, object, str]] = []
+            # owner_id -> (discord_channel_id, last_used)
+            self._touches: Dict[int, Tuple[int, str]] = {}
+            # Messages of the flush in progress, still visible to reads until committed
+            self._flushing: List[Tuple[int, str, object, str]] = []
+            # Bumped when a flush starts writing and when it's done, odd while a flush is in progress
+            self._flush_generation = 0
+            self._flush_lock = asyncio.Lock()
+            self._timer: Optional[asyncio.TimerHandle] = None
+            self._flush_queued = False
+            self._flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered writes."""
+        return len(self._messages) + len(self._touches)
+
+    def add_message(self, session_id: int, message_role: str, stored_content, content: str) -> None:
+        """
+        Buffers a chat message insert.
+
+        Args:
+            session_id (int): The ID of the session.
+            message_role (str): The role of the message author.
+            stored_content: The content as stored in the database.
+            content (str): The plain content, returned to reads until the message is flushed.
+        """
+        self._messages.append((session_id, message_role, stored_content, content))
+        self._schedule()
+
+    def touch(self, owner_id: int, discord_channel_id: int, last_used: str) -> None:
+        """Buffers a session `last_used` update, only the latest one per session is kept."""
+        self._touches[owner_id] = (discord_channel_id, last_used)
+        self._schedule()
+
+    def pending_messages(self, session_id: int) -> List[dict]:
+        """Returns the unflushed messages of a session, oldest first."""
+        return [
+            {"role": role, "content": content}
+            for buffered_id, role, _, content in self._flushing + self._messages
+            if buffered_id == session_id
+        ]
+
+    async def read_with_pending(self, session_id: int, read: Callable[[], Awaitable[T]]) -> Tuple[T, List[dict]]:
+        """
+        Runs a read of the stored messages of a session, and returns its result with the unflushed messages of the session.
+
+        Every message is either in the result of the read or in the unflushed messages, never in
+        both or neither: a read overlapping a flush can't tell whether it saw the flushed
+        messages, so it's run again once the flush is done.
+        """
+        generation = self._flush_generation
+        if generation % 2 == 0:
+            pending = self.pending_messages(session_id)
+            result = await read()
+            if generation == self._flush_generation:
+                return result, pending
+        async with self._flush_lock:
+            return await read(), self.pending_messages(session_id)
+
+    def discard_session(self, session_id: int, owner_id: int) -> None:
+        """Drops the buffered writes of a deleted session."""
+        self._messages = [message for message in self._messages if message[0] != session_id]
+        self._touches.pop(owner_id, None)
+
+    def _schedule(self) -> None:
+        """Starts a flush if the buffer is full, otherwise makes sure the flush timer is armed."""
+        if self.pending >= self.config.write_buffer_max_ops:
+            self._start_flush()
+        else:
+            self._arm_timer()
+
+    def _arm_timer(self) -> None:
+        if self._timer is None and not self._flush_queued:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.config.write_buffer_interval_ms / 1000, self._start_flush)
+
+    def _start_flush(self) -> None:
+        """Queues a flush, unless one is already queued and will pick up every buffered write."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._flush_queued:
+            self._flush_queued = True
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self) -> None:
+        """Writes every buffered write in a single transaction."""
+        async with self._flush_lock:
+            self._flush_queued = False
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self.pending:
+                return
+
+            messages, self._messages = self._messages, []
+            touches, self._touches = self._touches, {}
+            self._flushing = messages
+            self._flush_generation += 1
+            try:
+                await self.backend.write_batch(
+                    [(session_id, role, stored) for session_id, role, stored, _ in messages],
+                    [(owner_id, channel_id, last_used) for owner_id, (channel_id, last_used) in touches.items()]
+                )
+            except Exception as e:
+                # Put the writes back in front of the ones buffered meanwhile, they're retried on the next flush
+                logger.error(f"Error flushing {len(messages) + len(touches)} buffered write(s): {e}")
+                self._messages = messages + self._messages
+                for owner_id, touch in touches.items():
+                    self._touches.setdefault(owner_id, touch)
+                self._arm_timer()
+                return
+            finally:
+                self._flushing = []
+                self._flush_generation += 1
+
+        # Writes buffered meanwhile didn't start a flush while this one was queued
+        if self.pending:
+            self._schedule()
+
+    async def close(self) -> None:
+        """Flushes the remaining writes, after the flush in progress if any."""
+        await self.flush()
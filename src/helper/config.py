@@ -14,12 +14,65 @@ class Config:
         app_name_branded (str): Branded name of the application.
         app_version (str): Version of the application.
         log_file (str): Path to the log file.
+        startup_banner (bool): Whether the banner is drawn in the console once the bot is ready.
+        log_level (str): Minimum level of the logged records.
+        log_format (str): Format of the log file, text or json.
+        log_rotation_size_mb (int): Size in MiB past which the log file is rotated, 0 disables it.
+        log_rotation_hours (int): Hours after which the log file is rotated, 0 disables it.
+        log_retention (int): Number of rotated log files kept, 0 keeps them all.
+        log_compression (str): Compression of the rotated log files, none disables it.
+        log_sample_limit (int): Warnings and errors logged per call site and window, 0 disables the sampling.
+        log_sample_window (int): Seconds of a sampling window.
         proxies_file (str): Path to the file containing proxies.
         bot_prefix (str): Prefix for the Discord bot commands.
         bot_token (str): Token for the Discord bot.
         chat_category (int): ID of the Discord category for chat channels.
         dev_guild_id (discord.Object): ID of the development guild.
         additional_hide_roles (list): List of additional roles to hide chat channels from.
+        production_mode (bool): Whether the bot runs auto-sharded with minimal intents and trimmed caches.
+        shard_count (int): Total number of shards in production mode, 0 lets Discord decide.
+        shard_ids (list): Shards run by this process in production mode, empty for all of them.
+        max_messages (int): Number of messages cached in production mode.
+        session_ttl_minutes (int): Minutes of inactivity after which a session expires.
+        room_pool_size (int): Number of hidden room channels kept ready per guild, 0 disables the pool.
+        rest_global_rate (int): Requests per second the bot allows itself against Discord's global rate limit.
+        rest_background_share (float): Share (0-1) of `rest_global_rate` background REST calls can use.
+        rest_background_concurrency (int): Maximum number of background REST jobs running at the same time.
+        database_url (str): PostgreSQL URL of a session store shared by several bot processes, empty for the local SQLite file.
+        db_readers (int): Number of pooled read-only database connections.
+        db_mmap_size (int): SQLite memory-mapped I/O size in bytes.
+        db_cache_size_kb (int): SQLite page cache size per connection in KiB.
+        write_buffer_interval_ms (int): Milliseconds buffered database writes wait before being flushed.
+        write_buffer_max_ops (int): Number of buffered database writes that triggers an immediate flush.
+        message_codec (str): Codec of stored messages, `none`, `zlib` or `zstd`.
+        message_codec_min_size (int): Size in bytes under which messages are stored uncompressed.
+        retention_max_age_days (int): Age in days after which messages are deleted, 0 keeps them forever.
+        retention_max_messages (int): Maximum number of stored messages per session, 0 for no limit.
+        context_token_budget (int): Maximum estimated tokens of history sent with a prompt.
+        context_max_messages (int): Maximum number of history messages sent with a prompt.
+        context_cached_sessions (int): Number of sessions whose history tail is kept in memory, at least 1.
+        compaction_threshold (int): Active messages of a session over which its oldest ones are summarized, 0 disables it.
+        compaction_keep (int): Number of most recent messages left out of the summary, lower than `compaction_threshold`.
+        prompt_timeout (int): Timeout in seconds of a non-streamed model request.
+        stream_responses (bool): Whether model responses are streamed into the channel.
+        stream_timeout (int): Timeout in seconds of a streamed model request.
+        stream_edit_interval (float): Minimum seconds between two edits of a streamed message.
+        provider_failure_threshold (int): Consecutive failures that open a provider's circuit breaker.
+        provider_cooldown (int): Seconds an opened provider circuit breaker waits before a probe.
+        max_queued_prompts (int): Maximum number of prompts queued per session, running one included.
+        max_concurrent_prompts (int): Maximum number of prompts processed at the same time.
+        hedge_requests (bool): Whether slow non-streamed requests are hedged with a second provider.
+        hedge_percentile (float): Latency percentile (0-1) of a provider after which a request is hedged.
+        proxy_quarantine (int): Base number of seconds a failing proxy is quarantined for.
+        response_cache (bool): Whether responses to short, history-less contexts are cached.
+        response_cache_ttl (int): Seconds a cached response is served for.
+        response_cache_max_entries (int): Maximum number of cached responses.
+        response_cache_max_bytes (int): Maximum size in bytes of the cached responses.
+        response_cache_max_messages (int): Maximum number of messages of a context whose response is cached.
+        response_cache_persist (bool): Whether cached responses are persisted across restarts.
+        metrics (bool): Whether latencies are measured and served on the metrics endpoint.
+        metrics_host (str): Host the metrics endpoint listens on.
+        metrics_port (int): Port the metrics endpoint listens on.
 
     Methods:
         reload(): Reloads the configuration from the YAML file.
@@ -63,21 +116,74 @@ class Config:
                 "bot_token": os.getenv("BOT_TOKEN"),
                 "chat_category": os.getenv("CHAT_CATEGORY"),
                 "dev_guild_id": os.getenv("DEV_GUILD_ID"),
-                "additional_hide_roles": self._parse_role_ids(os.getenv("ADDITIONAL_HIDE_ROLES", ""))
+                "additional_hide_roles": self._parse_ids(os.getenv("ADDITIONAL_HIDE_ROLES", "")),
+                "session_ttl_minutes": os.getenv("SESSION_TTL_MINUTES") or "30",
+                "production_mode": os.getenv("PRODUCTION_MODE") or "false",
+                "shard_count": os.getenv("SHARD_COUNT") or "0",
+                "shard_ids": self._parse_ids(os.getenv("SHARD_IDS", "")),
+                "max_messages": os.getenv("MAX_MESSAGES") or "100",
+                "room_pool_size": os.getenv("ROOM_POOL_SIZE") or "0",
+                "rest_global_rate": os.getenv("REST_GLOBAL_RATE") or "45",
+                "rest_background_share": os.getenv("REST_BACKGROUND_SHARE") or "0.5",
+                "rest_background_concurrency": os.getenv("REST_BACKGROUND_CONCURRENCY") or "5",
+                "database_url": os.getenv("DATABASE_URL") or "",
+                "db_readers": os.getenv("DB_READERS") or "4",
+                "db_mmap_size": os.getenv("DB_MMAP_SIZE") or "268435456",
+                "db_cache_size_kb": os.getenv("DB_CACHE_SIZE_KB") or "16384",
+                "write_buffer_interval_ms": os.getenv("WRITE_BUFFER_INTERVAL_MS") or "50",
+                "write_buffer_max_ops": os.getenv("WRITE_BUFFER_MAX_OPS") or "100",
+                "message_codec": os.getenv("MESSAGE_CODEC") or "zstd",
+                "message_codec_min_size": os.getenv("MESSAGE_CODEC_MIN_SIZE") or "64",
+                "retention_max_age_days": os.getenv("RETENTION_MAX_AGE_DAYS") or "0",
+                "retention_max_messages": os.getenv("RETENTION_MAX_MESSAGES") or "0",
+                "context_token_budget": os.getenv("CONTEXT_TOKEN_BUDGET") or "3000",
+                "context_max_messages": os.getenv("CONTEXT_MAX_MESSAGES") or "50",
+                "context_cached_sessions": os.getenv("CONTEXT_CACHED_SESSIONS") or "1000",
+                "compaction_threshold": os.getenv("COMPACTION_THRESHOLD") or "60",
+                "compaction_keep": os.getenv("COMPACTION_KEEP") or "20",
+                "prompt_timeout": os.getenv("PROMPT_TIMEOUT") or "10",
+                "stream_responses": os.getenv("STREAM_RESPONSES") or "true",
+                "stream_timeout": os.getenv("STREAM_TIMEOUT") or "120",
+                "stream_edit_interval": os.getenv("STREAM_EDIT_INTERVAL") or "1.0",
+                "provider_failure_threshold": os.getenv("PROVIDER_FAILURE_THRESHOLD") or "3",
+                "provider_cooldown": os.getenv("PROVIDER_COOLDOWN") or "30",
+                "hedge_requests": os.getenv("HEDGE_REQUESTS") or "false",
+                "max_queued_prompts": os.getenv("MAX_QUEUED_PROMPTS") or "3",
+                "max_concurrent_prompts": os.getenv("MAX_CONCURRENT_PROMPTS") or "16",
+                "hedge_percentile": os.getenv("HEDGE_PERCENTILE") or "0.9",
+                "proxy_quarantine": os.getenv("PROXY_QUARANTINE") or "30",
+                "response_cache": os.getenv("RESPONSE_CACHE") or "false",
+                "response_cache_ttl": os.getenv("RESPONSE_CACHE_TTL") or "3600",
+                "response_cache_max_entries": os.getenv("RESPONSE_CACHE_MAX_ENTRIES") or "1000",
+                "response_cache_max_bytes": os.getenv("RESPONSE_CACHE_MAX_BYTES") or "16777216",
+                "response_cache_max_messages": os.getenv("RESPONSE_CACHE_MAX_MESSAGES") or "1",
+                "response_cache_persist": os.getenv("RESPONSE_CACHE_PERSIST") or "false",
+                "metrics": os.getenv("METRICS") or "false",
+                "metrics_host": os.getenv("METRICS_HOST") or "127.0.0.1",
+                "metrics_port": os.getenv("METRICS_PORT") or "9108",
+                "startup_banner": os.getenv("STARTUP_BANNER") or "true",
+                "log_level": os.getenv("LOG_LEVEL") or "DEBUG",
+                "log_format": os.getenv("LOG_FORMAT") or "text",
+                "log_rotation_size_mb": os.getenv("LOG_ROTATION_SIZE_MB") or "10",
+                "log_rotation_hours": os.getenv("LOG_ROTATION_HOURS") or "24",
+                "log_retention": os.getenv("LOG_RETENTION") or "10",
+                "log_compression": os.getenv("LOG_COMPRESSION") or "gz",
+                "log_sample_limit": os.getenv("LOG_SAMPLE_LIMIT") or "20",
+                "log_sample_window": os.getenv("LOG_SAMPLE_WINDOW") or "60"
             }
         except Exception as e:
             logger.error(f"Error loading configuration from environment variables: {e}")
             self.config = {}
 
-    def _parse_role_ids(self, role_ids_str):
-        """Parses a comma-separated string of role IDs into a list of integers."""
-        role_ids = []
-        if role_ids_str:
+    def _parse_ids(self, ids_str):
+        """Parses a comma-separated string of IDs (roles, shards) into a list of integers."""
+        ids = []
+        if ids_str:
             try:
-                role_ids = [int(id.strip()) for id in role_ids_str.split(",") if id.strip()]
+                ids = [int(id.strip()) for id in ids_str.split(",") if id.strip()]
             except ValueError as e:
-                logger.error(f"Error parsing role IDs: {role_ids_str} -> {e}")
-        return role_ids
+                logger.error(f"Error parsing IDs: {ids_str} -> {e}")
+        return ids
 
     def _update_attributes(self):
         """Updates instance attributes from the config dictionary."""
@@ -91,7 +197,17 @@ class Config:
         self.app_name_branded: str = f"{self.app_name} • {self.app_url}"
         self.app_version: str = self.config.get("app_version", "")
         self.log_file: str = self.config.get("log_file", "")
+        self.startup_banner: bool = str(self.config.get("startup_banner", "true")).lower() == "true"
+        self.log_level: str = str(self.config.get("log_level", "DEBUG")).upper()
+        self.log_format: str = str(self.config.get("log_format", "text")).lower()
+        self.log_rotation_size_mb: int = int(self.config.get("log_rotation_size_mb", 10))
+        self.log_rotation_hours: int = int(self.config.get("log_rotation_hours", 24))
+        self.log_retention: int = int(self.config.get("log_retention", 10))
+        self.log_compression: str = str(self.config.get("log_compression", "gz")).lower()
+        self.log_sample_limit: int = int(self.config.get("log_sample_limit", 20))
+        self.log_sample_window: int = int(self.config.get("log_sample_window", 60))
         self.proxies_file: str = self.config.get("proxies_file", "")
+        self.proxy_quarantine: int = int(self.config.get("proxy_quarantine", 30))
 
         # [BOT]
         self.bot_prefix: str = self.config.get("bot_prefix", "")
@@ -99,6 +215,58 @@ class Config:
         self.chat_category: int = int(self.config.get("chat_category", 0))
         self.dev_guild_id: discord.Object = discord.Object(int(self.config.get("dev_guild_id", 0)))
         self.additional_hide_roles: list = self.config.get("additional_hide_roles", [])
+        self.session_ttl_minutes: int = int(self.config.get("session_ttl_minutes", 30))
+        self.production_mode: bool = str(self.config.get("production_mode", "false")).lower() == "true"
+        self.shard_count: int = int(self.config.get("shard_count", 0))
+        self.shard_ids: list = self.config.get("shard_ids", [])
+        self.max_messages: int = int(self.config.get("max_messages", 100))
+        self.room_pool_size: int = int(self.config.get("room_pool_size", 0))
+        self.rest_global_rate: int = int(self.config.get("rest_global_rate", 45))
+        self.rest_background_share: float = float(self.config.get("rest_background_share", 0.5))
+        self.rest_background_concurrency: int = int(self.config.get("rest_background_concurrency", 5))
+
+        # [DATABASE]
+        self.database_url: str = self.config.get("database_url", "")
+        self.db_readers: int = int(self.config.get("db_readers", 4))
+        self.db_mmap_size: int = int(self.config.get("db_mmap_size", 268435456))
+        self.db_cache_size_kb: int = int(self.config.get("db_cache_size_kb", 16384))
+        self.write_buffer_interval_ms: int = int(self.config.get("write_buffer_interval_ms", 50))
+        self.write_buffer_max_ops: int = int(self.config.get("write_buffer_max_ops", 100))
+        self.message_codec: str = self.config.get("message_codec", "zstd")
+        self.message_codec_min_size: int = int(self.config.get("message_codec_min_size", 64))
+        self.retention_max_age_days: int = int(self.config.get("retention_max_age_days", 0))
+        self.retention_max_messages: int = int(self.config.get("retention_max_messages", 0))
+
+        # [CONTEXT]
+        self.context_token_budget: int = int(self.config.get("context_token_budget", 3000))
+        self.context_max_messages: int = int(self.config.get("context_max_messages", 50))
+        # The session being answered is always cached
+        self.context_cached_sessions: int = max(1, int(self.config.get("context_cached_sessions", 1000)))
+        self.compaction_threshold: int = int(self.config.get("compaction_threshold", 60))
+        self.compaction_keep: int = int(self.config.get("compaction_keep", 20))
+        if self.compaction_threshold > 0 and self.compaction_keep >= self.compaction_threshold:
+            raise ValueError(f"COMPACTION_KEEP ({self.compaction_keep}) must be lower than COMPACTION_THRESHOLD ({self.compaction_threshold}).")
+
+        # [MODEL]
+        self.prompt_timeout: int = int(self.config.get("prompt_timeout", 10))
+        self.stream_responses: bool = str(self.config.get("stream_responses", "true")).lower() == "true"
+        self.stream_timeout: int = int(self.config.get("stream_timeout", 120))
+        self.stream_edit_interval: float = float(self.config.get("stream_edit_interval", 1.0))
+        self.provider_failure_threshold: int = int(self.config.get("provider_failure_threshold", 3))
+        self.provider_cooldown: int = int(self.config.get("provider_cooldown", 30))
+        self.max_queued_prompts: int = int(self.config.get("max_queued_prompts", 3))
+        self.max_concurrent_prompts: int = int(self.config.get("max_concurrent_prompts", 16))
+        self.hedge_requests: bool = str(self.config.get("hedge_requests", "false")).lower() == "true"
+        self.hedge_percentile: float = float(self.config.get("hedge_percentile", 0.9))
+        self.response_cache: bool = str(self.config.get("response_cache", "false")).lower() == "true"
+        self.response_cache_ttl: int = int(self.config.get("response_cache_ttl", 3600))
+        self.response_cache_max_entries: int = int(self.config.get("response_cache_max_entries", 1000))
+        self.response_cache_max_bytes: int = int(self.config.get("response_cache_max_bytes", 16777216))
+        self.response_cache_max_messages: int = int(self.config.get("response_cache_max_messages", 1))
+        self.response_cache_persist: bool = str(self.config.get("response_cache_persist", "false")).lower() == "true"
+        self.metrics: bool = str(self.config.get("metrics", "false")).lower() == "true"
+        self.metrics_host: str = self.config.get("metrics_host", "127.0.0.1")
+        self.metrics_port: int = int(self.config.get("metrics_port", 9108))
 
     def reload(self):
         """
@@ -0,0 +1,95 @@
+import os, sys
+from typing import List
+from discord.ext import commands
+
+class ShardReport:
+    """
+    Reports the memory usage of the bot process and the cache size of each of its shards.
+
+    Shards of an auto-sharded bot share one process, so the RSS is reported per process and
+    the caches, which are what the RSS grows with, per shard.
+
+    Attributes:
+        bot (commands.Bot): The instance of the Discord bot.
+    """
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+
+    @staticmethod
+    def get_rss() -> int:
+        """
+        Returns the resident set size of the process in bytes.
+
+        Falls back to the peak RSS where /proc isn't available.
+        """
+        try:
+            with open("/proc/self/statm", "r") as file:
+                return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return ShardReport.get_peak_rss()
+
+    @staticmethod
+    def get_peak_rss() -> int:
+        """Returns the peak resident set size of the process in bytes, or 0 where it's unavailable (Windows)."""
+        try:
+            import resource
+        except ImportError:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    @staticmethod
+    def format_bytes(size: float) -> str:
+        for unit in ("B", "KiB", "MiB"):
+            if size < 1024:
+                return f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} GiB"
+
+    def get_shards(self) -> List[dict]:
+        """
+        Returns the guilds, cached members, cached messages and latency of each shard.
+
+        Returns:
+            list: One dictionary per shard, ordered by shard ID.
+        """
+        shards = getattr(self.bot, "shards", None) or {
+            shard_id: None for shard_id in (getattr(self.bot, "shard_ids", None) or [self.bot.shard_id or 0])
+        }
+        report = {
+            shard_id: {
+                "id": shard_id,
+                "guilds": 0,
+                "members": 0,
+                "messages": 0,
+                "latency": shard.latency if shard is not None else self.bot.latency,
+            }
+            for shard_id, shard in shards.items()
+        }
+
+        for guild in self.bot.guilds:
+            entry = report.get(guild.shard_id)
+            if entry is not None:
+                entry["guilds"] += 1
+                entry["members"] += len(guild.members)
+
+        for message in self.bot.cached_messages:
+            entry = report.get(message.guild.shard_id) if message.guild is not None else None
+            if entry is not None:
+                entry["messages"] += 1
+
+        return [report[shard_id] for shard_id in sorted(report)]
+
+    def format(self) -> str:
+        """Returns the report as text, one line per shard."""
+        lines = [f"Process RSS: {self.format_bytes(self.get_rss())}"]
+        for shard in self.get_shards():
+            latency = shard["latency"]
+            latency = f"{latency * 1000:.0f}ms" if latency == latency and latency != float("inf") else "n/a"
+            lines.append(
+                f"Shard {shard['id']}: {shard['guilds']} guild(s), {shard['members']} cached member(s), "
+                f"{shard['messages']} cached message(s), latency {latency}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,221 @@
+import time, bisect
+from loguru import logger
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from src.helper.config import Config
+
+# Upper bounds in seconds of the histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+DESCRIPTIONS = {
+    "prompt_seconds": "Time from a received message to the end of its answer.",
+    "prompt_stage_seconds": "Time spent in each stage of a prompt.",
+    "provider_request_seconds": "Time to a provider's answer, or to its first streamed chunk.",
+    "provider_errors_total": "Failed provider requests.",
+    "expiry_seconds": "Time to expire a batch of sessions, channel deletions and notifications included.",
+    "expired_sessions_total": "Expired sessions.",
+    "room_creation_seconds": "Time to open a room, from the deferred interaction to the welcome message.",
+    "rest_requests_total": "Discord REST requests, by priority.",
+    "rest_background_wait_seconds": "Time background Discord jobs waited for a slot of the REST budget.",
+    "rest_background_queue_depth": "Background Discord jobs waiting for a slot of the REST budget.",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """
+    Bucketed latency histogram, plus a window of the most recent samples for percentiles.
+
+    Attributes:
+        buckets (list): Number of samples per bucket of `BUCKETS` (not cumulative), the last one is +Inf.
+        count (int): Number of samples.
+        sum (float): Sum of the samples.
+    """
+    WINDOW = 1000
+
+    def __init__(self) -> None:
+        self.buckets: List[int] = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent: Deque[float] = deque(maxlen=self.WINDOW)
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Returns the given percentile (0-1) of the recent samples, or None without samples."""
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile))]
+
+class Timer:
+    """Times a block into a histogram. Labels can be added inside the block with `label`."""
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics: "Metrics", name: str, labels: dict) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def label(self, **labels) -> None:
+        self.labels.update(labels)
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+class NoopTimer:
+    """Stands in for `Timer` when metrics are disabled, so timed blocks cost next to nothing."""
+    __slots__ = ()
+
+    def label(self, **labels) -> None:
+        pass
+
+    def __enter__(self) -> "NoopTimer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+NOOP_TIMER = NoopTimer()
+
+class Metrics:
+    """
+    In-process latency histograms, counters and gauges, exposed in the Prometheus text format.
+
+    Disabled unless `metrics` is set: `timer` then returns a shared no-op timer and `observe`,
+    `inc` and `set` return right away. When enabled, `/metrics` is served on `metrics_host`:`metrics_port`.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.enabled: bool = self.config.metrics
+            self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+            self._counters: Dict[str, Dict[Labels, float]] = {}
+            self._gauges: Dict[str, Dict[Labels, float]] = {}
+            self._runner = None
+
+    def timer(self, name: str, **labels):
+        """Returns a context manager timing its block into the named histogram."""
+        if not self.enabled:
+            return NOOP_TIMER
+        return Timer(self, name, labels)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Adds a sample in seconds to the named histogram."""
+        if not self.enabled:
+            return
+        series = self._histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increments the named counter."""
+        if not self.enabled:
+            return
+        series = self._counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        """Sets the named gauge."""
+        if not self.enabled:
+            return
+        self._gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def get_percentiles(self) -> List[Tuple[str, dict, int, Optional[float], Optional[float]]]:
+        """
+        Returns the p50 and p99 of the recent samples of every histogram.
+
+        Returns:
+            list: (name, labels, count, p50, p99) tuples, ordered by name and labels.
+        """
+        return [
+            (name, dict(key), histogram.count, histogram.percentile(0.5), histogram.percentile(0.99))
+            for name in sorted(self._histograms)
+            for key, histogram in sorted(self._histograms[name].items())
+        ]
+
+    @staticmethod
+    def _format_labels(key: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = key + extra
+        if not pairs:
+            return ""
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+        return "{" + ",".join(f'{label}="{value}"' for (label, _), value in zip(pairs, escaped)) + "}"
+
+    def render(self) -> str:
+        """Renders every metric in the Prometheus text exposition format."""
+        lines = []
+        for name in sorted(self._histograms):
+            if name in DESCRIPTIONS:
+                lines.append(f"# HELP {name} {DESCRIPTIONS[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in sorted(self._histograms[name].items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), histogram.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{self._format_labels(key, (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{self._format_labels(key)} {histogram.sum}")
+                lines.append(f"{name}_count{self._format_labels(key)} {histogram.count}")
+
+        for name in sorted(self._counters):
+            if name in DESCRIPTIONS:
+                lines.append(f"# HELP {name} {DESCRIPTIONS[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(self._counters[name].items()):
+                lines.append(f"{name}{self._format_labels(key)} {value}")
+
+        for name in sorted(self._gauges):
+            if name in DESCRIPTIONS:
+                lines.append(f"# HELP {name} {DESCRIPTIONS[name]}")
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in sorted(self._gauges[name].items()):
+                lines.append(f"{name}{self._format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    async def _handle_metrics(self, request):
+        from aiohttp import web
+        return web.Response(text=self.render(), content_type="text/plain", charset="utf-8")
+
+    async def start_server(self) -> None:
+        """Serves `/metrics` over HTTP, if metrics are enabled."""
+        if not self.enabled or self._runner is not None:
+            return
+        try:
+            # The server side of aiohttp is only imported when it's used
+            from aiohttp import web
+            app = web.Application()
+            app.router.add_get("/metrics", self._handle_metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, self.config.metrics_host, self.config.metrics_port).start()
+            logger.info(f"Serving metrics on http://{self.config.metrics_host}:{self.config.metrics_port}/metrics")
+        except Exception as e:
+            logger.error(f"Error starting the metrics server: {e}")
+            await self.stop_server()
+
+    async def stop_server(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,123 @@
+import sys, time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+class _TimedLoader:
+    """Wraps a module loader to time the execution of its module."""
+
+    def __init__(self, loader, profiler: "StartupProfiler") -> None:
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name: str):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        # Modules get their own loader back once executed
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        with self._profiler._time_import(module.__name__):
+            self._loader.exec_module(module)
+
+class _ImportTimer:
+    """Meta path finder handing out timed loaders for the modules found by the other finders."""
+
+    def __init__(self, profiler: "StartupProfiler") -> None:
+        self._profiler = profiler
+
+    def find_spec(self, name: str, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self._profiler)
+                return spec
+        return None
+
+class StartupProfiler:
+    """
+    Times the imports and setup steps of the bot's startup, when started with `--profile-startup`.
+
+    Imports are timed from the moment `start` is called, each with its own time (`self`) and
+    the time of the imports it triggered (`total`). Setup steps are timed with `step`, steps
+    running concurrently overlap.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.enabled = False
+            self.started_at: Optional[float] = None
+            # name -> (self seconds, total seconds, top-level)
+            self.imports: Dict[str, Tuple[float, float, bool]] = {}
+            self.steps: List[Tuple[str, float]] = []
+            self._stack: List[List[float]] = []
+            self._finder: Optional[_ImportTimer] = None
+
+    def start(self) -> None:
+        """Starts timing the imports."""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.started_at = time.perf_counter()
+        self._finder = _ImportTimer(self)
+        sys.meta_path.insert(0, self._finder)
+
+    def stop_imports(self) -> None:
+        """Stops timing the imports."""
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    @contextmanager
+    def _time_import(self, name: str):
+        # [start, time of the nested imports]
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            total = time.perf_counter() - frame[0]
+            if self._stack:
+                self._stack[-1][1] += total
+            self.imports[name] = (total - frame[1], total, not self._stack)
+
+    @contextmanager
+    def step(self, name: str):
+        """Times a setup step, if profiling."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def report(self, limit: int = 15) -> str:
+        """Returns the slowest top-level imports and modules, and the time of each setup step."""
+        elapsed = time.perf_counter() - self.started_at if self.started_at is not None else 0.0
+        top_level = sorted(((total, name) for name, (_, total, top) in self.imports.items() if top), reverse=True)
+        slowest = sorted(((own, name) for name, (own, _, _) in self.imports.items()), reverse=True)
+
+        lines = [f"Startup profile: {elapsed:.3f}s since the first timed import, {len(self.imports)} module(s) imported."]
+        lines.append(f"Slowest top-level imports (with their own imports), {sum(total for total, _ in top_level):.3f}s in total:")
+        lines.extend(f"  {total:8.3f}s  {name}" for total, name in top_level[:limit])
+        lines.append("Slowest modules (on their own):")
+        lines.extend(f"  {own:8.3f}s  {name}" for own, name in slowest[:limit])
+        lines.append("Setup steps:")
+        lines.extend(f"  {seconds:8.3f}s  {name}" for name, seconds in self.steps)
+        return "\n".join(lines)
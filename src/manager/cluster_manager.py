@@ -0,0 +1,104 @@
+import os, json, uuid, asyncio
+from loguru import logger
+from typing import Callable, Dict, List
+from src.database.backend.base import get_backend
+
+class ClusterManager:
+    """
+    Coordinates the bot processes sharing a storage backend.
+
+    Processes tell each other about the changes they make through events, each handled by the
+    handlers registered for it with `on`, and take turns on cluster-wide jobs (session expiry,
+    retention, dictionary training) through named locks: a job runs in the process holding its
+    lock, and moves to another process once that one goes away. Events are delivered at most
+    once: the ones published while this process was disconnected are lost, so the handlers
+    registered with `on_reconnect` are called once events come in again, to catch up on what
+    was missed. With a backend that isn't shared, this process is the whole cluster.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.backend = get_backend()
+            self.process_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            self._handlers: Dict[str, List[Callable[[dict], None]]] = {}
+            self._reconnect_handlers: List[Callable[[], None]] = []
+            self._started = False
+
+    @property
+    def shared(self) -> bool:
+        return self.backend.shared
+
+    def on(self, event: str, handler: Callable[[dict], None]) -> None:
+        """Registers a handler of the events of the given type published by other processes."""
+        self._handlers.setdefault(event, []).append(handler)
+
+    def on_reconnect(self, handler: Callable[[], None]) -> None:
+        """Registers a handler called after a lost connection to the cluster is back, events published meanwhile being lost."""
+        self._reconnect_handlers.append(handler)
+
+    async def start(self) -> None:
+        """Starts receiving the events of the other processes."""
+        if self._started or not self.shared:
+            return
+        await self.backend.listen(self._dispatch)
+        self.backend.on_reconnect(self._on_reconnect)
+        self._started = True
+        logger.debug(f"Joined the bot cluster as process {self.process_id}.")
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.error(f"Received a malformed cluster event: {payload}")
+            return
+        # Events come back to the process that published them
+        if message.get("origin") == self.process_id:
+            return
+
+        for handler in self._handlers.get(message.get("event"), []):
+            try:
+                handler(message.get("data", {}))
+            except Exception as e:
+                logger.error(f"Error handling cluster event {message.get('event')}: {e}")
+
+    def _on_reconnect(self) -> None:
+        logger.info("Reconnected to the bot cluster, catching up on the missed events...")
+        for handler in self._reconnect_handlers:
+            try:
+                handler()
+            except Exception as e:
+                logger.error(f"Error handling the cluster reconnection: {e}")
+
+    async def publish(self, event: str, **data) -> None:
+        """Publishes an event to the other processes, if there are any."""
+        if not self.shared:
+            return
+        try:
+            await self.backend.notify(json.dumps({"origin": self.process_id, "event": event, "data": data}))
+        except Exception as e:
+            logger.error(f"Error publishing cluster event {event}: {e}")
+
+    def publish_nowait(self, event: str, **data) -> None:
+        """Publishes an event in the background, for callers that can't wait."""
+        if self.shared:
+            asyncio.get_running_loop().create_task(self.publish(event, **data))
+
+    async def acquire(self, job: str) -> bool:
+        """
+        Returns whether this process runs the given cluster-wide job, taking the job's lock if it's free.
+
+        Errors count as not holding it, the job is left to the other processes.
+        """
+        try:
+            return await self.backend.try_lock(job)
+        except Exception as e:
+            logger.error(f"Error acquiring the cluster lock of {job}: {e}")
+            return False
@@ -0,0 +1,98 @@
+import os, json, asyncio, hashlib
+from loguru import logger
+from typing import Dict, Optional
+from discord import app_commands
+from discord.abc import Snowflake
+
+# Fingerprint of a scope without commands
+EMPTY_FINGERPRINT = hashlib.sha256(b"").hexdigest()
+
+class CommandSyncManager:
+    """
+    Syncs the slash commands only when they changed since their last sync.
+
+    Each scope (the global commands, or the commands of a guild) gets a fingerprint, a hash of
+    its commands as they are sent to Discord. The fingerprint of the last sync of every scope is
+    persisted to `data/command_sync.json`, so restarts and guild joins don't sync the same
+    commands again. A scope that was never synced counts as synced without commands.
+    """
+    _instance = None
+    _global_scope = "global"
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.sync_file = 'data/command_sync.json'
+            self.fingerprints: Dict[str, str] = {}
+            self._lock = asyncio.Lock()
+            self._load()
+
+    @classmethod
+    def _scope(cls, guild: Optional[Snowflake]) -> str:
+        return cls._global_scope if guild is None else str(guild.id)
+
+    @staticmethod
+    def fingerprint(tree: app_commands.CommandTree, guild: Optional[Snowflake] = None) -> str:
+        """Returns the hash of the commands of the tree in the given scope, global if no guild is given."""
+        payloads = sorted(json.dumps(command.to_dict(tree), sort_keys=True, default=str) for command in tree.get_commands(guild=guild))
+        return hashlib.sha256("\n".join(payloads).encode("utf-8")).hexdigest()
+
+    def is_synced(self, tree: app_commands.CommandTree, guild: Optional[Snowflake] = None) -> bool:
+        """Returns whether the commands of the scope are the ones of its last sync."""
+        return self.fingerprints.get(self._scope(guild), EMPTY_FINGERPRINT) == self.fingerprint(tree, guild=guild)
+
+    async def sync(self, tree: app_commands.CommandTree, guild: Optional[Snowflake] = None, force: bool = False) -> bool:
+        """
+        Syncs the commands of the scope if they changed since its last sync, or if forced.
+
+        Parameters:
+            tree (app_commands.CommandTree): The command tree of the bot.
+            guild (Snowflake, optional): The guild to sync the commands of, the global commands if None.
+            force (bool, optional): Whether to sync even if the commands didn't change.
+
+        Returns:
+            bool: True if the commands were synced, False if they already were.
+        """
+        async with self._lock:
+            if not force and self.is_synced(tree, guild):
+                return False
+            fingerprint = self.fingerprint(tree, guild=guild)
+            await tree.sync(guild=guild)
+            self.fingerprints[self._scope(guild)] = fingerprint
+            await self.save()
+            return True
+
+    async def forget(self, guild: Snowflake) -> None:
+        """Drops the fingerprint of a guild the bot left."""
+        if self.fingerprints.pop(self._scope(guild), None) is not None:
+            await self.save()
+
+    def _load(self) -> None:
+        """Loads the persisted fingerprints, if any."""
+        try:
+            with open(self.sync_file, 'r') as file:
+                self.fingerprints = json.load(file)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error loading the slash command fingerprints: {e}")
+
+    def _write(self, data: dict) -> None:
+        os.makedirs(os.path.dirname(self.sync_file), exist_ok=True)
+        temp_file = f"{self.sync_file}.tmp"
+        with open(temp_file, 'w') as file:
+            json.dump(data, file)
+        os.replace(temp_file, self.sync_file)
+
+    async def save(self) -> None:
+        """Persists the fingerprints without blocking the event loop."""
+        try:
+            await asyncio.to_thread(self._write, dict(self.fingerprints))
+        except Exception as e:
+            logger.error(f"Error saving the slash command fingerprints: {e}")
@@ -0,0 +1,107 @@
+import time, heapq, asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from src.helper.config import Config
+
+class ExpiryManager:
+    """
+    Deadline-ordered scheduler of session expiries.
+
+    Every session touch pushes its new deadline (`last_used` plus `session_ttl_minutes`) onto a
+    min-heap, older entries of the same session are skipped lazily once they surface. `wait_due`
+    sleeps until the earliest deadline, so sessions expire close to their real deadline instead
+    of on a fixed polling interval.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self._heap: List[Tuple[float, int]] = []
+            self._deadlines: Dict[int, float] = {}
+            self._changed = asyncio.Event()
+
+    @property
+    def ttl(self) -> float:
+        return self.config.session_ttl_minutes * 60
+
+    @staticmethod
+    def parse_timestamp(timestamp: str) -> float:
+        """Converts a UTC timestamp in SQLite's CURRENT_TIMESTAMP format to epoch seconds."""
+        return datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+
+    def deadline(self, last_used: Optional[str]) -> float:
+        """Returns when a session last used at the given time expires, in epoch seconds."""
+        return (self.parse_timestamp(last_used) if last_used else time.time()) + self.ttl
+
+    def is_expired(self, last_used: Optional[str]) -> bool:
+        return self.deadline(last_used) <= time.time()
+
+    def touch(self, owner_id: int, last_used: Optional[str]) -> None:
+        """
+        Schedules (or reschedules) the expiry of a session.
+
+        Args:
+            owner_id (int): The ID of the session's owner.
+            last_used (str): When the session was last used.
+        """
+        self._schedule(owner_id, self.deadline(last_used))
+
+    def postpone(self, owner_id: int, delay: float) -> None:
+        """Schedules the expiry of a session in `delay` seconds, e.g. to retry a failed expiry."""
+        self._schedule(owner_id, time.time() + delay)
+
+    def _schedule(self, owner_id: int, deadline: float) -> None:
+        self._deadlines[owner_id] = deadline
+        if not self._heap or deadline < self._heap[0][0]:
+            self._changed.set()
+        heapq.heappush(self._heap, (deadline, owner_id))
+
+        # Rebuild once stale entries of often touched sessions outnumber the live ones
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(deadline, owner_id) for owner_id, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def remove(self, owner_id: int) -> None:
+        """Unschedules the expiry of a session, its heap entries are dropped lazily."""
+        self._deadlines.pop(owner_id, None)
+
+    def _discard_stale(self) -> None:
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now: float) -> List[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, owner_id = heapq.heappop(self._heap)
+            if self._deadlines.get(owner_id) == deadline:
+                del self._deadlines[owner_id]
+                due.append(owner_id)
+        return due
+
+    async def wait_due(self) -> List[int]:
+        """
+        Waits until at least one session expires.
+
+        Returns:
+            list: The owner IDs of the expired sessions, they're no longer scheduled.
+        """
+        while True:
+            self._changed.clear()
+            self._discard_stale()
+            now = time.time()
+            if self._heap and self._heap[0][0] <= now:
+                return self._pop_due(now)
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,193 @@
+import os, sys, copy, json, time, queue, atexit, asyncio, threading, traceback
+from loguru import logger
+from typing import Callable, Dict, Optional, Tuple
+from src.helper.config import Config
+
+class LogRotation:
+    """
+    Rotates the log file once a message would take it past `size` bytes, or once a multiple of
+    `interval` seconds (since the epoch, so daily rotations happen at midnight UTC) has passed.
+    Either can be 0 to disable it.
+    """
+
+    def __init__(self, size: int, interval: int) -> None:
+        self.size = size
+        self.interval = interval
+        self._next_rotation: Optional[float] = None
+
+    def _boundary(self, now: float) -> float:
+        return (now // self.interval + 1) * self.interval
+
+    def __call__(self, message, file) -> bool:
+        if self.interval:
+            now = message.record["time"].timestamp()
+            if self._next_rotation is None:
+                self._next_rotation = self._boundary(now)
+            elif now >= self._next_rotation:
+                self._next_rotation = self._boundary(now)
+                return True
+        if self.size:
+            file.seek(0, 2)
+            return file.tell() + len(message) > self.size
+        return False
+
+class LogSampler:
+    """
+    Caps how many warnings and errors each logging call site emits per window.
+
+    Past `limit` records in `window` seconds, the records of a call site (module and line) are
+    dropped until the window is over. The first record let through afterwards tells how many
+    were dropped. Critical records are never dropped.
+    """
+
+    def __init__(self, limit: int, window: int) -> None:
+        self.limit = limit
+        self.window = window
+        # (module, line) -> [window start, records in the window, dropped records]
+        self._sites: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record: dict) -> None:
+        if self.limit <= 0 or record["level"].no < 30 or record["level"].no >= 50:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.setdefault((record["name"], record["line"]), [now, 0, 0])
+            if now - site[0] >= self.window:
+                site[0], site[1] = now, 0
+            site[1] += 1
+            if site[1] > self.limit:
+                site[2] += 1
+                record["extra"]["_dropped"] = True
+                return
+            dropped, site[2] = site[2], 0
+
+        if dropped:
+            record["message"] += f" ({dropped} similar line(s) dropped)"
+            record["extra"]["dropped"] = dropped
+
+class BackgroundSink:
+    """
+    Sink handing the formatted records to a writer thread through an in-process queue.
+
+    loguru's own `enqueue` pickles every record for the sake of multiprocessing, which costs the
+    caller more than the write it saves. Here the caller only formats the record and queues it.
+    """
+
+    def __init__(self, write: Callable[[str], None], name: str) -> None:
+        self._write = write
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def __call__(self, message: str) -> None:
+        self._queue.put(message)
+
+    def _run(self) -> None:
+        while True:
+            message = self._queue.get()
+            if isinstance(message, threading.Event):
+                message.set()
+                continue
+            try:
+                self._write(message)
+            except Exception as e:
+                sys.__stderr__.write(f"Error writing a log record: {e}\n")
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Waits for the records queued so far to be written."""
+        written = threading.Event()
+        self._queue.put(written)
+        written.wait(timeout)
+
+class LogManager:
+    """
+    Sets up the log sinks.
+
+    Records are written by background threads (`BackgroundSink`), so logging never blocks the
+    event loop on console or disk writes. The log file is appended to, rotated by size and time,
+    and rotated files are compressed, by a logger of its own in the writer thread. With
+    `log_format` set to json, the log file holds one JSON object per record, carrying the
+    context bound with `logger.contextualize` or `logger.bind` (session, channel, user,
+    provider...). Noisy warnings and errors are sampled by `LogSampler`.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.sampler = LogSampler(self.config.log_sample_limit, self.config.log_sample_window)
+            self.sinks = []
+            atexit.register(self.flush)
+
+    @staticmethod
+    def _drop_sampled(record: dict) -> bool:
+        return not record["extra"].get("_dropped", False)
+
+    @staticmethod
+    def _format_json(record: dict) -> str:
+        entry = {
+            "time": record["time"].isoformat(),
+            "level": record["level"].name,
+            "module": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            "message": record["message"],
+        }
+        entry.update((key, value) for key, value in record["extra"].items() if not key.startswith("_"))
+        if record["exception"] is not None:
+            exception = record["exception"]
+            entry["exception"] = "".join(traceback.format_exception(exception.type, exception.value, exception.traceback))
+        record["extra"]["_json"] = json.dumps(entry, default=str)
+        return "{extra[_json]}\n"
+
+    def _add_sink(self, write: Callable[[str], None], name: str, **options) -> None:
+        sink = BackgroundSink(write, name)
+        self.sinks.append(sink)
+        logger.add(sink, level=self.config.log_level, filter=self._drop_sampled, **options)
+
+    def setup(self) -> None:
+        """Replaces the default console sink, and adds the file sink if a log file is configured."""
+        logger.remove()
+        # Independent logger writing the formatted records to the file, from the writer thread
+        file_logger = copy.deepcopy(logger)
+        logger.configure(patcher=self.sampler)
+
+        self._add_sink(sys.stderr.write, "log-console", colorize=sys.stderr.isatty())
+
+        log_file = self.config.log_file
+        if not log_file:
+            return
+        log_directory = os.path.dirname(log_file)
+        if log_directory:
+            os.makedirs(log_directory, exist_ok=True)
+
+        file_logger.add(
+            log_file,
+            level=0,
+            format="{message}",
+            rotation=LogRotation(self.config.log_rotation_size_mb * 1024 * 1024, self.config.log_rotation_hours * 3600),
+            retention=self.config.log_retention or None,
+            compression=self.config.log_compression if self.config.log_compression != "none" else None,
+            encoding="utf-8"
+        )
+        write_file = file_logger.opt(raw=True).info
+        options = {"format": self._format_json} if self.config.log_format == "json" else {}
+        self._add_sink(write_file, "log-file", colorize=False, **options)
+
+    def flush(self) -> None:
+        """Waits for the queued records to be written."""
+        for sink in self.sinks:
+            sink.flush()
+
+    async def close(self) -> None:
+        """Waits for the queued records to be written, without blocking the event loop."""
+        await asyncio.to_thread(self.flush)
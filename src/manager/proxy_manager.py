@@ -0,0 +1,170 @@
+import time, random, asyncio, aiohttp
+from loguru import logger
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from src.helper.config import Config
+
+class ProxyStats:
+    """
+    Success, latency and quarantine state of a single proxy.
+
+    Attributes:
+        address (str): The proxy as written in the proxies file (`[user:pass@]host:port`).
+        successes (int): Number of requests that went through the proxy.
+        failures (int): Number of requests that failed because of the proxy.
+        latency (float): Exponentially weighted average latency of successful requests.
+        consecutive_failures (int): Failures since the last success.
+        quarantined_until (float): Monotonic time until which the proxy isn't handed out.
+    """
+
+    def __init__(self, address: str) -> None:
+        self.address = address
+        self.successes = 0
+        self.failures = 0
+        self.latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.quarantined_until = 0.0
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.address}"
+
+    def is_quarantined(self, now: float) -> bool:
+        return now < self.quarantined_until
+
+    def score(self) -> float:
+        """Lower is better, proxies that were never used score best so they get measured."""
+        total = self.successes + self.failures
+        if total == 0:
+            return 0.0
+        success_rate = self.successes / total
+        return (self.latency or 1.0) / max(success_rate, 0.05)
+
+class ProxyManager:
+    """
+    Pool of proxies loaded once from `PROXIES_FILE`, picked by score instead of at random.
+
+    Proxies that fail at the connection level are quarantined with an exponential backoff,
+    a periodic health check lets them back in once they accept connections again. Only
+    proxy-related errors count against a proxy, provider errors are left to the provider router.
+    """
+    _instance = None
+    _max_quarantine = 1800
+    _health_check_timeout = 5
+    _health_check_concurrency = 20
+    _latency_weight = 0.3
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if not self._initialized:
+            self._initialized = True
+            self.config = Config()
+            self.proxies: Dict[str, ProxyStats] = {address: ProxyStats(address) for address in self.config.proxies}
+            if self.proxies:
+                logger.debug(f"Loaded {len(self.proxies)} proxies into the proxy pool.")
+
+    @property
+    def proxyless(self) -> bool:
+        return not self.proxies
+
+    def acquire(self) -> Optional[str]:
+        """
+        Picks a proxy for a request.
+
+        Two healthy proxies are sampled and the better scored one wins, which favours fast and
+        reliable proxies without sending every request to the same one. If every proxy is
+        quarantined, the one whose quarantine ends first is used.
+
+        Returns:
+            str or None: The proxy address, or None if proxyless.
+        """
+        if self.proxyless:
+            return None
+
+        now = time.monotonic()
+        healthy = [stats for stats in self.proxies.values() if not stats.is_quarantined(now)]
+        if not healthy:
+            return min(self.proxies.values(), key=lambda stats: stats.quarantined_until).address
+
+        candidates = random.sample(healthy, min(2, len(healthy)))
+        return min(candidates, key=lambda stats: stats.score()).address
+
+    def get_url(self, address: Optional[str]) -> Optional[str]:
+        """Returns the URL to hand to the HTTP client for a proxy address."""
+        return self.proxies[address].url if address in self.proxies else None
+
+    @staticmethod
+    def get_label(address: Optional[str]) -> str:
+        """Returns the host and port of a proxy, without its credentials, to label metrics with."""
+        return address.rsplit("@", 1)[-1] if address else "none"
+
+    def record_success(self, address: Optional[str], latency: float) -> None:
+        """Records a request that went through the proxy."""
+        stats = self.proxies.get(address)
+        if stats is None:
+            return
+        stats.successes += 1
+        stats.consecutive_failures = 0
+        stats.quarantined_until = 0.0
+        stats.latency = latency if stats.latency is None else (1 - self._latency_weight) * stats.latency + self._latency_weight * latency
+
+    def record_failure(self, address: Optional[str]) -> None:
+        """Records a proxy failure and quarantines the proxy with an exponential backoff."""
+        stats = self.proxies.get(address)
+        if stats is None:
+            return
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        backoff = min(self.config.proxy_quarantine * 2 ** (stats.consecutive_failures - 1), self._max_quarantine)
+        stats.quarantined_until = time.monotonic() + backoff
+        logger.debug(f"Quarantined proxy {stats.address} for {backoff}s.")
+
+    @staticmethod
+    def is_proxy_error(error: Exception) -> bool:
+        """Returns whether an error was most likely caused by the proxy rather than the provider."""
+        if isinstance(error, (aiohttp.ClientConnectionError, ConnectionError)):
+            return True
+        return "proxy" in str(error).lower()
+
+    def get_quarantined(self) -> List[ProxyStats]:
+        """Returns the proxies currently in quarantine."""
+        now = time.monotonic()
+        return [stats for stats in self.proxies.values() if stats.is_quarantined(now)]
+
+    async def health_check(self) -> None:
+        """
+        Checks whether quarantined proxies accept connections again.
+
+        Proxies that do are released from quarantine on probation: their failure streak is kept,
+        so a new failure puts them back in quarantine for longer.
+        """
+        quarantined = self.get_quarantined()
+        if not quarantined:
+            return
+
+        semaphore = asyncio.Semaphore(self._health_check_concurrency)
+
+        async def check(stats: ProxyStats) -> None:
+            async with semaphore:
+                if await self._is_reachable(stats.address):
+                    stats.quarantined_until = 0.0
+
+        await asyncio.gather(*(check(stats) for stats in quarantined))
+        released = len(quarantined) - len(self.get_quarantined())
+        logger.debug(f"Proxy health check released {released}/{len(quarantined)} quarantined proxies.")
+
+    async def _is_reachable(self, address: str) -> bool:
+        """Opens and closes a TCP connection to the proxy."""
+        try:
+            parts = urlsplit(f"http://{address}")
+            _, writer = await asyncio.wait_for(asyncio.open_connection(parts.hostname, parts.port or 80), self._health_check_timeout)
+            writer.close()
+            await writer.wait_closed()
+            return True
+        except Exception:
+            return False
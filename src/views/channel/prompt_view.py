@@ -1,9 +1,12 @@
 import discord
 from loguru import logger
 from src.helper.config import Config
+from src.helper.metrics import Metrics
 from src.database.schema.sessions import SessionSchema
 from src.database.controller.sessions import SessionsController
 from src.controller.ai.prompt_controller import PromptController
+from src.controller.ai.prompt_queue import PromptQueue, QueueFullError
+from src.controller.discord.stream_renderer import StreamRenderer
 
 class PromptModal(discord.ui.Modal, title='Add room prompt'):
     """
@@ -11,51 +14,85 @@ class PromptModal(discord.ui.Modal, title='Add room prompt'):
 
     Attributes:
     - config: An instance of the Config class.
+    - metrics: An instance of the Metrics class, timing each stage of a prompt.
     - sessions: An instance of the SessionsController class.
     - prompt_controller: An instance of the PromptController class.
+    - prompt_queue: An instance of the PromptQueue class.
     - user_prompt: A TextInput component for entering the prompt.
 
     Methods:
     - on_submit: Handles the submission of the prompt.
+    - handle_submit: Answers the submitted prompt.
     - on_error: Handles any errors that occur during the interaction.
     """
     def __init__(self):
         self.config = Config()
+        self.metrics = Metrics()
         self.sessions = SessionsController()
         self.prompt_controller = PromptController()
+        self.prompt_queue = PromptQueue()
         super().__init__()
 
     user_prompt = discord.ui.TextInput(label='Prompt', style=discord.TextStyle.long, placeholder='Enter the prompt you want to give to the model.')
 
     async def on_submit(self, interaction: discord.Interaction):
+        # Records logged while answering carry the channel and user
+        with self.metrics.timer("prompt_seconds"), logger.contextualize(channel_id=interaction.channel.id, user_id=interaction.user.id):
+            await self.handle_submit(interaction)
+
+    async def handle_submit(self, interaction: discord.Interaction):
+        message = None
         try:
             await interaction.response.defer(ephemeral=False)
 
             # Send the initial response message.
             message = await interaction.followup.send('Please wait for an answer from the model...')
 
-            fetch_session = await self.sessions_controller.get_session(message.author.id)
+            with self.metrics.timer("prompt_stage_seconds", stage="session_lookup"):
+                fetch_session = await self.sessions.get_session(interaction.user.id)
             session_id = fetch_session.id if fetch_session is not None else None
             if session_id is None:
                 return await message.edit(content='You do not have an active session. Please start a session first.')
 
-            # Typing indicator context manager.
-            async with interaction.channel.typing():
-                response = await self.prompt_controller.send_prompt(session_id, self.user_prompt.value)
+            # Reserve a place in the session's prompt queue.
+            try:
+                ticket = self.prompt_queue.reserve(session_id)
+            except QueueFullError:
+                return await message.edit(content='You already have too many prompts waiting for an answer. Please wait for them first.')
+
+            if ticket.position > 0:
+                try:
+                    await message.edit(content=f'⏳ Queued (position {ticket.position}), your prompt will be answered shortly...')
+                except BaseException:
+                    ticket.release()
+                    raise
+
+            async with ticket:
+                if self.config.stream_responses:
+                    # Stream the response into the initial message as it is generated.
+                    renderer = StreamRenderer(interaction.channel.send, message=message)
+                    await renderer.render(self.prompt_controller.stream_prompt(session_id, self.user_prompt.value))
+                else:
+                    # Typing indicator context manager.
+                    async with interaction.channel.typing():
+                        response = await self.prompt_controller.send_prompt(session_id, self.user_prompt.value)
 
-            # Handle the response accordingly.
-            if response is None:
-                return await message.edit(content='The model failed to respond. Please try again either now or later.')
+                    # Handle the response accordingly.
+                    if response is None:
+                        return await message.edit(content='The model failed to respond. Please try again either now or later.')
 
-            await message.edit(content=response)
+                    with self.metrics.timer("prompt_stage_seconds", stage="discord_send"):
+                        await message.edit(content=response)
 
             # Update the session with the last used timestamp.
             session_schema = SessionSchema(owner_id=interaction.user.id, discord_channel_id=interaction.channel.id)
-            await self.sessions.update_session(session_schema)
+            with self.metrics.timer("prompt_stage_seconds", stage="session_update"):
+                await self.sessions.update_session(session_schema)
 
         except Exception as e:
             logger.error(f'An error occurred while processing the prompt: {e}')
-            await message.edit(content='An error occurred while processing your request. Please try again later.')
+            if message is not None:
+                await message.edit(content='An error occurred while processing your request. Please try again later.')
 
     async def on_error(self, interaction: discord.Interaction, error: Exception) -> None:
         logger.error(f'An error occurred with a prompt modal: {error}')